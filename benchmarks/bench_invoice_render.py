@@ -0,0 +1,58 @@
+# bench_invoice_render.py - Per-invoice render time: full openpyxl build vs cached template
+#
+# Usage: python benchmarks/bench_invoice_render.py [repeats]
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import invoice_render  # noqa: E402
+
+LINE_COUNTS = (5, 40, 200)
+
+
+def sample_invoice(lines):
+    return {
+        'invoice_number': 20260101120000,
+        'time': '01-Jan-2026 12:00 PM',
+        'customer_name': 'Benchmark Customer',
+        'customer_phone': '0300-0000000',
+        'lines': [(invoice_render.invoice_item_label(f"Item {i}", 'آئٹم', 'Large'), '2.5 kg', '120', '300')
+                  for i in range(lines)]
+    }
+
+
+def render_openpyxl(invoice):
+    """Previous path: build the whole workbook and let openpyxl serialise it."""
+    invoice_render.build_invoice_workbook(invoice).save(io.BytesIO())
+
+
+def render_template(invoice):
+    invoice_render.get_template().render(invoice)
+
+
+def timed(fn, invoice, repeats):
+    fn(invoice)  # warm-up (also builds the template once)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(invoice)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    start = time.perf_counter()
+    invoice_render.InvoiceTemplate()
+    print(f"One-off template build: {(time.perf_counter() - start) * 1000:.2f} ms")
+    print(f"{'lines':>6}  {'openpyxl ms':>12}  {'template ms':>12}  {'speed-up':>8}")
+    for lines in LINE_COUNTS:
+        invoice = sample_invoice(lines)
+        before = timed(render_openpyxl, invoice, repeats)
+        after = timed(render_template, invoice, repeats)
+        print(f"{lines:>6}  {before:>12.2f}  {after:>12.2f}  {before / after:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+# bench_suite.py - Headless timings of the data paths at production scale, written as a JSON report
+#
+# Usage: python benchmarks/bench_suite.py [--data-dir DIR | --years 1 --invoices-per-day 40 ... [--no-files]]
+#            [--repeats 5] [--out bench_report.json] [--compare previous_report.json]
+#
+# The data folder is copied to a temp dir first, so benchmarks that save never touch DIR.
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_data import generate_data_dir  # noqa: E402
+
+from fruzy_core import Ledger, normalize_transactions  # noqa: E402
+from fruzy_core import aggregation, excel_io  # noqa: E402
+from fruzy_core.ledger import load_by_date, save_by_date  # noqa: E402
+
+# A benchmark whose median grows by more than this against --compare is flagged
+REGRESSION_RATIO = 1.25
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """Register setup(ctx) -> fn; fn() is what gets timed, `repeats` times."""
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+def _busiest_day(ledger):
+    return max(ledger.all_sales, key=lambda d: len(ledger.all_sales[d]))
+
+
+@benchmark('ledger.load')
+def bench_load(ctx):
+    return lambda: Ledger.open(ctx['data_dir'])
+
+
+@benchmark('normalize_transactions (all records)')
+def bench_normalize(ctx):
+    raw = [day for kind in ('purchases', 'sales')
+           for day in load_by_date(ctx['ledger'].path(kind)).values()]
+    vegetables = ctx['ledger'].vegetables
+    return lambda: [normalize_transactions(day, vegetables, 'kg') for day in raw]
+
+
+@benchmark('ledger.save (one sale added)')
+def bench_save_one(ctx):
+    ledger = ctx['ledger']
+    day = max(ledger.all_sales)
+
+    def run():
+        ledger.add_sale(day, ledger.vegetables[0]['english'], '1', '100')
+        ledger.save('sales')
+    return run
+
+
+@benchmark('save_by_date (whole sales file)')
+def bench_save_full(ctx):
+    ledger = ctx['ledger']
+    return lambda: save_by_date(ledger.path('sales'), ledger.all_sales)
+
+
+@benchmark('ledger.refresh (nothing changed)')
+def bench_refresh(ctx):
+    ledger = ctx['ledger']
+    ledger.refresh()
+    return ledger.refresh
+
+
+@benchmark('day_totals (summary bar)')
+def bench_day_totals(ctx):
+    ledger = ctx['ledger']
+    day = _busiest_day(ledger)
+    return lambda: aggregation.day_totals(ledger.all_purchases.get(day, []), ledger.all_sales[day])
+
+
+@benchmark('daily summary aggregations')
+def bench_daily_summary(ctx):
+    ledger = ctx['ledger']
+    day = _busiest_day(ledger)
+    purchases, sales = ledger.all_purchases.get(day, []), ledger.all_sales[day]
+
+    def run():
+        aggregation.qty_movement(purchases, sales, ledger.vegetables)
+        aggregation.top_profit_items(purchases, sales, 5)
+        aggregation.day_breakdown(purchases, sales)
+    return run
+
+
+@benchmark('range_report (all dates)')
+def bench_range_report(ctx):
+    ledger = ctx['ledger']
+    dates = ledger.dates()
+    return lambda: aggregation.range_report(ledger.all_purchases, ledger.all_sales, dates)
+
+
+@benchmark('export_month (latest month)')
+def bench_export_month(ctx):
+    ledger = ctx['ledger']
+    year, month = map(int, max(ledger.all_sales)[:7].split('-'))
+    out_dir = tempfile.mkdtemp(dir=ctx['work_dir'])
+    return lambda: excel_io.export_month(ledger, year, month, out_dir)
+
+
+@benchmark('import single web invoice')
+def bench_import_invoice(ctx):
+    from invoice_render import invoice_payload, render_invoice
+    from fruzy_core.web_invoice import parse_web_invoice
+    ledger = ctx['ledger']
+    source = next(inv for inv in reversed(ledger.invoices) if inv.get('items'))
+    path = os.path.join(ctx['work_dir'], 'web_invoice.xlsx')
+    render_invoice(path, invoice_payload(source))
+    numbers = iter(range(int(datetime.now().strftime("%Y%m%d%H%M%S")) + 1, 10 ** 14))
+
+    def run():
+        # Same steps as CustomerInvoiceTab._import_single_web_invoice, under a fresh number each time
+        parsed = parse_web_invoice(path, ledger.vegetables)
+        parsed['invoice_number'] = next(numbers)
+        accepted, rejected = ledger.commit_web_invoices([parsed], source['date'])
+        assert accepted and not rejected
+    return run
+
+
+def _timed(fn, repeats):
+    fn()  # warm-up
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs': repeats,
+        'min_ms': round(min(runs), 3),
+        'median_ms': round(statistics.median(runs), 3),
+        'mean_ms': round(statistics.fmean(runs), 3),
+        'max_ms': round(max(runs), 3),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _compare(results, previous_path):
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    print(f"\nAgainst {previous_path} (commit {previous.get('commit') or '?'}):")
+    for name, result in results.items():
+        before = previous.get('results', {}).get(name)
+        if not before:
+            print(f"  {name:<40} (new)")
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        flag = "  <-- slower" if ratio > REGRESSION_RATIO else ""
+        print(f"  {name:<40} {before['median_ms']:>10.2f} -> {result['median_ms']:>10.2f} ms  {ratio:5.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Fruzy's data paths headlessly.")
+    parser.add_argument('--data-dir', help="existing data folder to benchmark (copied first)")
+    parser.add_argument('--years', type=float, default=1)
+    parser.add_argument('--items', type=int, default=60)
+    parser.add_argument('--invoices-per-day', type=int, default=40)
+    parser.add_argument('--lines-per-invoice', type=int, default=6)
+    parser.add_argument('--no-files', action='store_true', help="generate invoice records without .xlsx files")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--only', help="run only benchmarks whose name contains this text")
+    parser.add_argument('--out', default='bench_report.json')
+    parser.add_argument('--compare', help="earlier report to compare medians against")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='fruzy_bench_')
+    try:
+        data_dir = os.path.join(work_dir, 'data')
+        if args.data_dir:
+            shutil.copytree(args.data_dir, data_dir)
+            data = {'source': os.path.abspath(args.data_dir)}
+        else:
+            data = {'years': args.years, 'items': args.items, 'invoices_per_day': args.invoices_per_day,
+                    'lines_per_invoice': args.lines_per_invoice, 'invoice_files': not args.no_files}
+            data.update(generate_data_dir(data_dir, args.years, args.items, args.invoices_per_day,
+                                          args.lines_per_invoice, render_files=not args.no_files))
+        print(f"Data: {json.dumps(data)}")
+        results = {}
+        # The ledger logs every save; keep the timings' output readable
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            ctx = {'data_dir': data_dir, 'work_dir': work_dir, 'ledger': Ledger.open(data_dir, 'benchmark')}
+            for name, setup in BENCHMARKS:
+                if args.only and args.only not in name:
+                    continue
+                results[name] = _timed(setup(ctx), args.repeats)
+                print(f"  {name:<40} median {results[name]['median_ms']:>10.2f} ms", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'data': data,
+        'repeats': args.repeats,
+        'results': results,
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.out}")
+    if args.compare:
+        _compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
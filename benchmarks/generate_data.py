@@ -0,0 +1,148 @@
+# generate_data.py - Synthetic data/ folder at production scale, in the app's own JSON shapes
+#
+# Usage: python benchmarks/generate_data.py OUT_DIR [--years 1] [--items 60]
+#            [--invoices-per-day 40] [--lines-per-invoice 6] [--seed 1] [--no-files]
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fruzy_core.catalog import DEFAULT_VEGETABLES, VEGETABLES_FILE  # noqa: E402
+from fruzy_core.invoices import COUNTER_FILE, INVOICES_FILE, invoice_sales  # noqa: E402
+from fruzy_core.ledger import LEDGER_FILES  # noqa: E402
+from fruzy_core.records import make_purchase, make_sale  # noqa: E402
+from fruzy_core.web_invoice import TIME_FORMAT  # noqa: E402
+from invoice_render import invoice_filename, invoice_payload, render_invoice  # noqa: E402
+
+SIZES = ('Small', 'Normal', 'Large')
+# Sale price over cost (invoices pick one per line) and stock bought over stock sold
+MARKUP = (1.1, 1.4)
+MANUAL_MARKUP = 1.3
+RESTOCK = (1.0, 1.1)
+VENDORS = ('Main Vendor', 'Sabzi Mandi', 'Farm Direct')
+CUSTOMERS = ('Hotel Grand', 'Cafe Lahore', 'Ali Restaurant', 'Green Mart', 'City Canteen', 'Walk-in')
+
+
+def make_catalog(items):
+    """The default items plus numbered ones, up to `items`, shaped like vegetables.json."""
+    vegetables = [dict(v) for v in DEFAULT_VEGETABLES[:items]]
+    for n in range(len(vegetables) + 1, items + 1):
+        vegetables.append({'id': n, 'urdu': f"آئٹم {n}", 'english': f"Item {n}"})
+    return vegetables
+
+
+def _qty(rng):
+    return round(rng.choice((0.5, 1, 2, 2.5, 5, 10, 20)) * rng.uniform(0.8, 1.2), 2)
+
+
+def generate_data_dir(out_dir, years=1, items=60, invoices_per_day=40, lines_per_invoice=6,
+                      manual_sales_per_day=5, seed=1, end=None, render_files=True):
+    """Write a data/ folder with `years` of daily history ending at `end` (default today).
+
+    Each day gets `invoices_per_day` invoices of about `lines_per_invoice` lines (their
+    sales lines on the same date, as the app writes them), a few manual sales, and one
+    purchase per item sold, covering what was sold at cost, so days show a normal
+    margin. Invoice files are rendered into Customer_Invoices unless `render_files` is
+    off, in which case the records carry no filepath. Returns counts of what was written.
+    """
+    rng = random.Random(seed)
+    invoices_dir = os.path.join(out_dir, 'Customer_Invoices')
+    os.makedirs(invoices_dir, exist_ok=True)
+    vegetables = make_catalog(items)
+    rates = {v['english']: rng.uniform(40, 400) for v in vegetables}
+    end = end or date.today()
+    days = [end - timedelta(days=n) for n in range(int(years * 365) - 1, -1, -1)]
+
+    purchases_by_date = {}
+    sales_by_date = {}
+    invoices = []
+    for day in days:
+        date_str = day.isoformat()
+        opened = datetime(day.year, day.month, day.day, 8, 0)
+        sales = []
+        sold = {}
+        for n in range(invoices_per_day):
+            stamp = opened + timedelta(seconds=n * 37 + rng.randrange(30))
+            picks = rng.sample(vegetables, min(len(vegetables), max(1, int(rng.gauss(lines_per_invoice, 2)))))
+            invoice_items = []
+            for veg in picks:
+                qty = _qty(rng)
+                rate = round(rates[veg['english']] * rng.uniform(*MARKUP), 2)
+                invoice_items.append({'vegetable': veg['english'], 'urdu': veg['urdu'], 'size': rng.choice(SIZES),
+                                      'quantity': f"{qty} kg", 'rate': rate, 'total': round(qty * rate, 2)})
+                sold[veg['english']] = sold.get(veg['english'], 0) + qty
+            number = int(stamp.strftime("%Y%m%d%H%M%S"))
+            customer = rng.choice(CUSTOMERS)
+            invoice = {
+                'invoice_number': number,
+                'customer_name': customer,
+                'customer_phone': f"0300-{rng.randrange(10 ** 7):07d}",
+                'items': invoice_items,
+                'total_amount': sum(item['total'] for item in invoice_items),
+                'date': date_str,
+                'time': stamp.strftime(TIME_FORMAT),
+                'status': 'active',
+                'filepath': '',
+            }
+            if render_files:
+                invoice['filepath'] = os.path.join(invoices_dir, invoice_filename(number, customer))
+                render_invoice(invoice['filepath'], invoice_payload(invoice))
+            invoices.append(invoice)
+            sales.extend(invoice_sales(invoice))
+        for _ in range(manual_sales_per_day):
+            veg = rng.choice(vegetables)
+            qty = _qty(rng)
+            sales.append(make_sale(vegetables, veg['english'], qty, round(rates[veg['english']] * MANUAL_MARKUP, 2)))
+            sold[veg['english']] = sold.get(veg['english'], 0) + qty
+        purchases_by_date[date_str] = [
+            make_purchase(vegetables, english, round(qty * rng.uniform(*RESTOCK), 2), round(rates[english], 2),
+                          vendor=rng.choice(VENDORS), payment=rng.choice(('cash', 'credit')))
+            for english, qty in sorted(sold.items())
+        ]
+        sales_by_date[date_str] = sales
+
+    files = {
+        VEGETABLES_FILE: vegetables,
+        LEDGER_FILES['purchases']: purchases_by_date,
+        LEDGER_FILES['sales']: sales_by_date,
+        INVOICES_FILE: invoices,
+    }
+    for name, data in files.items():
+        with open(os.path.join(out_dir, name), 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(out_dir, COUNTER_FILE), 'w') as f:
+        json.dump({'last_invoice': 0}, f)
+    return {
+        'days': len(days),
+        'items': len(vegetables),
+        'purchases': sum(len(v) for v in purchases_by_date.values()),
+        'sales': sum(len(v) for v in sales_by_date.values()),
+        'invoices': len(invoices),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Fruzy data folder.")
+    parser.add_argument('out_dir')
+    parser.add_argument('--years', type=float, default=1)
+    parser.add_argument('--items', type=int, default=60)
+    parser.add_argument('--invoices-per-day', type=int, default=40)
+    parser.add_argument('--lines-per-invoice', type=int, default=6)
+    parser.add_argument('--manual-sales-per-day', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-files', action='store_true', help="skip rendering the invoice .xlsx files")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    counts = generate_data_dir(args.out_dir, args.years, args.items, args.invoices_per_day,
+                               args.lines_per_invoice, args.manual_sales_per_day, args.seed,
+                               render_files=not args.no_files)
+    print(json.dumps(counts), f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,266 +2,152 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 import os
 import sys
 import subprocess
 import shutil
+import tempfile
 from datetime import datetime
-import re
 import traceback
+from functools import partial
+from jobs import BatchJob
+from invoice_draft import DraftLine, InvoiceDraft
+from fruzy_core import InvoiceDateIndex, import_manifest, search_invoices
+from fruzy_core.events import InvoiceEvent, InvoicesReplaced
+from fruzy_core.rates import load_sale_rate_list, reprice_items
+from fruzy_core.web_invoice import parse_display_item, find_urdu_for_english, parse_web_invoice, pk_now
+from invoice_render import invoice_filename, invoice_payload, render_invoice, render_invoice_task
+from utils import Debouncer, row_key, sync_tree
+
+# Recent-invoices panel: rows shown at first, and added by each "Show more"
+INVOICE_PAGE_SIZE = 100
+
+
+def invoice_row_key(invoice):
+    """Tree iid of an invoice row; invoice records have no 'id', so the number stands in."""
+    number = invoice.get('invoice_number')
+    return f"inv{number}" if number is not None else row_key(invoice)
 
 
 class CustomerInvoiceTab:
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
+        # The invoice being composed; invoice_items_tree only renders it
+        self.draft = InvoiceDraft()
+        self.invoice_index = InvoiceDateIndex()
+        self.invoice_page_limit = INVOICE_PAGE_SIZE
+        self._invoice_list_scope = None
         self.create_widgets()
+        self.app.ledger.events.subscribe(InvoiceEvent, self._on_invoices_changed)
+        self.app.ledger.events.subscribe(InvoicesReplaced, self._on_invoices_changed)
+
+    def _on_invoices_changed(self, event):
+        # Records may have been swapped in place, which the date index cannot see by itself
+        self.invoice_index.invalidate()
+        self.app.invalidate('invoices')
 
     # ─────────────── Helper Methods ───────────────
     def _parse_display_item(self, display_str):
         """Extract English name, Urdu name, and size from display string like 'اردو (English) (Large)'"""
-        size = 'Normal'
-        raw_item = str(display_str).strip()
-        m_size = re.search(r"\((Small|Normal|Large)\)\s*$", raw_item, flags=re.IGNORECASE)
-        if m_size:
-            size = m_size.group(1).capitalize()
-            raw_item = re.sub(r"\s*\(%s\)\s*$" % re.escape(m_size.group(1)), '', raw_item, flags=re.IGNORECASE).strip()
-        english_name = raw_item
-        urdu_name = ''
-        m2 = re.search(r"\(([^)]+)\)\s*$", raw_item)
-        if m2:
-            english_name = m2.group(1).strip()
-            urdu_name = raw_item[:m2.start()].strip()
-        else:
-            english_name = raw_item.strip()
-        return english_name, urdu_name, size
+        return parse_display_item(display_str)
 
     def _find_urdu_for_english(self, english_name):
         """Look up Urdu name from app.vegetables list"""
-        vegetables = getattr(self.app, 'vegetables', [])
-        for v in vegetables:
-            if v.get('english', '').strip().lower() == english_name.lower():
-                return v.get('urdu', '')
-        return ''
+        return find_urdu_for_english(getattr(self.app, 'vegetables', []), english_name)
 
     def _match_rate_for_item(self, item_name):
         """Robustly match rate using English name only"""
-        if not hasattr(self.app, 'rate_list') or not self.app.rate_list:
-            return None
         english_name, _, _ = self._parse_display_item(item_name)
-        for rate_item, rate in self.app.rate_list.items():
-            if rate_item.strip().lower() == english_name.lower():
-                return rate
-        english_name_lower = english_name.lower().strip()
-        for rate_item, rate in self.app.rate_list.items():
-            rate_item_lower = rate_item.lower().strip()
-            if english_name_lower in rate_item_lower or rate_item_lower in english_name_lower:
-                return rate
-        return None
+        return self.app.rates.lookup('sale', english_name, fuzzy=True)
 
     # ─────────────── NEW: WEB INVOICE IMPORT LOGIC ───────────────
-    def import_web_invoices(self):
-        """Import one or more web-generated invoices (with PKT timestamp-based numbering)."""
+    def import_web_invoices(self, filenames=None):
+        """Import one or more web-generated invoices (with PKT timestamp-based numbering).
+
+        Files already in the import manifest are skipped without being opened; files
+        whose contents changed since they were imported are flagged for review instead.
+        """
         invoices_dir = self.app.invoices_dir
         os.makedirs(invoices_dir, exist_ok=True)
-        filenames = filedialog.askopenfilenames(
-            title="Select Web Invoice(s) to Import",
-            initialdir=invoices_dir,
-            filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")]
+        if filenames is None:
+            filenames = filedialog.askopenfilenames(
+                title="Select Web Invoice(s) to Import",
+                initialdir=invoices_dir,
+                filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")]
+            )
+        if not filenames:
+            return
+        vegetables = [dict(v) for v in getattr(self.app, 'vegetables', [])]
+        manifest = self.app.import_manifest
+        plan = {}
+
+        def tasks():
+            # Runs on the worker thread: stat/hash only, no workbook is opened here
+            plan.update(import_manifest.plan_imports(manifest, filenames))
+            return plan['new']
+
+        def commit(results, parse_errors):
+            errors = [f"{os.path.basename(f)}: {message}" for f, message in parse_errors]
+            imported, rejected = self._commit_web_invoices([parsed for _, parsed in results])
+            errors += [f"{os.path.basename(f)}: {reason}" for f, reason in rejected]
+            import_manifest.record_imports(manifest, plan, results, imported, rejected)
+
+            msg = f"✅ Successfully imported {len(imported)} web invoice(s)."
+            if plan['skipped']:
+                msg += f"\n⏭️ Skipped {len(plan['skipped'])} already-imported file(s)."
+            if plan['review']:
+                names = [os.path.basename(f) for f, _ in plan['review']]
+                msg += (f"\n🔍 {len(names)} file(s) changed since import and need review "
+                        f"(use Re-import Invoice):\n" + "\n".join(names[:5]))
+                if len(names) > 5:
+                    msg += f"\n... and {len(names) - 5} more."
+            if errors or plan['review']:
+                if errors:
+                    msg += f"\n⚠️ Errors ({len(errors)}):\n" + "\n".join(errors[:5])
+                    if len(errors) > 5:
+                        msg += f"\n... and {len(errors) - 5} more."
+                messagebox.showwarning("Import Complete", msg)
+            else:
+                messagebox.showinfo("Success", msg)
+
+        BatchJob(
+            self.app.root, "Importing Web Invoices", tasks,
+            process=partial(parse_web_invoice, vegetables=vegetables),
+            commit=commit,
+            use_processes=True,
+            on_cancel=lambda: messagebox.showinfo("Import Cancelled", "No invoices were imported."),
+            on_error=lambda e: messagebox.showerror("Error", f"Import error: {str(e)}")
+        ).start()
+
+    def import_invoice_folder(self):
+        """Bulk-import every invoice workbook in a folder (defaults to Customer_Invoices)."""
+        folder = filedialog.askdirectory(title="Select Invoice Folder", initialdir=self.app.invoices_dir)
+        if not folder:
+            return
+        filenames = sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.lower().endswith('.xlsx') and not name.startswith('~$')
         )
         if not filenames:
+            messagebox.showinfo("No Invoices", "No .xlsx files found in the selected folder.")
             return
-        imported_count = 0
-        errors = []
-        for filename in filenames:
-            try:
-                self._import_single_web_invoice(filename)
-                imported_count += 1
-            except Exception as e:
-                errors.append(f"{os.path.basename(filename)}: {str(e)}")
-                traceback.print_exc()
-        msg = f"✅ Successfully imported {imported_count} web invoice(s)."
-        if errors:
-            msg += f"\n⚠️ Errors ({len(errors)}):\n" + "\n".join(errors[:5])
-            if len(errors) > 5:
-                msg += f"\n... and {len(errors) - 5} more."
-            messagebox.showwarning("Import Complete", msg)
-        else:
-            messagebox.showinfo("Success", msg)
+        self.import_web_invoices(filenames)
 
     def _import_single_web_invoice(self, filename):
         """Parse and integrate a single web-generated invoice."""
-        invoice_date = self.app.selected_date  # fallback date
-        pk_tz = None
-        try:
-            from pytz import timezone
-            pk_tz = timezone('Asia/Karachi')
-        except ImportError:
-            pass  # Fallback to naive datetime if pytz not installed
-
-        wb = openpyxl.load_workbook(filename, read_only=True, data_only=True)
-        ws = wb.active
-
-        # --- Extract invoice number from B2 ---
-        invoice_num_from_file = None
-        invoice_datetime = None
-        b2_value = ws['B2'].value
-        if b2_value and "Invoice #" in str(b2_value):
-            try:
-                num_str = str(b2_value).replace("Invoice #", "").strip()
-                if num_str.isdigit() and len(num_str) == 14:
-                    invoice_num_from_file = int(num_str)
-                    dt_from_num = datetime.strptime(num_str, "%Y%m%d%H%M%S")
-                    if pk_tz:
-                        invoice_datetime = pk_tz.localize(dt_from_num)
-                    else:
-                        invoice_datetime = dt_from_num
-            except Exception:
-                pass
-
-        # --- Extract time from E2 (e.g., "09-Jan-2026 02:30 PM") ---
-        e2_value = ws['E2'].value
-        if e2_value:
-            try:
-                parsed_time = datetime.strptime(str(e2_value), "%d-%b-%Y %I:%M %p")
-                if pk_tz:
-                    invoice_datetime = pk_tz.localize(parsed_time)
-                else:
-                    invoice_datetime = parsed_time
-                invoice_date = parsed_time.strftime("%Y-%m-%d")
-            except Exception:
-                pass
-
-        if invoice_datetime:
-            invoice_date = invoice_datetime.strftime("%Y-%m-%d")
-
-        # --- Extract customer info ---
-        customer_name = ""
-        customer_phone = ""
-        for row in ws.iter_rows(min_row=1, max_row=10, values_only=True):
-            if row and len(row) >= 5:
-                if row[1] and "Customer Name:" in str(row[1]):
-                    customer_name = str(row[2]) if row[2] else ""
-                    customer_phone = str(row[4]) if row[4] else ""
-                    break
-            elif row[0] and "Customer Name:" in str(row[0]):
-                customer_name = str(row[1]) if row[1] else ""
-                customer_phone = str(row[4]) if len(row) > 4 and row[4] else ""
-                break
-
-        # --- Locate items table ---
-        items_start_row = None
-        for idx, row in enumerate(ws.iter_rows(values_only=True), start=1):
-            if row and row[0] and str(row[0]).strip() == 'No.':
-                if len(row) >= 5 and 'Item Name' in str(row[1]) and 'Quantity' in str(row[2]):
-                    items_start_row = idx + 1
-                    break
-        if items_start_row is None:
-            raise ValueError("Items table not found")
-
-        # --- Parse items ---
-        invoice_items = []
-        row_idx = items_start_row
-        while row_idx <= ws.max_row:
-            row_cells = ws[row_idx]
-            if not row_cells[0].value or "Total Amount:" in str(row_cells[0].value):
-                break
-            try:
-                item_name = row_cells[1].value or ""
-                qty_str = str(row_cells[2].value) if row_cells[2].value else "0 kg"
-                rate = float(row_cells[3].value) if row_cells[3].value not in (None, "") else 0.0
-                total = float(row_cells[4].value) if row_cells[4].value not in (None, "") else 0.0
-                english_name, urdu_name, size = self._parse_display_item(item_name)
-                if not urdu_name:
-                    urdu_name = self._find_urdu_for_english(english_name)
-                invoice_items.append({
-                    'vegetable': english_name,
-                    'urdu': urdu_name,
-                    'size': size,
-                    'quantity': qty_str,
-                    'rate': rate,
-                    'total': total
-                })
-            except Exception as e:
-                print(f"Skipping invalid row {row_idx}: {e}")
-            row_idx += 1
-
-        if not invoice_items:
-            raise ValueError("No items found")
+        parsed = parse_web_invoice(filename, getattr(self.app, 'vegetables', []))
+        _, rejected = self._commit_web_invoices([parsed])
+        if rejected:
+            raise ValueError(rejected[0][1])
 
-        # --- Avoid duplicates ---
-        if invoice_num_from_file:
-            for inv in self.app.invoices:
-                if inv.get('invoice_number') == invoice_num_from_file:
-                    raise ValueError("Invoice already exists")
-
-        # --- Create new invoice record ---
-        total_amount = sum(item['total'] for item in invoice_items)
-        time_display = invoice_datetime.strftime("%d-%b-%Y %I:%M %p") if invoice_datetime else datetime.now().strftime("%d-%b-%Y %I:%M %p")
-        new_invoice = {
-            'invoice_number': invoice_num_from_file if invoice_num_from_file else self.app.invoice_counter + 1,
-            'customer_name': customer_name,
-            'customer_phone': customer_phone,
-            'items': invoice_items,
-            'total_amount': total_amount,
-            'date': invoice_date,
-            'time': time_display,
-            'status': 'active',
-            'filepath': filename
-        }
-
-        # Only increment counter if we didn't use a timestamp ID (for legacy support)
-        if not invoice_num_from_file and invoice_num_from_file != self.app.invoice_counter + 1:
-            self.app.invoice_counter += 1
-            self.app.save_invoice_counter()
-
-        self.app.invoices.append(new_invoice)
-
-        # --- Add to sales ledger ---
-        for item in invoice_items:
-            english_name = item['vegetable']
-            urdu_name = item.get('urdu', '')
-            size = item.get('size', 'Normal')
-            if urdu_name and size.lower() != 'normal':
-                urdu_size_map = {'Small': 'چھوٹا سائز', 'Normal': 'درمیانہ سائز', 'Large': 'بڑا سائز'}
-                english_size_map = {'Small': 'small size', 'Large': 'big size'}
-                urdu_display = f"{urdu_name} {urdu_size_map.get(size, '')}"
-                english_display = f"{english_name} {english_size_map.get(size, size)}"
-                vegetable_display = f"{urdu_display} ({english_display})"
-            elif urdu_name:
-                vegetable_display = f"{urdu_name} ({english_name})"
-            else:
-                vegetable_display = english_name
-
-            sale = {
-                'source': f"Invoice #{new_invoice['invoice_number']}",
-                'vegetable': vegetable_display,
-                'vegetable_english': english_name,
-                'vegetable_urdu': urdu_name,
-                'quantity': item['quantity'],
-                'rate': item['rate'],
-                'total': item['total'],
-                'invoice_number': new_invoice['invoice_number']
-            }
-            self.app.sales.append(sale)
-            if hasattr(self.app, 'sales_tree'):
-                self.app.sales_tree.insert('', 'end', values=(
-                    sale['source'], sale['vegetable'], sale['quantity'],
-                    f"{sale['rate']:.2f}", f"{sale['total']:.2f}"
-                ))
-
-        # Update invoices tree
-        if hasattr(self.app, 'invoices_tree'):
-            self.app.invoices_tree.insert('', 0, values=(
-                f"#{new_invoice['invoice_number']}",
-                new_invoice['customer_name']
-            ))
+    def _commit_web_invoices(self, parsed_invoices):
+        """Validate, dedupe and append parsed web invoices in one transaction (see Ledger.commit_web_invoices).
 
-        self.app.save_sales()
-        self.app.save_invoices()
-        self.app.update_summary()
+        Sales go to each invoice's own date and the UI is refreshed once, however many
+        invoices arrive. Returns (new invoice records, [(filepath, reason)] for rejected ones).
+        """
+        return self.app.ledger.commit_web_invoices(parsed_invoices, self.app.selected_date)
 
     # ─────────────── Core Functional Methods ───────────────
     def upload_rate_list(self):
@@ -269,31 +155,21 @@ class CustomerInvoiceTab:
             title="Select Rate List Excel File",
             filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
         )
-        if filename:
-            try:
-                wb = openpyxl.load_workbook(filename)
-                ws = wb.active
-                self.app.rate_list = {}
-                header_found = False
-                for row in ws.iter_rows(min_row=1):
-                    if not header_found:
-                        if row[0].value and 'Item' in str(row[0].value):
-                            header_found = True
-                            continue
-                    if row[0].value and row[1].value:
-                        item_name = str(row[0].value).strip()
-                        try:
-                            rate = float(row[1].value)
-                            self.app.rate_list[item_name] = rate
-                        except Exception:
-                            continue
-                self.app.rate_status_label.configure(
-                    text=f"✓ Rate list loaded: {len(self.app.rate_list)} items",
-                    text_color=self.app.colors['primary']
-                )
-                messagebox.showinfo("Success", f"Rate list loaded with {len(self.app.rate_list)} items!")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error loading rate list: {str(e)}")
+        if not filename:
+            return
+
+        def commit(results, errors):
+            if errors:
+                messagebox.showerror("Error", f"Error loading rate list: {errors[0][1]}")
+                return
+            rate_list = self.app.rates.load('sale', results[0][1])
+            self.app.rate_status_label.configure(
+                text=f"✓ Rate list loaded: {len(rate_list)} items",
+                text_color=self.app.colors['primary']
+            )
+            messagebox.showinfo("Success", f"Rate list loaded with {len(rate_list)} items!")
+
+        BatchJob(self.app.root, "Loading Rate List", [filename], process=load_sale_rate_list, commit=commit).start()
 
     def load_item_rate(self, event=None):
         item = self.app.invoice_item_var.get()
@@ -304,7 +180,7 @@ class CustomerInvoiceTab:
             else:
                 english_name, urdu_name, size = self._parse_display_item(item)
                 print(f"DEBUG: Could not find rate for '{item}' (parsed as '{english_name}')")
-                print(f"DEBUG: Available rate list keys: {list(self.app.rate_list.keys()) if hasattr(self.app, 'rate_list') else 'No rate list'}")
+                print(f"DEBUG: Available rate list keys: {list(self.app.rates.sale.keys()) or 'No rate list'}")
 
     def calculate_invoice_item_total(self, *args):
         try:
@@ -321,15 +197,12 @@ class CustomerInvoiceTab:
         try:
             qty = float(self.app.invoice_qty_var.get())
             rate = float(self.app.invoice_rate_var.get())
-            total = qty * rate
             size = getattr(self.app, 'invoice_size_var', tk.StringVar(value='Normal')).get()
-            item_display = f"{self.app.invoice_item_var.get()} ({size})"
-            self.app.invoice_items_tree.insert('', 'end', values=(
-                item_display,
-                f"{qty} {self.app.invoice_unit_var.get()}",
-                f"{rate:.2f}",
-                f"{total:.2f}"
+            line = self.draft.add(DraftLine.from_entry(
+                self.app.invoice_item_var.get(), f"{qty} {self.app.invoice_unit_var.get()}", rate, size,
+                getattr(self.app, 'vegetables', [])
             ))
+            self.app.invoice_items_tree.insert('', 'end', iid=line.id, values=line.values())
             self.app.invoice_item_var.set('')
             self.app.invoice_qty_var.set('')
             self.app.invoice_rate_var.set('')
@@ -341,26 +214,33 @@ class CustomerInvoiceTab:
     def delete_invoice_item(self):
         selection = self.app.invoice_items_tree.selection()
         if selection:
-            self.app.invoice_items_tree.delete(selection)
+            self.draft.remove(selection)
+            self.app.invoice_items_tree.delete(*selection)
             self.update_invoice_total()
 
     def clear_invoice(self):
         if messagebox.askyesno("Confirm", "Clear all items?"):
-            for item in self.app.invoice_items_tree.get_children():
-                self.app.invoice_items_tree.delete(item)
-            self.update_invoice_total()
+            self._reset_draft()
+
+    def _reset_draft(self):
+        self.draft.clear()
+        self.app.invoice_items_tree.delete(*self.app.invoice_items_tree.get_children())
+        self.update_invoice_total()
+
+    def _load_draft(self, lines):
+        """Replace the draft with `lines` (DraftLine objects) and render them."""
+        self._reset_draft()
+        for line in lines:
+            self.draft.add(line)
+            self.app.invoice_items_tree.insert('', 'end', iid=line.id, values=line.values())
+        self.update_invoice_total()
 
     def update_invoice_total(self):
-        total = 0
-        for item in self.app.invoice_items_tree.get_children():
-            try:
-                total += float(self.app.invoice_items_tree.item(item)['values'][3])
-            except (ValueError, IndexError, TypeError):
-                continue
-        self.app.invoice_total_var.set(f"PKR {total:.2f}")
+        self.app.invoice_total_var.set(f"PKR {self.draft.total:.2f}")
 
     def generate_invoice(self):
-        if not self.app.invoice_items_tree.get_children():
+        """Commit the invoice and its sales right away; the .xlsx is rendered in the background."""
+        if not self.draft:
             messagebox.showwarning("No Items", "Please add items to invoice first")
             return
         if not self.app.customer_name_var.get():
@@ -371,244 +251,46 @@ class CustomerInvoiceTab:
         try:
             invoices_dir = self.app.invoices_dir
             os.makedirs(invoices_dir, exist_ok=True)
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws['A1'] = "FRUZY"
-            ws['A1'].font = Font(name='Calibri', size=72, bold=True, color='FFFFFF')
-            header_fill = PatternFill(start_color=self.app.colors['dark'].replace('#', ''),
-                                      end_color=self.app.colors['dark'].replace('#', ''),
-                                      fill_type="solid")
-            for col in ['A', 'B', 'C', 'D', 'E']:
-                ws[f"{col}1"].fill = header_fill
-            ws.merge_cells('A1:E1')
-            ws['A1'].alignment = Alignment(horizontal='center', vertical='center')
 
             # 🔥 Generate PKT-based timestamp invoice number for NEW invoices
+            now_pk = pk_now()
             if self.app.editing_invoice_number is not None:
                 invoice_num = self.app.editing_invoice_number
             else:
-                try:
-                    from pytz import timezone
-                    pk_tz = timezone('Asia/Karachi')
-                    now_pk = datetime.now(pk_tz)
-                except ImportError:
-                    now_pk = datetime.now()
                 invoice_num = int(now_pk.strftime("%Y%m%d%H%M%S"))
+            invoice_time = now_pk.strftime("%d-%b-%Y %I:%M %p")
+            customer_name = self.app.customer_name_var.get()
+            customer_phone = self.app.customer_phone_var.get()
 
-            ws['B2'] = f"Invoice #{invoice_num}"
-            ws['B2'].font = Font(name='Calibri', size=11)
-            ws['E2'] = now_pk.strftime("%d-%b-%Y %I:%M %p") if 'now_pk' in locals() else datetime.now().strftime("%d-%b-%Y %I:%M %p")
-            ws['E2'].font = Font(name='Calibri', size=11)
-            ws['E2'].alignment = Alignment(horizontal='right')
-
-            ws['B4'] = "Customer Name:"
-            ws['B4'].font = Font(name='Calibri', size=11)
-            ws['C4'] = self.app.customer_name_var.get()
-            ws['C4'].font = Font(name='Calibri', size=11, bold=True)
-            ws['E4'] = self.app.customer_phone_var.get()
-            ws['E4'].font = Font(name='Calibri', size=11, bold=True)
+            # Items and rendered lines come straight from the typed draft
+            invoice_items = self.draft.invoice_items()
+            lines = self.draft.render_lines()
+            total = round(self.draft.total, 2)
 
-            header_row = 6
-            headers = ['No.', 'Item Name', 'Quantity', 'Rate (PKR)', 'Total (PKR)']
-            header_fill2 = PatternFill(start_color=self.app.colors['dark'].replace('#', ''),
-                                       end_color=self.app.colors['dark'].replace('#', ''),
-                                       fill_type="solid")
-            header_font = Font(name='Calibri', size=11, bold=True, color='FFFFFF')
-            border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                            top=Side(style='thin'), bottom=Side(style='thin'))
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=header_row, column=col, value=header)
-                cell.fill = header_fill2
-                cell.font = header_font
-                cell.border = border
-                cell.alignment = Alignment(horizontal='center')
-
-            row = header_row + 1
-            total = 0.0
-            idx = 1
-            for item in self.app.invoice_items_tree.get_children():
-                values = self.app.invoice_items_tree.item(item)['values']
-                raw_item = str(values[0])
-                english_name, urdu_name, size = self._parse_display_item(raw_item)
-                if not urdu_name:
-                    urdu_name = self._find_urdu_for_english(english_name)
-
-                urdu_size_map = {'Small': 'چھوٹا سائز', 'Normal': 'درمیانہ سائز', 'Large': 'بڑا سائز'}
-                english_size_map = {'Small': 'small size', 'Large': 'big size'}
-                english_plain = english_name
-                if size.lower() != 'normal':
-                    english_plain = f"{english_name} {english_size_map.get(size, size)}"
-                urdu_cell = urdu_name
-                if urdu_name and size.lower() != 'normal':
-                    urdu_cell = f"{urdu_name} {urdu_size_map.get(size, '')}"
-
-                if urdu_name:
-                    item_cell_value = f"{urdu_cell} ({english_plain})"
-                else:
-                    item_cell_value = english_plain
-
-                ws.cell(row=row, column=1, value=idx).border = border
-                cell = ws.cell(row=row, column=2, value=item_cell_value)
-                cell.alignment = Alignment(wrap_text=True)
-                cell.border = border
-                ws.cell(row=row, column=3, value=values[1]).border = border
-
-                try:
-                    rate_cell = ws.cell(row=row, column=4, value=float(values[2]))
-                    rate_cell.number_format = '#,##0.00'
-                    rate_cell.border = border
-                except Exception:
-                    rc = ws.cell(row=row, column=4, value=values[2])
-                    rc.border = border
+            new_file_path = os.path.join(invoices_dir, invoice_filename(invoice_num, customer_name))
 
-                try:
-                    tot_cell = ws.cell(row=row, column=5, value=float(values[3]))
-                    tot_cell.number_format = '#,##0.00'
-                    tot_cell.border = border
-                    total += float(values[3])
-                except Exception:
-                    tc = ws.cell(row=row, column=5, value=values[3])
-                    tc.border = border
-
-                row += 1
-                idx += 1
-
-            ws.cell(row=row + 1, column=1, value="Total Amount:").font = Font(name='Calibri', size=11, bold=True)
-            total_cell = ws.cell(row=row + 1, column=5, value=total)
-            total_cell.font = Font(name='Calibri', size=11, bold=True)
-            total_cell.number_format = '#,##0.00'
-
-            ws.column_dimensions['A'].width = 8
-            ws.column_dimensions['B'].width = 30
-            ws.column_dimensions['C'].width = 15
-            ws.column_dimensions['D'].width = 15
-            ws.column_dimensions['E'].width = 15
-
-            # 🔥 Save NEW FILE FIRST (CRITICAL FIX)
-            customer_name_clean = ''.join(c for c in self.app.customer_name_var.get() if c.isalnum()) or "Customer"
-            filename = f"Invoice_{invoice_num}_{customer_name_clean}.xlsx"
-            new_file_path = os.path.join(invoices_dir, filename)
-            wb.save(new_file_path)  # ✅ Save before deleting old
-
-            # Build invoice items list
-            invoice_items = []
-            for item in self.app.invoice_items_tree.get_children():
-                values = self.app.invoice_items_tree.item(item)['values']
-                english_name, urdu_name, size = self._parse_display_item(values[0])
-                if not urdu_name:
-                    urdu_name = self._find_urdu_for_english(english_name)
-                invoice_items.append({
-                    'vegetable': english_name,
-                    'urdu': urdu_name,
-                    'size': size,
-                    'quantity': values[1],
-                    'rate': float(values[2]),
-                    'total': float(values[3])
-                })
-
-            # Create new invoice record with NEW filepath
+            # Create new invoice record with NEW filepath (the file itself follows shortly)
             new_invoice = {
                 'invoice_number': invoice_num,
-                'customer_name': self.app.customer_name_var.get(),
-                'customer_phone': self.app.customer_phone_var.get(),
+                'customer_name': customer_name,
+                'customer_phone': customer_phone,
                 'items': invoice_items,
                 'total_amount': total,
                 'date': invoice_date,
-                'time': now_pk.strftime("%d-%b-%Y %I:%M %p") if 'now_pk' in locals() else datetime.now().strftime("%d-%b-%Y %I:%M %p"),
+                'time': invoice_time,
                 'status': 'active',
-                'filepath': new_file_path  # ✅ Points to new file
+                'filepath': new_file_path
             }
 
-            # Handle editing vs new
+            # Edit replaces the record and its sales lines; the OLD file is deleted only once the new one is written
+            old_file_path = None
+            previous = None
             if self.app.editing_invoice_number is not None:
-                # Remove old sales entries
-                self.app.sales = [s for s in self.app.sales if s.get('invoice_number') != self.app.editing_invoice_number]
-
-                # Delete OLD file ONLY AFTER new is saved
-                old_file_path = None
-                for inv in self.app.invoices:
-                    if inv.get('invoice_number') == self.app.editing_invoice_number:
-                        old_file_path = inv.get('filepath')
-                        break
-
-                if old_file_path and os.path.exists(old_file_path):
-                    # Avoid self-delete if same path (shouldn't happen, but safe)
-                    if os.path.abspath(old_file_path) != os.path.abspath(new_file_path):
-                        try:
-                            os.remove(old_file_path)
-                        except Exception as e:
-                            print(f"Warning: Could not delete old invoice file: {e}")
-
-                # Replace in memory
-                for i, inv in enumerate(self.app.invoices):
-                    if inv.get('invoice_number') == self.app.editing_invoice_number:
-                        self.app.invoices[i] = new_invoice
-                        break
-
-                # Clean UI sales tree
-                if hasattr(self.app, 'sales_tree'):
-                    items_to_delete = []
-                    for item_id in self.app.sales_tree.get_children():
-                        values = self.app.sales_tree.item(item_id)['values']
-                        source = values[0] if values else ""
-                        if f"Invoice #{self.app.editing_invoice_number}" == source:
-                            items_to_delete.append(item_id)
-                    for item_id in items_to_delete:
-                        self.app.sales_tree.delete(item_id)
-
+                previous = self.app.ledger.update_invoice(new_invoice)
+            if previous is not None:
+                old_file_path = previous.get('filepath')
             else:
-                # New invoice
-                self.app.invoices.append(new_invoice)
-
-            # Update UI trees
-            if hasattr(self.app, 'invoices_tree'):
-                if self.app.editing_invoice_number is not None:
-                    for item_id in self.app.invoices_tree.get_children():
-                        vals = self.app.invoices_tree.item(item_id)['values']
-                        if vals and f"#{self.app.editing_invoice_number}" == vals[0]:
-                            self.app.invoices_tree.item(item_id, values=(
-                                f"#{invoice_num}",
-                                new_invoice['customer_name']
-                            ))
-                            break
-                else:
-                    self.app.invoices_tree.insert('', 0, values=(
-                        f"#{invoice_num}",
-                        self.app.customer_name_var.get()
-                    ))
-
-            # Add to sales ledger
-            for item in invoice_items:
-                english_name = item['vegetable']
-                urdu_name = item.get('urdu', '')
-                size = item.get('size', 'Normal')
-                if urdu_name and size.lower() != 'normal':
-                    urdu_size_map = {'Small': 'چھوٹا سائز', 'Normal': 'درمیانہ سائز', 'Large': 'بڑا سائز'}
-                    english_size_map = {'Small': 'small size', 'Large': 'big size'}
-                    urdu_display = f"{urdu_name} {urdu_size_map.get(size, '')}"
-                    english_display = f"{english_name} {english_size_map.get(size, size)}"
-                    vegetable_display = f"{urdu_display} ({english_display})"
-                elif urdu_name:
-                    vegetable_display = f"{urdu_name} ({english_name})"
-                else:
-                    vegetable_display = english_name
-
-                sale = {
-                    'source': f'Invoice #{invoice_num}',
-                    'vegetable': vegetable_display,
-                    'vegetable_english': english_name,
-                    'vegetable_urdu': urdu_name,
-                    'quantity': item['quantity'],
-                    'rate': f"{item['rate']:.2f}",
-                    'total': f"{item['total']:.2f}",
-                    'invoice_number': invoice_num
-                }
-                self.app.sales.append(sale)
-                if hasattr(self.app, 'sales_tree'):
-                    self.app.sales_tree.insert('', 'end', values=(
-                        sale['source'], sale['vegetable'], sale['quantity'],
-                        sale['rate'], sale['total']
-                    ))
+                self.app.ledger.add_invoice(new_invoice)
 
             # Reset form
             self.app.editing_invoice_number = None
@@ -617,20 +299,214 @@ class CustomerInvoiceTab:
             self.clear_invoice()
             self.app.save_sales()
             self.app.save_invoices()
-            if hasattr(self.app, 'sales_tab_instance') and self.app.sales_tab_instance:
-                try:
-                    self.app.sales_tab_instance.reload_sales_list()
-                except Exception as e:
-                    print(f"Error refreshing sales list: {e}")
-            self.app.update_summary()
 
-            date_obj = datetime.strptime(invoice_date, "%Y-%m-%d")
-            date_display = date_obj.strftime("%A, %B %d, %Y")
-            messagebox.showinfo("Success", f"Invoice #{invoice_num} generated for {date_display}\nSaved as:\n{new_file_path}")
+            # Ledger is committed; hand the .xlsx to the background renderer
+            self._queue_invoice_render(new_file_path, {
+                'invoice_number': invoice_num,
+                'time': invoice_time,
+                'customer_name': customer_name,
+                'customer_phone': customer_phone,
+                'lines': lines
+            }, old_file_path)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate invoice: {str(e)}")
             traceback.print_exc()
 
+    def _queue_invoice_render(self, path, payload, old_file_path=None):
+        invoice_num = payload['invoice_number']
+        self._set_render_status(f"🧾 Rendering Invoice #{invoice_num}...", "gray")
+
+        def on_done(saved_path):
+            # Delete OLD file ONLY AFTER new is saved (and never the same path)
+            if old_file_path and os.path.exists(old_file_path):
+                if os.path.abspath(old_file_path) != os.path.abspath(saved_path):
+                    try:
+                        os.remove(old_file_path)
+                    except Exception as e:
+                        print(f"Warning: Could not delete old invoice file: {e}")
+            pending = self.app.invoice_renderer.pending - 1
+            status = f"✅ Invoice #{invoice_num} saved: {os.path.basename(saved_path)}"
+            if pending > 0:
+                status += f"  ({pending} more rendering)"
+            self._set_render_status(status, "green")
+
+        def on_error(e):
+            self._set_render_status(f"❌ Invoice #{invoice_num} file not written", "red")
+            messagebox.showerror("Error", f"Invoice #{invoice_num} was saved to the ledger, but its "
+                                          f"Excel file could not be written:\n{str(e)}")
+
+        self.app.invoice_renderer.submit(render_invoice, path, payload, self.app.colors['dark'],
+                                         on_done=on_done, on_error=on_error)
+
+    def _set_render_status(self, text, color):
+        label = getattr(self, 'render_status_label', None)
+        if label is not None:
+            label.configure(text=text, text_color=color)
+
+    # ─────────────── Bulk Re-render ───────────────
+    def rerender_invoices_dialog(self):
+        dialog = ctk.CTkToplevel(self.app.root)
+        dialog.title("Re-render Invoices - Fruzy")
+        dialog.geometry("460x340")
+        dialog.transient(self.app.root)
+        dialog.grab_set()
+        ctk.CTkLabel(dialog, text="🧾 Re-render Invoice Files", font=('Arial', 14, 'bold')).pack(pady=15)
+        frame = ctk.CTkFrame(dialog)
+        frame.pack(padx=30, pady=10, fill='both', expand=True)
+
+        dates = [inv.get('date') for inv in self.app.invoices if inv.get('date')]
+        start_var = tk.StringVar(value=min(dates) if dates else self.app.selected_date)
+        end_var = tk.StringVar(value=max(dates) if dates else self.app.selected_date)
+        customer_var = tk.StringVar()
+        reprice_var = tk.BooleanVar(value=False)
+
+        ctk.CTkLabel(frame, text="From (YYYY-MM-DD):", font=('Arial', 11, 'bold')).grid(row=0, column=0, sticky='w', padx=10, pady=8)
+        ctk.CTkEntry(frame, textvariable=start_var, width=150).grid(row=0, column=1, padx=10, pady=8, sticky='w')
+        ctk.CTkLabel(frame, text="To (YYYY-MM-DD):", font=('Arial', 11, 'bold')).grid(row=1, column=0, sticky='w', padx=10, pady=8)
+        ctk.CTkEntry(frame, textvariable=end_var, width=150).grid(row=1, column=1, padx=10, pady=8, sticky='w')
+        ctk.CTkLabel(frame, text="Customer contains:", font=('Arial', 11, 'bold')).grid(row=2, column=0, sticky='w', padx=10, pady=8)
+        ctk.CTkEntry(frame, textvariable=customer_var, width=150, placeholder_text="(all customers)").grid(row=2, column=1, padx=10, pady=8, sticky='w')
+        reprice_box = ctk.CTkCheckBox(frame, text="Re-price lines from current rate list", variable=reprice_var)
+        reprice_box.grid(row=3, column=0, columnspan=2, padx=10, pady=12, sticky='w')
+        if not self.app.rates.sale:
+            reprice_box.configure(state='disabled')
+
+        def start():
+            try:
+                start_date = datetime.strptime(start_var.get().strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+                end_date = datetime.strptime(end_var.get().strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                messagebox.showwarning("Invalid Date", "Please enter dates as YYYY-MM-DD", parent=dialog)
+                return
+            if start_date > end_date:
+                messagebox.showwarning("Invalid Range", "Start date must be on or before end date", parent=dialog)
+                return
+            customer = customer_var.get().strip().lower()
+            matches = [inv for inv in self.app.invoices
+                       if start_date <= (inv.get('date') or '') <= end_date
+                       and inv.get('status', 'active') == 'active'
+                       and customer in inv.get('customer_name', '').lower()]
+            if not matches:
+                messagebox.showinfo("No Invoices", "No invoices match these filters.", parent=dialog)
+                return
+            reprice = bool(reprice_var.get())
+            action = "re-price and re-render" if reprice else "re-render"
+            if not messagebox.askyesno("Confirm", f"{action.capitalize()} {len(matches)} invoice file(s)?", parent=dialog):
+                return
+            dialog.destroy()
+            self.rerender_invoices(matches, reprice=reprice)
+
+        btn_frame = ctk.CTkFrame(dialog)
+        btn_frame.pack(pady=15)
+        ctk.CTkButton(btn_frame, text="Re-render", command=start, width=100).pack(side='left', padx=10)
+        ctk.CTkButton(btn_frame, text="Cancel", command=dialog.destroy, width=100).pack(side='left', padx=10)
+
+    def rerender_invoices(self, invoices, reprice=False):
+        """Regenerate the .xlsx of many stored invoices in a process pool.
+
+        Files are rendered into a staging folder first. Only once all of them are done
+        does the commit move each one into place and update its record (filepath, and
+        items/totals when re-pricing), then invoices.json is saved once. Cancelling or
+        an error discards the staged files, so files and records never disagree.
+        """
+        invoices = list(invoices)
+        rate_list = self.app.rates.sale if reprice else None
+        invoices_dir = self.app.invoices_dir
+        os.makedirs(invoices_dir, exist_ok=True)
+        # Same volume as the invoices, so moving a file into place is one atomic rename
+        staging_dir = tempfile.mkdtemp(prefix='.rerender-', dir=invoices_dir)
+        header_color = self.app.colors['dark']
+        plan = {}
+
+        def tasks():
+            task_list = []
+            for inv in invoices:
+                record = inv
+                if rate_list:
+                    items, changed = reprice_items(inv.get('items', []), rate_list)
+                    if changed:
+                        record = dict(inv, items=items, total_amount=sum(float(i.get('total', 0) or 0) for i in items))
+                filename = invoice_filename(inv['invoice_number'], inv.get('customer_name', ''))
+                task = (os.path.join(staging_dir, filename), invoice_payload(record), header_color)
+                plan[id(task)] = (inv, record, os.path.join(invoices_dir, filename))
+                task_list.append(task)
+            return task_list
+
+        def describe(task):
+            return f"Invoice #{task[1]['invoice_number']}"
+
+        def discard_staged():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        def commit(results, errors):
+            positions = {inv.get('invoice_number'): i for i, inv in enumerate(self.app.invoices)}
+            stale_files = []
+            repriced = []
+            rendered = 0
+            for task, staged_path in results:
+                original, record, path = plan[id(task)]
+                pos = positions.get(original.get('invoice_number'))
+                if pos is None:
+                    continue  # deleted while rendering; its staged file is discarded
+                try:
+                    os.replace(staged_path, path)
+                except OSError as e:
+                    errors.append((task, str(e)))
+                    continue
+                rendered += 1
+                updated = dict(self.app.invoices[pos], filepath=path)
+                if record is not original:
+                    updated['items'] = record['items']
+                    updated['total_amount'] = record['total_amount']
+                    repriced.append(updated)
+                # Rebuilds the sales lines of repriced invoices too
+                self.app.ledger.update_invoice(updated, position=pos)
+                old_path = original.get('filepath')
+                if old_path and os.path.abspath(old_path) != os.path.abspath(path):
+                    stale_files.append(old_path)
+            discard_staged()
+
+            # One atomic write of invoices.json for the whole batch, then tidy old files
+            self.app.save_invoices()
+            for old_path in stale_files:
+                try:
+                    if os.path.exists(old_path):
+                        os.remove(old_path)
+                except Exception as e:
+                    print(f"Warning: Could not delete old invoice file: {e}")
+            if repriced:
+                self.app.save_all_sales()
+
+            msg = f"✅ Re-rendered {rendered} invoice file(s)."
+            if repriced:
+                msg += f"\n💲 Re-priced {len(repriced)} invoice(s) from the current rate list."
+            if errors:
+                msg += f"\n⚠️ Failed ({len(errors)}), left unchanged:\n" + "\n".join(f"{describe(task)}: {m}" for task, m in errors[:5])
+                if len(errors) > 5:
+                    msg += f"\n... and {len(errors) - 5} more."
+                messagebox.showwarning("Re-render Complete", msg)
+            else:
+                messagebox.showinfo("Success", msg)
+
+        def cancelled():
+            discard_staged()
+            messagebox.showinfo("Re-render Cancelled", "Invoice files and records were left unchanged.")
+
+        def failed(e):
+            discard_staged()
+            messagebox.showerror("Error", f"Re-render error: {str(e)}")
+
+        BatchJob(
+            self.app.root, "Re-rendering Invoices", tasks,
+            process=render_invoice_task,
+            commit=commit,
+            use_processes=True,
+            describe=describe,
+            on_cancel=cancelled,
+            on_error=failed,
+            status="Rendering files..."
+        ).start()
+
     def open_invoice_folder(self):
         invoices_dir = self.app.invoices_dir
         try:
@@ -703,6 +579,7 @@ class CustomerInvoiceTab:
 
         invoice_date = self.app.selected_date
         try:
+            import openpyxl
             wb = openpyxl.load_workbook(filename, read_only=True, data_only=True)
             ws = wb.active
 
@@ -767,6 +644,8 @@ class CustomerInvoiceTab:
                     pass
                 row_idx += 1
 
+            if invoice_num_from_file is None:
+                invoice_num_from_file = self.app.import_manifest.invoice_number_for(filename)
             if invoice_num_from_file is None:
                 basename = os.path.basename(filename)
                 try:
@@ -784,22 +663,10 @@ class CustomerInvoiceTab:
             if existing_invoice:
                 self.app.customer_name_var.set(existing_invoice.get('customer_name', ''))
                 self.app.customer_phone_var.set(existing_invoice.get('customer_phone', ''))
-                for item in self.app.invoice_items_tree.get_children():
-                    self.app.invoice_items_tree.delete(item)
-                for item in existing_invoice.get('items', []):
-                    item_name = item.get('vegetable', '')
-                    size = item.get('size', 'Normal')
-                    quantity = item.get('quantity', '')
-                    rate = item.get('rate', 0)
-                    display_name = f"{item_name} ({size})"
-                    self.app.invoice_items_tree.insert('', 'end', values=(
-                        display_name,
-                        quantity,
-                        f"{rate:.2f}",
-                        f"{item.get('total', 0):.2f}"
-                    ))
-                self.update_invoice_total()
+                vegetables = getattr(self.app, 'vegetables', [])
+                self._load_draft([DraftLine.from_item(item, vegetables) for item in existing_invoice.get('items', [])])
                 self.app.editing_invoice_number = invoice_num_from_file
+                self._record_reviewed_file(filename, invoice_num_from_file)
                 messagebox.showinfo("Invoice Loaded", f"Invoice #{invoice_num_from_file} loaded for editing.\nCustomer: {existing_invoice.get('customer_name', '')}")
             else:
                 total_amount = sum(item['total'] for item in invoice_items)
@@ -818,108 +685,56 @@ class CustomerInvoiceTab:
                     new_invoice['invoice_number'] = self.app.invoice_counter + 1
                     self.app.invoice_counter += 1
                     self.app.save_invoice_counter()
-                self.app.invoices.append(new_invoice)
-
-                if hasattr(self.app, 'invoices_tree'):
-                    self.app.invoices_tree.insert('', 0, values=(
-                        f"#{new_invoice['invoice_number']}",
-                        new_invoice['customer_name']
-                    ))
-
-                for item in invoice_items:
-                    english_name = item['vegetable']
-                    urdu_name = item.get('urdu', '')
-                    size = item.get('size', 'Normal')
-                    if urdu_name and size.lower() != 'normal':
-                        urdu_size_map = {'Small': 'چھوٹا سائز', 'Normal': 'درمیانہ سائز', 'Large': 'بڑا سائز'}
-                        english_size_map = {'Small': 'small size', 'Large': 'big size'}
-                        urdu_display = f"{urdu_name} {urdu_size_map.get(size, '')}"
-                        english_display = f"{english_name} ({english_size_map.get(size, size)})"
-                        vegetable_display = f"{urdu_display} ({english_display})"
-                    elif urdu_name:
-                        vegetable_display = f"{urdu_name} ({english_name})"
-                    else:
-                        vegetable_display = english_name
-
-                    sale = {
-                        'source': f"Invoice #{new_invoice['invoice_number']}",
-                        'vegetable': vegetable_display,
-                        'vegetable_english': english_name,
-                        'vegetable_urdu': urdu_name,
-                        'quantity': item['quantity'],
-                        'rate': item['rate'],
-                        'total': item['total'],
-                        'invoice_number': new_invoice['invoice_number']
-                    }
-                    self.app.sales.append(sale)
-                    if hasattr(self.app, 'sales_tree'):
-                        self.app.sales_tree.insert('', 'end', values=(
-                            sale['source'], sale['vegetable'], sale['quantity'],
-                            f"{sale['rate']:.2f}", f"{sale['total']:.2f}"
-                        ))
+                self.app.ledger.add_invoice(new_invoice)
 
                 self.app.save_sales()
                 self.app.save_invoices()
-                self.app.update_summary()
 
                 self.app.customer_name_var.set(customer_name)
                 self.app.customer_phone_var.set(customer_phone)
-                for item in self.app.invoice_items_tree.get_children():
-                    self.app.invoice_items_tree.delete(item)
-                for item in invoice_items:
-                    self.app.invoice_items_tree.insert('', 'end', values=(
-                        item['vegetable'],
-                        item['quantity'],
-                        f"{item['rate']:.2f}",
-                        f"{item['total']:.2f}"
-                    ))
-                self.update_invoice_total()
+                vegetables = getattr(self.app, 'vegetables', [])
+                self._load_draft([DraftLine.from_item(item, vegetables) for item in invoice_items])
                 self.app.editing_invoice_number = new_invoice['invoice_number']
+                self._record_reviewed_file(filename, new_invoice['invoice_number'])
                 messagebox.showinfo("Success", f"Invoice #{new_invoice['invoice_number']} re-imported successfully.\nLoaded for editing as: {customer_name}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to re-import invoice:\n{str(e)}")
             traceback.print_exc()
 
+    def _record_reviewed_file(self, filename, invoice_number):
+        """Accept a file's current contents in the import manifest (clears any review flag)."""
+        manifest = self.app.import_manifest
+        try:
+            size, mtime = import_manifest.file_stat(filename)
+            info = {'sha256': import_manifest.hash_file(filename), 'size': size, 'mtime': mtime}
+        except OSError as e:
+            print(f"Could not update import manifest for {filename}: {e}")
+            return
+        manifest.record(filename, info, invoice_number)
+        manifest.save()
+
     def open_edit_invoice_window(self, invoice):
         self.app.editing_invoice_number = invoice.get('invoice_number')
         self.app.customer_name_var.set(invoice.get('customer_name', ''))
         self.app.customer_phone_var.set(invoice.get('customer_phone', ''))
-        for item in self.app.invoice_items_tree.get_children():
-            self.app.invoice_items_tree.delete(item)
 
         update_rates = False
-        if getattr(self.app, 'rate_list', None):
+        if self.app.rates.sale:
             result = messagebox.askyesno(
                 "Update Rates",
-                f"Found {len(self.app.rate_list)} items in the current rate list.\n"
+                f"Found {len(self.app.rates.sale)} items in the current rate list.\n"
                 "Would you like to automatically update all rates from the current rate list?\n"
                 "(You can manually edit any rate afterwards if needed.)",
                 icon='question'
             )
             update_rates = result
 
+        vegetables = getattr(self.app, 'vegetables', [])
+        lines = []
         for item in invoice.get('items', []):
-            item_name = item.get('vegetable', '')
-            size = item.get('size', 'Normal')
-            quantity = item.get('quantity', '')
-            rate = item.get('rate', 0)
-            if update_rates:
-                matched_rate = self._match_rate_for_item(item_name)
-                if matched_rate is not None:
-                    rate = matched_rate
-            try:
-                qty_num = float(quantity.split()[0]) if isinstance(quantity, str) else float(quantity)
-                total = qty_num * rate
-            except (ValueError, IndexError, AttributeError):
-                total = item['total']
-            display_name = f"{item_name} ({size})"
-            self.app.invoice_items_tree.insert('', 'end', values=(
-                display_name,
-                quantity,
-                f"{rate:.2f}",
-                f"{total:.2f}"
-            ))
-        self.update_invoice_total()
+            rate = self._match_rate_for_item(item.get('vegetable', '')) if update_rates else None
+            lines.append(DraftLine.from_item(item, vegetables, rate))
+        self._load_draft(lines)
 
         if update_rates:
             messagebox.showinfo(
@@ -1025,7 +840,9 @@ class CustomerInvoiceTab:
             messagebox.showwarning("No Selection", "Please select an item to edit")
             return
         selected_item = selection[0]
-        values = self.app.invoice_items_tree.item(selected_item)['values']
+        line = self.draft.get(selected_item)
+        if line is None:
+            return
 
         dialog = ctk.CTkToplevel(self.app.root)
         dialog.title("Edit Invoice Item")
@@ -1034,34 +851,27 @@ class CustomerInvoiceTab:
         dialog.transient(self.app.root)
         dialog.grab_set()
 
-        raw_name = str(values[0])
-        size_val = 'Normal'
-        m_size = re.search(r"\((Small|Normal|Large)\)\s*$", raw_name, flags=re.IGNORECASE)
-        if m_size:
-            size_val = m_size.group(1).capitalize()
-            raw_name = re.sub(r"\s*\(%s\)\s*$" % re.escape(m_size.group(1)), '', raw_name, flags=re.IGNORECASE)
-
-        item_var = tk.StringVar(value=raw_name)
+        item_var = tk.StringVar(value=line.name)
         ctk.CTkLabel(dialog, text="Item Name:", font=('Arial', 12, 'bold')).grid(row=0, column=0, padx=15, pady=10, sticky='w')
         item_entry = ctk.CTkEntry(dialog, textvariable=item_var, font=('Arial', 12), width=300)
         item_entry.grid(row=0, column=1, padx=15, pady=10, sticky='ew')
 
         ctk.CTkLabel(dialog, text="Size:", font=('Arial', 12, 'bold')).grid(row=0, column=2, padx=5, pady=10, sticky='w')
-        size_var = tk.StringVar(value=size_val)
+        size_var = tk.StringVar(value=line.size)
         size_combo = ttk.Combobox(dialog, textvariable=size_var, values=['Small', 'Normal', 'Large'], width=12, state='readonly')
         size_combo.grid(row=0, column=3, padx=5, pady=10, sticky='w')
 
-        qty_var = tk.StringVar(value=values[1])
+        qty_var = tk.StringVar(value=line.quantity)
         ctk.CTkLabel(dialog, text="Quantity:", font=('Arial', 12, 'bold')).grid(row=1, column=0, padx=15, pady=10, sticky='w')
         qty_entry = ctk.CTkEntry(dialog, textvariable=qty_var, font=('Arial', 12), width=300)
         qty_entry.grid(row=1, column=1, padx=15, pady=10, sticky='ew')
 
-        rate_var = tk.StringVar(value=values[2])
+        rate_var = tk.StringVar(value=f"{line.rate:.2f}")
         ctk.CTkLabel(dialog, text="Rate (PKR):", font=('Arial', 12, 'bold')).grid(row=2, column=0, padx=15, pady=10, sticky='w')
         rate_entry = ctk.CTkEntry(dialog, textvariable=rate_var, font=('Arial', 12), width=300)
         rate_entry.grid(row=2, column=1, padx=15, pady=10, sticky='ew')
 
-        total_var = tk.StringVar(value=values[3])
+        total_var = tk.StringVar(value=f"{line.total:.2f}")
         ctk.CTkLabel(dialog, text="Total (Auto):", font=('Arial', 12, 'bold')).grid(row=3, column=0, padx=15, pady=10, sticky='w')
         total_label = ctk.CTkLabel(dialog, textvariable=total_var, font=('Arial', 12, 'bold'))
         total_label.grid(row=3, column=1, padx=15, pady=10, sticky='ew')
@@ -1081,13 +891,12 @@ class CustomerInvoiceTab:
 
         def save_changes():
             try:
-                display_name = f"{item_var.get()} ({size_var.get()})"
-                self.app.invoice_items_tree.item(selected_item, values=(
-                    display_name,
-                    qty_var.get(),
-                    f"{float(rate_var.get()):.2f}",
-                    total_var.get()
-                ))
+                name = item_var.get()
+                english, urdu, _ = self._parse_display_item(name)
+                self.draft.update(selected_item, name=name, english=english,
+                                  urdu=urdu or self._find_urdu_for_english(english), size=size_var.get(),
+                                  quantity=qty_var.get(), rate=float(rate_var.get()), total=float(total_var.get()))
+                self.app.invoice_items_tree.item(selected_item, values=line.values())
                 self.update_invoice_total()
                 dialog.destroy()
                 messagebox.showinfo("Success", "Item updated successfully")
@@ -1106,31 +915,21 @@ class CustomerInvoiceTab:
         dialog.grid_columnconfigure(1, weight=1)
 
     def update_invoice_rates_from_current_list(self):
-        if not getattr(self.app, 'rate_list', None):
+        if not self.app.rates.sale:
             messagebox.showwarning("No Rate List", "Please upload a rate list first.")
             return
         updated = False
-        for item_id in self.app.invoice_items_tree.get_children():
-            values = self.app.invoice_items_tree.item(item_id)['values']
-            item_name = values[0]
-            quantity_str = values[1]
-            current_rate = float(values[2]) if values[2] else 0.0
-            new_rate = self._match_rate_for_item(item_name)
+        for line in list(self.draft):
+            new_rate = self.app.rates.lookup('sale', line.english, fuzzy=True)
             if new_rate is None:
                 continue
-            if abs(new_rate - current_rate) > 1e-6:
+            if abs(new_rate - line.rate) > 1e-6:
                 try:
-                    qty_num = float(quantity_str.split()[0]) if isinstance(quantity_str, str) else float(quantity_str)
-                    new_total = qty_num * new_rate
-                    self.app.invoice_items_tree.item(item_id, values=(
-                        item_name,
-                        quantity_str,
-                        f"{new_rate:.2f}",
-                        f"{new_total:.2f}"
-                    ))
-                    updated = True
+                    self.draft.update(line.id, rate=new_rate)
                 except (ValueError, IndexError):
                     continue
+                self.app.invoice_items_tree.item(line.id, values=line.values())
+                updated = True
         if updated:
             self.update_invoice_total()
             messagebox.showinfo("Success", "All matching item rates updated to today's rates!")
@@ -1182,35 +981,25 @@ class CustomerInvoiceTab:
             inv_num = int(str(item_values[0]).replace('#', ''))
             if not messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete Invoice #{inv_num}?\nThis action cannot be undone."):
                 return
-            for i, inv in enumerate(self.app.invoices):
-                if inv.get('invoice_number') == inv_num:
-                    filepath = inv.get('filepath')
-                    if filepath and os.path.exists(filepath):
-                        try:
-                            os.remove(filepath)
-                        except Exception as e:
-                            messagebox.showwarning("File Error", f"Could not delete file:\n{str(e)}")
-                    if self.app.editing_invoice_number == inv_num:
-                        for item in self.app.invoice_items_tree.get_children():
-                            self.app.invoice_items_tree.delete(item)
-                        self.app.customer_name_var.set("")
-                        self.app.customer_phone_var.set("")
-                        self.app.invoice_total_var.set("PKR 0.00")
-                        self.app.editing_invoice_number = None
-                    self.app.sales = [s for s in self.app.sales if s.get('invoice_number') != inv_num]
-                    if hasattr(self.app, 'sales_tree'):
-                        for item_id in list(self.app.sales_tree.get_children()):
-                            values = self.app.sales_tree.item(item_id)['values']
-                            if values and f"Invoice #{inv_num}" in str(values[0]):
-                                self.app.sales_tree.delete(item_id)
-                    self.app.invoices.pop(i)
-                    self.app.invoices_tree.delete(selection[0])
-                    self.app.save_sales()
-                    self.app.save_invoices()
-                    self.app.update_summary()
-                    messagebox.showinfo("Success", f"Invoice #{inv_num} has been deleted.")
-                    return
-            messagebox.showwarning("Not Found", "Selected invoice not found.")
+            # The ledger drops the record and its sales lines; the lists follow its events
+            invoice = self.app.ledger.delete_invoice(inv_num)
+            if invoice is None:
+                messagebox.showwarning("Not Found", "Selected invoice not found.")
+                return
+            filepath = invoice.get('filepath')
+            if filepath and os.path.exists(filepath):
+                try:
+                    os.remove(filepath)
+                except Exception as e:
+                    messagebox.showwarning("File Error", f"Could not delete file:\n{str(e)}")
+            if self.app.editing_invoice_number == inv_num:
+                self._reset_draft()
+                self.app.customer_name_var.set("")
+                self.app.customer_phone_var.set("")
+                self.app.editing_invoice_number = None
+            self.app.save_sales()
+            self.app.save_invoices()
+            messagebox.showinfo("Success", f"Invoice #{inv_num} has been deleted.")
         except (ValueError, IndexError):
             pass
 
@@ -1236,7 +1025,7 @@ class CustomerInvoiceTab:
                     self.open_edit_invoice_window(inv)
                     return
             messagebox.showwarning("Not Found", f"Invoice #{inv_num} not found or already deleted.")
-        except (ValueError, IndexError, AttributeError) as e:
+        except (ValueError, IndexError, AttributeError):
             messagebox.showerror("Error", "Invalid invoice selection.")
 
     # ─────────────── UI Creation ───────────────
@@ -1270,6 +1059,10 @@ class CustomerInvoiceTab:
                       command=self.reimport_invoice).pack(side='left', padx=3)
         ctk.CTkButton(right_buttons, text="🌐 Import Web Invoices", width=150,
                       command=self.import_web_invoices).pack(side='left', padx=3)
+        ctk.CTkButton(right_buttons, text="📁 Import Invoice Folder", width=160,
+                      command=self.import_invoice_folder).pack(side='left', padx=3)
+        ctk.CTkButton(right_buttons, text="🧾 Re-render Invoices", width=150,
+                      command=self.rerender_invoices_dialog).pack(side='left', padx=3)
         ctk.CTkButton(right_buttons, text="📋 Import Rate List", width=140,
                       command=self.upload_rate_list).pack(side='left', padx=3)
 
@@ -1381,6 +1174,8 @@ class CustomerInvoiceTab:
                      font=('Arial', 16, 'bold'), text_color=("#0066cc", "#3399ff")).pack(side='left', padx=5)
         ctk.CTkButton(right_section, text="📄 Generate Invoice", height=32,
                       command=self.generate_invoice).pack(side='left', padx=10)
+        self.render_status_label = ctk.CTkLabel(invoice_frame, text="", font=('Arial', 10))
+        self.render_status_label.pack(anchor='e', padx=15, pady=(0, 10))
 
         # RIGHT COLUMN: Recent Invoices
         right_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
@@ -1392,6 +1187,12 @@ class CustomerInvoiceTab:
         recent_header_frame = ctk.CTkFrame(recent_frame, fg_color="transparent")
         recent_header_frame.pack(fill='x', padx=15, pady=(15, 12))
         ctk.CTkLabel(recent_header_frame, text="📋 Recent Invoices", font=('Arial', 14, 'bold')).pack(anchor='w', padx=0, pady=0)
+        search_row = ctk.CTkFrame(recent_header_frame, fg_color="transparent")
+        search_row.pack(fill='x', pady=(8, 0))
+        ctk.CTkLabel(search_row, text="🔍", font=('Arial', 13)).pack(side='left', padx=(0, 5))
+        self.invoice_search_var = tk.StringVar()
+        self.invoice_search_var.trace('w', Debouncer(self.parent, self._on_invoice_search))
+        ctk.CTkEntry(search_row, textvariable=self.invoice_search_var, font=('Arial', 10)).pack(side='left', fill='x', expand=True)
 
         tree_frame2 = ctk.CTkFrame(recent_frame, fg_color="transparent")
         tree_frame2.pack(fill='both', expand=True, padx=15, pady=(0, 20))
@@ -1401,7 +1202,8 @@ class CustomerInvoiceTab:
             columns=('Invoice#', 'Customer'),
             headings=('Invoice #', 'Customer Name'),
             widths=(80, 120),
-            height=20
+            height=20,
+            virtual=True
         )
 
         # 🔥 macOS-Compatible Bindings
@@ -1410,31 +1212,50 @@ class CustomerInvoiceTab:
         self.app.invoices_tree.bind('<Button-2>', self.show_invoice_context_menu)
         self.app.invoices_tree.bind('<Control-Button-1>', self.show_invoice_context_menu)
 
+        list_footer = ctk.CTkFrame(recent_frame, fg_color="transparent")
+        list_footer.pack(fill='x', padx=15, pady=(0, 12))
+        self.invoice_count_label = ctk.CTkLabel(list_footer, text="", font=('Arial', 10))
+        self.invoice_count_label.pack(side='left')
+        self.show_more_button = ctk.CTkButton(list_footer, text="Show more", width=90, height=24,
+                                              command=self._show_more_invoices, state='disabled')
+        self.show_more_button.pack(side='right')
+
         self.populate_invoices_tree()
 
     def populate_invoices_tree(self):
-        """Populate the recent invoices tree view with invoices from the selected date"""
+        """Sync the recent invoices panel: the selected date's invoices, or search matches over all dates.
+
+        Only the first `invoice_page_limit` rows are shown; "Show more" raises the limit.
+        """
         if not hasattr(self.app, 'invoices_tree'):
             return
-        for item in self.app.invoices_tree.get_children():
-            self.app.invoices_tree.delete(item)
-        selected_date = getattr(self.app, 'selected_date', '')
-        if hasattr(self.app, 'invoices') and self.app.invoices:
-            for invoice in reversed(self.app.invoices):
-                if invoice.get('status') == 'deleted':
-                    continue
-                invoice_date = invoice.get('date', '')
-                if not invoice_date and invoice.get('time'):
-                    try:
-                        from datetime import datetime
-                        time_str = invoice.get('time', '')
-                        date_part = time_str.split()[0] if time_str else ''
-                        invoice_date_obj = datetime.strptime(date_part, "%d-%b-%Y")
-                        invoice_date = invoice_date_obj.strftime("%Y-%m-%d")
-                    except (ValueError, IndexError):
-                        continue
-                if invoice_date == selected_date:
-                    self.app.invoices_tree.insert('', 'end', values=(
-                        f"#{invoice.get('invoice_number', 'N/A')}",
-                        invoice.get('customer_name', 'Unknown')
-                    ))
+        invoices = getattr(self.app, 'invoices', [])
+        search_text = self.invoice_search_var.get().strip()
+        scope = ('search', search_text) if search_text else ('date', getattr(self.app, 'selected_date', ''))
+        if scope != self._invoice_list_scope:
+            # New day or new search: start again from the first page
+            self._invoice_list_scope = scope
+            self.invoice_page_limit = INVOICE_PAGE_SIZE
+        if search_text:
+            matches = search_invoices(invoices, search_text)
+        else:
+            matches = self.invoice_index.for_date(invoices, scope[1])
+        shown = matches[:self.invoice_page_limit]
+        # Keyed by number: an updated or reloaded invoice is a new dict but keeps its row and selection
+        sync_tree(self.app.invoices_tree, [
+            (invoice_row_key(invoice), (
+                f"#{invoice.get('invoice_number', 'N/A')}",
+                invoice.get('customer_name', 'Unknown')
+            ))
+            for invoice in shown
+        ])
+        where = "all dates" if search_text else "this day"
+        self.invoice_count_label.configure(text=f"{len(shown)} of {len(matches)} ({where})")
+        self.show_more_button.configure(state='normal' if len(shown) < len(matches) else 'disabled')
+
+    def _show_more_invoices(self):
+        self.invoice_page_limit += INVOICE_PAGE_SIZE
+        self.populate_invoices_tree()
+
+    def _on_invoice_search(self):
+        self.populate_invoices_tree()
@@ -2,26 +2,14 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, messagebox
-from utils import make_treeview
+from fruzy_core import day_breakdown, new_record_id, parse_qty_and_unit, qty_movement, top_profit_items
+from utils import make_treeview, sync_tree
 
 class DailySummaryTab:
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
         self.create_widgets()
-        self.parent.after(100, self.refresh_all_data)
-
-    def _parse_qty_and_unit(self, qty_str):
-        """Parse '5.0 kg' → (5.0, 'kg'); default to (0.0, 'kg') on error"""
-        if not qty_str or not isinstance(qty_str, str):
-            return 0.0, 'kg'
-        parts = qty_str.strip().split(maxsplit=1)
-        try:
-            qty = float(parts[0])
-        except (ValueError, IndexError):
-            qty = 0.0
-        unit = parts[1] if len(parts) > 1 else 'kg'
-        return qty, unit
 
     def create_widgets(self):
         cards_frame = ctk.CTkFrame(self.parent, fg_color="transparent")
@@ -159,141 +147,57 @@ class DailySummaryTab:
     def update_qty_movement(self):
         if not hasattr(self.app, 'qty_movement_tree') or not self.app.qty_movement_tree:
             return
-            
-        for item in self.app.qty_movement_tree.get_children():
-            self.app.qty_movement_tree.delete(item)
-
-        # Build stats keyed by English name
-        stats = {}
-        for p in self.app.purchases:
-            english = p['vegetable_english']
-            if english not in stats:
-                stats[english] = {
-                    'display_name': p['vegetable_display'],
-                    'purchased_qty': 0.0,
-                    'sold_qty': 0.0,
-                    'revenue': 0.0,
-                    'unit': 'kg'
-                }
-            qty, unit = self._parse_qty_and_unit(p['quantity'])
-            stats[english]['purchased_qty'] += qty
-            stats[english]['unit'] = unit
-
-        for s in self.app.sales:
-            english = s['vegetable_english']
-            if english not in stats:
-                stats[english] = {
-                    'display_name': s['vegetable_display'],
-                    'purchased_qty': 0.0,
-                    'sold_qty': 0.0,
-                    'revenue': 0.0,
-                    'unit': 'kg'
-                }
-            qty, unit = self._parse_qty_and_unit(s['quantity'])
-            stats[english]['sold_qty'] += qty
-            stats[english]['revenue'] += float(s.get('total', 0))
-            stats[english]['unit'] = unit
-
-        # Display in order of vegetable list
-        for v in self.app.vegetables:
-            english = v['english']
-            if english in stats:
-                data = stats[english]
-                unit = data['unit']
-                remaining = data['purchased_qty'] - data['sold_qty']
-                try:
-                    self.app.qty_movement_tree.insert('', 'end', values=(
-                        data['display_name'],
-                        f"{data['purchased_qty']:.2f} {unit}",
-                        f"{data['sold_qty']:.2f} {unit}",
-                        f"{remaining:.2f} {unit}",
-                        f"{data['revenue']:,.2f}"
-                    ))
-                except Exception as e:
-                    print(f"Error inserting qty movement row: {e}")
+
+        # One row per English name, in order of the vegetable list
+        rows = [
+            (english, (
+                display_name,
+                f"{purchased:.2f} {unit}",
+                f"{sold:.2f} {unit}",
+                f"{purchased - sold:.2f} {unit}",
+                f"{revenue:,.2f}"
+            ))
+            for english, display_name, purchased, sold, revenue, unit
+            in qty_movement(self.app.purchases, self.app.sales, self.app.vegetables)
+        ]
+        try:
+            sync_tree(self.app.qty_movement_tree, rows)
+        except Exception as e:
+            print(f"Error updating qty movement rows: {e}")
 
     def update_profit_items(self):
         if not hasattr(self.app, 'profit_tree') or not self.app.profit_tree:
             return
-            
-        for item in self.app.profit_tree.get_children():
-            self.app.profit_tree.delete(item)
-
-        profit_stats = {}
-        for s in self.app.sales:
-            english = s['vegetable_english']
-            if english not in profit_stats:
-                profit_stats[english] = {
-                    'display_name': s['vegetable_display'],
-                    'qty': 0,
-                    'revenue': 0,
-                    'cost': 0
-                }
-            qty, _ = self._parse_qty_and_unit(s['quantity'])
-            revenue = float(s.get('total', 0))
-            profit_stats[english]['qty'] += qty
-            profit_stats[english]['revenue'] += revenue
-
-        for p in self.app.purchases:
-            english = p['vegetable_english']
-            if english in profit_stats:
-                cost = float(p.get('total', 0))
-                profit_stats[english]['cost'] += cost
-
-        profit_items = []
-        for english, data in profit_stats.items():
-            if data['revenue'] > 0:
-                profit = data['revenue'] - data['cost']
-                profit_pct = (profit / data['revenue'] * 100) if data['revenue'] > 0 else 0
-                profit_items.append((data['display_name'], profit, profit_pct))
-
-        profit_items.sort(key=lambda x: x[1], reverse=True)
-        
-        for rank, (disp_name, profit, profit_pct) in enumerate(profit_items[:5], 1):
-            self.app.profit_tree.insert('', 'end', values=(
-                rank,
-                disp_name,
-                f"{profit:,.2f}",
-                f"{profit_pct:.2f}%"
-            ))
+
+        sync_tree(self.app.profit_tree, [
+            (english, (rank, disp_name, f"{profit:,.2f}", f"{profit_pct:.2f}%"))
+            for rank, (english, disp_name, profit, profit_pct)
+            in enumerate(top_profit_items(self.app.purchases, self.app.sales, 5), 1)
+        ])
 
     def update_summary_labels(self):
-        total_purchases = len(self.app.purchases)
-        cash_purchases = sum(1 for p in self.app.purchases if p.get('payment', '').lower() == 'cash')
-        credit_purchases = total_purchases - cash_purchases
-        cash_amount = sum(float(p.get('total', 0)) for p in self.app.purchases if p.get('payment', '').lower() == 'cash')
-        credit_amount = sum(float(p.get('total', 0)) for p in self.app.purchases if p.get('payment', '').lower() == 'credit')
-
-        total_sales = len(self.app.sales)
-        invoice_sales = sum(1 for s in self.app.sales if 'invoice' in s.get('source', '').lower())
-        manual_sales = total_sales - invoice_sales
-        total_sales_amount = sum(float(s.get('total', 0)) for s in self.app.sales)
-        avg_sale = (total_sales_amount / total_sales) if total_sales > 0 else 0
+        day = day_breakdown(self.app.purchases, self.app.sales)
 
         if hasattr(self.app, 'purchase_items_label'):
-            self.app.purchase_items_label.configure(text=str(total_purchases))
+            self.app.purchase_items_label.configure(text=str(day['purchase_items']))
         if hasattr(self.app, 'cash_purchase_label'):
-            self.app.cash_purchase_label.configure(text=f"PKR {cash_amount:,.2f}")
+            self.app.cash_purchase_label.configure(text=f"PKR {day['cash_amount']:,.2f}")
         if hasattr(self.app, 'credit_purchase_label'):
-            self.app.credit_purchase_label.configure(text=f"PKR {credit_amount:,.2f}")
+            self.app.credit_purchase_label.configure(text=f"PKR {day['credit_amount']:,.2f}")
 
         if hasattr(self.app, 'sales_items_label'):
-            self.app.sales_items_label.configure(text=str(total_sales))
+            self.app.sales_items_label.configure(text=str(day['sales_items']))
         if hasattr(self.app, 'invoice_sales_label'):
-            self.app.invoice_sales_label.configure(text=str(invoice_sales))
+            self.app.invoice_sales_label.configure(text=str(day['invoice_sales']))
         if hasattr(self.app, 'manual_sales_label'):
-            self.app.manual_sales_label.configure(text=str(manual_sales))
+            self.app.manual_sales_label.configure(text=str(day['manual_sales']))
         if hasattr(self.app, 'avg_sale_label'):
-            self.app.avg_sale_label.configure(text=f"PKR {avg_sale:,.2f}")
+            self.app.avg_sale_label.configure(text=f"PKR {day['avg_sale']:,.2f}")
 
     def refresh_all_data(self):
         self.update_qty_movement()
         self.update_profit_items()
         self.update_summary_labels()
-        try:
-            self.parent.update_idletasks()
-        except:
-            pass
 
     def _copy_qty_movement_data(self):
         if not hasattr(self.app, 'qty_movement_tree') or not self.app.qty_movement_tree:
@@ -379,7 +283,7 @@ class DailySummaryTab:
             raw_qty = str(raw_qty)
         if not raw_qty.strip():
             raw_qty = '0 kg'
-        qty, current_unit = self._parse_qty_and_unit(raw_qty)
+        qty, current_unit = parse_qty_and_unit(raw_qty)
 
         # Safely get rate
         raw_rate = purchase.get('rate', '0')
@@ -427,16 +331,17 @@ class DailySummaryTab:
                 messagebox.showerror("Input Error", "Please enter valid numbers for quantity and rate.")
                 return
 
-            self.app.purchases[index]['quantity'] = f"{qty_val:.2f} {unit}"
-            self.app.purchases[index]['rate'] = str(rate)
-            self.app.purchases[index]['total'] = str(round(qty_val * rate, 2))
+            # Edit the record itself: it stays valid even if the list moved under the dialog
+            purchase['quantity'] = f"{qty_val:.2f} {unit}"
+            purchase['rate'] = str(rate)
+            purchase['total'] = str(round(qty_val * rate, 2))
 
-            if hasattr(self.app, 'imported_purchase_rates'):
+            if self.app.rates.purchase:
                 extracted = self._extract_english_name(veg_name)
                 if extracted:
-                    self.app.imported_purchase_rates[extracted] = rate
+                    self.app.rates.set_rate('purchase', extracted, rate)
 
-            self.app.refresh_daily_summary()
+            self.app.ledger.mark_updated('purchases', self.app.selected_date, [purchase])
             dialog.destroy()
 
         ctk.CTkButton(dialog, text="Save Changes", command=save_changes, width=100).pack(pady=15)
@@ -509,6 +414,7 @@ class DailySummaryTab:
                 urdu_part = veg_name
 
             purchase = {
+                'id': new_record_id(),
                 'vegetable_urdu': urdu_part,
                 'vegetable_english': stored_veg,
                 'vegetable_display': veg_name,
@@ -519,14 +425,7 @@ class DailySummaryTab:
                 'payment': payment_var.get()
             }
 
-            self.app.purchases.append(purchase)
-            self.app.refresh_daily_summary()
-
-            if hasattr(self.app, 'purchase_tab_instance') and hasattr(self.app.purchase_tab_instance, 'reload_purchase_list'):
-                try:
-                    self.app.purchase_tab_instance.reload_purchase_list()
-                except Exception:
-                    pass
+            self.app.ledger.add_records('purchases', self.app.selected_date, [purchase])
 
             dialog.destroy()
 
@@ -0,0 +1,213 @@
+# fruzy.py - Batch tool over the app's data folder, without the GUI
+"""Usage: python -m fruzy [--data-dir DIR] [--jobs N] <command> ...
+
+  import-invoices DIR         import every web invoice workbook (.xlsx) in DIR
+  import-excel FILE [FILE..]  import exported monthly workbooks
+  export --from D --to D      export a date range, one workbook per month (or --single)
+  report daily|monthly        profit/loss per day or per month (--from/--to to narrow)
+  verify                      check the data files for inconsistencies
+
+Every command prints one JSON document on stdout; log lines go to stderr. A command
+holds the data folder's write lock while it runs, so open app windows wait for it to
+finish their saves and then merge; if another writer keeps the lock longer than --wait
+seconds the command gives up.
+Exit status: 0 ok, 1 the command found problems, 2 bad usage, 3 data folder in use.
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+from fruzy_core import DataDirLock, DataDirLocked, Ledger
+
+# Same folder FruzyBusinessManager uses
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+EXIT_PROBLEMS = 1
+EXIT_USAGE = 2
+EXIT_LOCKED = 3
+
+
+def _date_arg(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}") from None
+
+
+def _parse_invoice_files(filenames, vegetables, workers):
+    """([(filename, parsed)], [(filename, error)]), parsing in a process pool when it pays."""
+    from fruzy_core.web_invoice import parse_web_invoice
+    parse = partial(parse_web_invoice, vegetables=vegetables)
+    results = []
+    errors = []
+    if workers <= 1 or len(filenames) <= 1:
+        for filename in filenames:
+            try:
+                results.append((filename, parse(filename)))
+            except Exception as e:
+                errors.append((filename, str(e)))
+        return results, errors
+    with ProcessPoolExecutor(max_workers=min(workers, len(filenames))) as pool:
+        futures = [(filename, pool.submit(parse, filename)) for filename in filenames]
+        for filename, future in futures:
+            try:
+                results.append((filename, future.result()))
+            except Exception as e:
+                errors.append((filename, str(e)))
+    return results, errors
+
+
+# ============ COMMANDS ============
+# Each takes the parsed arguments and returns the JSON result; result['ok'] sets the exit status.
+def cmd_import_invoices(args):
+    from fruzy_core import import_manifest
+    filenames = sorted(
+        os.path.join(args.dir, name) for name in os.listdir(args.dir)
+        if name.lower().endswith('.xlsx') and not name.startswith('~$')
+    )
+    ledger = Ledger.open(args.data_dir)
+    manifest = import_manifest.ImportManifest(args.data_dir)
+    plan = import_manifest.plan_imports(manifest, filenames)
+    results, parse_errors = _parse_invoice_files(plan['new'], [dict(v) for v in ledger.vegetables], args.jobs)
+    default_date = args.date or datetime.now().strftime("%Y-%m-%d")
+    imported, rejected = ledger.commit_web_invoices([parsed for _, parsed in results], default_date)
+    import_manifest.record_imports(manifest, plan, results, imported, rejected)
+
+    failed = [{'file': f, 'reason': reason} for f, reason in parse_errors + rejected
+              if reason != "Invoice already exists"]
+    return {
+        'ok': not failed,
+        'imported': [{'invoice_number': inv['invoice_number'], 'date': inv['date'], 'file': inv['filepath'],
+                      'total': inv['total_amount']} for inv in imported],
+        'duplicates': [f for f, reason in rejected if reason == "Invoice already exists"],
+        'skipped': [f for f, _ in plan['skipped']],
+        'needs_review': [f for f, _ in plan['review']],
+        'failed': failed,
+    }
+
+
+def cmd_import_excel(args):
+    from fruzy_core import excel_io
+    ledger = Ledger.open(args.data_dir)
+    dates, errors = excel_io.import_workbooks(ledger, args.files, args.jobs)
+    return {'ok': bool(dates) and not errors, 'dates': dates, 'errors': errors}
+
+
+def cmd_export(args):
+    from fruzy_core import excel_io
+    if args.start > args.end:
+        return {'ok': False, 'error': "--from must be on or before --to"}
+    ledger = Ledger.open(args.data_dir)
+    if not ledger.dates(args.start, args.end):
+        return {'ok': False, 'error': "no purchases or sales in the selected range", 'files': []}
+    os.makedirs(args.out, exist_ok=True)
+    files = excel_io.export_range(ledger, args.start, args.end, args.out, single_workbook=args.single,
+                                  max_workers=args.jobs)
+    return {'ok': True, 'files': [{'file': f, 'days': days} for f, days in files]}
+
+
+def _pnl(purchases, sales, profit, percent):
+    return {'purchases': round(float(purchases), 2), 'sales': round(float(sales), 2),
+            'profit': round(float(profit), 2), 'profit_percent': round(float(percent), 2)}
+
+
+def cmd_report(args):
+    from fruzy_core.aggregation import range_report
+    ledger = Ledger.open(args.data_dir)
+    dates = ledger.dates(args.start, args.end)
+    days, totals = range_report(ledger.all_purchases, ledger.all_sales, dates)
+    if args.period == 'daily':
+        rows = [{'date': date, **_pnl(purchases, sales, profit, percent),
+                 'purchase_items': len(ledger.all_purchases.get(date, [])),
+                 'sales_items': len(ledger.all_sales.get(date, []))}
+                for date, purchases, sales, profit, percent in days]
+    else:
+        months = {}
+        for date, purchases, sales, _, _ in days:
+            month = months.setdefault(date[:7], [0, 0.0, 0.0])
+            month[0] += 1
+            month[1] += purchases
+            month[2] += sales
+        rows = []
+        for month, (day_count, purchases, sales) in months.items():
+            profit = sales - purchases
+            rows.append({'month': month, 'days': day_count,
+                         **_pnl(purchases, sales, profit, (profit / purchases * 100) if purchases > 0 else 0)})
+    return {'ok': True, 'period': args.period, 'rows': rows, 'totals': _pnl(*totals)}
+
+
+def cmd_verify(args):
+    from fruzy_core.verify import verify_data_dir
+    problems, counts = verify_data_dir(args.data_dir)
+    return {'ok': not any(p['level'] == 'error' for p in problems), 'counts': counts, 'problems': problems}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m fruzy', description="Fruzy batch tool (no GUI).")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="data folder (default: the app's ./data)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help="worker processes for parsing/export")
+    parser.add_argument('--wait', type=float, default=30, help="seconds to wait for the data folder lock (default: 30)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('import-invoices', help="import every web invoice workbook in a folder")
+    p.add_argument('dir')
+    p.add_argument('--date', type=_date_arg, help="date for invoices that carry none (default: today)")
+    p.set_defaults(handler=cmd_import_invoices)
+
+    p = commands.add_parser('import-excel', help="import exported monthly workbooks")
+    p.add_argument('files', nargs='+')
+    p.set_defaults(handler=cmd_import_excel)
+
+    p = commands.add_parser('export', help="export a date range to Excel")
+    p.add_argument('--from', dest='start', type=_date_arg, required=True)
+    p.add_argument('--to', dest='end', type=_date_arg, required=True)
+    p.add_argument('--out', default='.', help="output folder (default: current folder)")
+    p.add_argument('--single', action='store_true', help="one consolidated workbook instead of one per month")
+    p.set_defaults(handler=cmd_export)
+
+    p = commands.add_parser('report', help="profit/loss per day or per month")
+    p.add_argument('period', choices=('daily', 'monthly'))
+    p.add_argument('--from', dest='start', type=_date_arg)
+    p.add_argument('--to', dest='end', type=_date_arg)
+    p.set_defaults(handler=cmd_report)
+
+    p = commands.add_parser('verify', help="check the data files for inconsistencies")
+    p.set_defaults(handler=cmd_verify)
+    return parser
+
+
+def _emit(result):
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write('\n')
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.data_dir):
+        _emit({'ok': False, 'error': f"data folder not found: {args.data_dir}"})
+        return EXIT_USAGE
+    if args.command == 'import-invoices' and not os.path.isdir(args.dir):
+        _emit({'ok': False, 'error': f"folder not found: {args.dir}"})
+        return EXIT_USAGE
+    try:
+        lock = DataDirLock(args.data_dir, f"python -m fruzy {args.command}").acquire(args.wait)
+        try:
+            # Ledger/manifest log lines must not corrupt the JSON on stdout
+            with contextlib.redirect_stdout(sys.stderr):
+                result = args.handler(args)
+        finally:
+            lock.release()
+    except DataDirLocked as e:
+        _emit({'ok': False, 'error': str(e)})
+        return EXIT_LOCKED
+    _emit(result)
+    return 0 if result['ok'] else EXIT_PROBLEMS
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,21 @@
+"""Headless core of Fruzy: the ledger, item catalog, invoices, aggregation and Excel I/O.
+
+Nothing in this package imports tkinter, customtkinter or the app's own modules, so
+the same data layer serves the Tk app (main.py), scripts and tools with only this
+package on sys.path.
+"""
+from .aggregation import day_breakdown, day_totals, parse_qty_and_unit, qty_movement, top_profit_items
+from .catalog import display_name, load_vegetables, lookup_vegetable, save_vegetables
+from .datalock import DataDirLock, DataDirLocked
+from .invoices import InvoiceDateIndex, invoice_date, invoice_sales, search_invoices
+from .ledger import KINDS, Ledger
+from .records import InvalidRecord, make_purchase, make_sale, new_record_id, normalize_transactions
+
+__all__ = [
+    'day_breakdown', 'day_totals', 'parse_qty_and_unit', 'qty_movement', 'top_profit_items',
+    'display_name', 'load_vegetables', 'lookup_vegetable', 'save_vegetables',
+    'DataDirLock', 'DataDirLocked',
+    'InvoiceDateIndex', 'invoice_date', 'invoice_sales', 'search_invoices',
+    'KINDS', 'Ledger',
+    'InvalidRecord', 'make_purchase', 'make_sale', 'new_record_id', 'normalize_transactions',
+]
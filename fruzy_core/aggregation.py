@@ -0,0 +1,112 @@
+# fruzy_core/aggregation.py - Per-day totals and item breakdowns over ledger records
+
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_qty_and_unit(qty_str):
+    """Parse '5.0 kg' → (5.0, 'kg'); default to (0.0, 'kg') on error"""
+    if not qty_str or not isinstance(qty_str, str):
+        return 0.0, 'kg'
+    parts = qty_str.strip().split(maxsplit=1)
+    try:
+        qty = float(parts[0])
+    except (ValueError, IndexError):
+        qty = 0.0
+    unit = parts[1] if len(parts) > 1 else 'kg'
+    return qty, unit
+
+
+def day_totals(purchases, sales):
+    """Return (total_purchase, total_sales, profit, profit_percent) for one day's records."""
+    total_purchase = sum(to_float(p.get('total')) for p in purchases)
+    total_sales = sum(to_float(s.get('total')) for s in sales)
+    profit = total_sales - total_purchase
+    profit_percent = (profit / total_purchase * 100) if total_purchase > 0 else 0
+    return total_purchase, total_sales, profit, profit_percent
+
+
+def day_breakdown(purchases, sales):
+    """Counts and amounts behind the Daily Summary cards."""
+    cash_purchases = [p for p in purchases if p.get('payment', '').lower() == 'cash']
+    credit_amount = sum(to_float(p.get('total')) for p in purchases if p.get('payment', '').lower() == 'credit')
+    invoice_sales = sum(1 for s in sales if 'invoice' in s.get('source', '').lower())
+    total_sales_amount = sum(to_float(s.get('total')) for s in sales)
+    return {
+        'purchase_items': len(purchases),
+        'cash_purchases': len(cash_purchases),
+        'credit_purchases': len(purchases) - len(cash_purchases),
+        'cash_amount': sum(to_float(p.get('total')) for p in cash_purchases),
+        'credit_amount': credit_amount,
+        'sales_items': len(sales),
+        'invoice_sales': invoice_sales,
+        'manual_sales': len(sales) - invoice_sales,
+        'sales_amount': total_sales_amount,
+        'avg_sale': (total_sales_amount / len(sales)) if sales else 0,
+    }
+
+
+def qty_movement(purchases, sales, vegetables):
+    """Purchased vs sold per English item name, in catalog order.
+
+    Returns (english, display_name, purchased_qty, sold_qty, revenue, unit) tuples; items
+    that are not in the catalog are left out, as on the Daily Summary tab.
+    """
+    stats = {}
+    for bucket, records in (('purchased', purchases), ('sold', sales)):
+        for t in records:
+            english = t['vegetable_english']
+            entry = stats.get(english)
+            if entry is None:
+                entry = stats[english] = {'display_name': t['vegetable_display'], 'purchased': 0.0,
+                                          'sold': 0.0, 'revenue': 0.0, 'unit': 'kg'}
+            qty, unit = parse_qty_and_unit(t['quantity'])
+            entry[bucket] += qty
+            entry['unit'] = unit
+            if bucket == 'sold':
+                entry['revenue'] += to_float(t.get('total'))
+    rows = []
+    for v in vegetables:
+        entry = stats.pop(v['english'], None)
+        if entry is not None:
+            rows.append((v['english'], entry['display_name'], entry['purchased'], entry['sold'],
+                         entry['revenue'], entry['unit']))
+    return rows
+
+
+def top_profit_items(purchases, sales, limit=5):
+    """Best-earning sold items: (english, display_name, profit, profit % of revenue), highest first."""
+    stats = {}
+    for s in sales:
+        entry = stats.setdefault(s['vegetable_english'], {'display_name': s['vegetable_display'],
+                                                          'revenue': 0.0, 'cost': 0.0})
+        entry['revenue'] += to_float(s.get('total'))
+    for p in purchases:
+        entry = stats.get(p['vegetable_english'])
+        if entry is not None:
+            entry['cost'] += to_float(p.get('total'))
+    items = []
+    for english, entry in stats.items():
+        if entry['revenue'] > 0:
+            profit = entry['revenue'] - entry['cost']
+            items.append((english, entry['display_name'], profit, profit / entry['revenue'] * 100))
+    items.sort(key=lambda x: x[2], reverse=True)
+    return items[:limit]
+
+
+def range_report(all_purchases, all_sales, dates):
+    """Per-day totals for `dates` plus their sum: ([(date, purchase, sales, profit, profit %)], totals)."""
+    days = []
+    total_purchase = total_sales = 0.0
+    for date in dates:
+        purchase, sale, profit, percent = day_totals(all_purchases.get(date, []), all_sales.get(date, []))
+        days.append((date, purchase, sale, profit, percent))
+        total_purchase += purchase
+        total_sales += sale
+    profit = total_sales - total_purchase
+    totals = (total_purchase, total_sales, profit, (profit / total_purchase * 100) if total_purchase > 0 else 0)
+    return days, totals
@@ -0,0 +1,70 @@
+# fruzy_core/catalog.py - The item catalog (vegetables.json) and name lookups
+import json
+import os
+
+VEGETABLES_FILE = 'vegetables.json'
+DEFAULT_VEGETABLES = [
+    {"id": 1, "urdu": "ٹماٹر", "english": "Tomato"},
+    {"id": 2, "urdu": "سبز مرچ", "english": "Green Chili"},
+    {"id": 3, "urdu": "لہسن", "english": "Garlic"},
+    {"id": 4, "urdu": "پیاز", "english": "Onion"},
+    {"id": 5, "urdu": "آلو پرانا", "english": "Old Potato"}
+]
+
+
+def display_name(veg):
+    """'اردو (English)' as shown in the sidebar and the item comboboxes."""
+    return f"{veg['urdu']} ({veg['english']})"
+
+
+def load_vegetables(data_dir):
+    """The saved catalog, or the defaults (written out) when there is none or it is unreadable."""
+    veg_path = os.path.join(data_dir, VEGETABLES_FILE)
+    if os.path.exists(veg_path):
+        try:
+            with open(veg_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading vegetables: {e}")
+    vegetables = [dict(v) for v in DEFAULT_VEGETABLES]
+    save_vegetables(data_dir, vegetables)
+    return vegetables
+
+
+def save_vegetables(data_dir, vegetables):
+    """Returns True on success."""
+    veg_path = os.path.join(data_dir, VEGETABLES_FILE)
+    try:
+        with open(veg_path, 'w', encoding='utf-8') as f:
+            json.dump(vegetables, f, ensure_ascii=False, indent=2)
+        return True
+    except Exception as e:
+        print(f"Error saving vegetables: {e}")
+        return False
+
+
+def lookup_vegetable(vegetables, veg_display_name):
+    """{'urdu', 'english'} for a display, English or Urdu name; unknown names map to themselves."""
+    if not veg_display_name:
+        return None
+    for veg in vegetables:
+        if veg_display_name == display_name(veg):
+            return {'urdu': veg['urdu'], 'english': veg['english']}
+    for veg in vegetables:
+        if veg['english'].lower() == veg_display_name.lower():
+            return {'urdu': veg['urdu'], 'english': veg['english']}
+    for veg in vegetables:
+        if veg['urdu'] == veg_display_name:
+            return {'urdu': veg['urdu'], 'english': veg['english']}
+    if '(' in veg_display_name and ')' in veg_display_name:
+        try:
+            urdu_part = veg_display_name.split('(')[0].strip()
+            english_part = veg_display_name.split('(')[1].split(')')[0].strip()
+            return {'urdu': urdu_part, 'english': english_part}
+        except IndexError:
+            pass
+    return {'urdu': veg_display_name, 'english': veg_display_name}
+
+
+def next_vegetable_id(vegetables):
+    return max([v['id'] for v in vegetables], default=0) + 1
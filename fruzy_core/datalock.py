@@ -0,0 +1,114 @@
+# fruzy_core/datalock.py - One writer at a time for a data directory (app windows, batch runs)
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+LOCK_FILE = '.fruzy.lock'
+RETRY_SECONDS = 0.05
+
+# lock path -> [open file, depth]; a process re-entering its own lock must not block on itself
+_held = {}
+
+
+class DataDirLocked(RuntimeError):
+    """Another process holds the data directory."""
+
+
+def _try_lock(f):
+    if sys.platform == 'win32':
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _unlock(f):
+    if sys.platform == 'win32':
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _holder(f):
+    try:
+        f.seek(0)
+        holder = json.loads(f.read() or '{}')
+        return f"{holder.get('owner', 'another process')} (pid {holder.get('pid', '?')}, since {holder.get('since', '?')})"
+    except (OSError, ValueError):
+        return "another process"
+
+
+class DataDirLock:
+    """Advisory OS lock on <data_dir>/.fruzy.lock, held while a process writes the data.
+
+    Ledgers take it around each save (see Ledger.save) and batch runs for a whole
+    command. The OS drops the lock when its holder exits or crashes, so a leftover file
+    never blocks anyone; the file's contents only say who holds it, for the error message.
+    Re-acquiring a lock this process already holds just nests.
+    """
+
+    def __init__(self, data_dir, owner):
+        self.path = os.path.abspath(os.path.join(data_dir, LOCK_FILE))
+        self.owner = owner
+        self._depth = 0
+
+    @property
+    def held(self):
+        return self._depth > 0
+
+    def acquire(self, timeout=0):
+        """Take the lock, waiting up to `timeout` seconds; raises DataDirLocked."""
+        held = _held.get(self.path)
+        if held is not None:
+            held[1] += 1
+            self._depth += 1
+            return self
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, 'a+', encoding='utf-8')
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                _try_lock(f)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    who = _holder(f)
+                    f.close()
+                    raise DataDirLocked(f"The data folder {os.path.dirname(self.path)} is in use by {who}.") from None
+                time.sleep(RETRY_SECONDS)
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps({'owner': self.owner, 'pid': os.getpid(),
+                            'since': datetime.now().strftime("%Y-%m-%d %H:%M:%S")}))
+        f.flush()
+        _held[self.path] = [f, 1]
+        self._depth += 1
+        return self
+
+    def release(self):
+        if self._depth == 0:
+            return
+        self._depth -= 1
+        held = _held[self.path]
+        held[1] -= 1
+        if held[1] > 0:
+            return
+        del _held[self.path]
+        try:
+            _unlock(held[0])
+        except OSError:
+            pass
+        held[0].close()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,133 @@
+# fruzy_core/events.py - Typed change events the ledger publishes, and the bus that carries them
+class Event:
+    """Base of all ledger events. Subscribing to a class also receives its subclasses."""
+
+    def __repr__(self):
+        fields = ', '.join(f"{k}={v!r}" for k, v in vars(self).items())
+        return f"{type(self).__name__}({fields})"
+
+
+# ---- purchases and sales ----
+class RecordsEvent(Event):
+    """Records of one kind ('purchases' or 'sales') changed on one date."""
+
+    kind = None
+
+    def __init__(self, date, records):
+        self.date = date
+        self.records = list(records)
+
+
+class RecordsAdded(RecordsEvent):
+    """Records appended to the end of that day's list."""
+
+
+class RecordsRemoved(RecordsEvent):
+    """Records deleted from that day."""
+
+
+class RecordsUpdated(RecordsEvent):
+    """Records edited in place (same ids)."""
+
+
+class PurchaseAdded(RecordsAdded):
+    kind = 'purchases'
+
+
+class PurchaseRemoved(RecordsRemoved):
+    kind = 'purchases'
+
+
+class PurchaseUpdated(RecordsUpdated):
+    kind = 'purchases'
+
+
+class SaleAdded(RecordsAdded):
+    kind = 'sales'
+
+
+class SaleRemoved(RecordsRemoved):
+    kind = 'sales'
+
+
+class SaleUpdated(RecordsUpdated):
+    kind = 'sales'
+
+
+RECORD_EVENTS = {
+    ('purchases', 'added'): PurchaseAdded, ('purchases', 'removed'): PurchaseRemoved,
+    ('purchases', 'updated'): PurchaseUpdated,
+    ('sales', 'added'): SaleAdded, ('sales', 'removed'): SaleRemoved, ('sales', 'updated'): SaleUpdated,
+}
+
+
+class DayReplaced(Event):
+    """A whole day's list was swapped (Excel import, set_day, or pulled from another counter)."""
+
+    def __init__(self, kind, date):
+        self.kind = kind
+        self.date = date
+
+
+# ---- invoices and catalog ----
+class InvoiceEvent(Event):
+    def __init__(self, invoice):
+        self.invoice = invoice
+
+
+class InvoiceAdded(InvoiceEvent):
+    pass
+
+
+class InvoiceUpdated(InvoiceEvent):
+    """`invoice` replaced `previous` (same number) in the invoices list."""
+
+    def __init__(self, invoice, previous):
+        super().__init__(invoice)
+        self.previous = previous
+
+
+class InvoiceRemoved(InvoiceEvent):
+    pass
+
+
+class InvoicesReplaced(Event):
+    """The invoices list was swapped wholesale (pulled from another counter)."""
+
+
+class CatalogChanged(Event):
+    """The item catalog was replaced or edited."""
+
+
+# ---- app ----
+class DateChanged(Event):
+    """The app's selected date moved; published by the app, not the ledger."""
+
+    def __init__(self, date, previous):
+        self.date = date
+        self.previous = previous
+
+
+class EventBus:
+    """Synchronous publish/subscribe by event class.
+
+    Handlers run in subscription order on the publishing thread (the Tk thread for
+    the app). A failing handler is reported and skipped, so one broken view cannot
+    stop the others or the ledger operation that published.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+
+    def subscribe(self, event_type, handler):
+        """Call handler(event) for every event_type (or subclass) published; returns an unsubscribe function."""
+        self._handlers.setdefault(event_type, []).append(handler)
+        return lambda: self._handlers.get(event_type, []).remove(handler)
+
+    def publish(self, event):
+        for cls in type(event).__mro__:
+            for handler in list(self._handlers.get(cls, ())):
+                try:
+                    handler(event)
+                except Exception as e:
+                    print(f"Error handling {type(event).__name__}: {e}")
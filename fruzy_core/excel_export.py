@@ -0,0 +1,304 @@
+# fruzy_core/excel_export.py - Streaming month export built straight from the in-memory ledger
+import calendar as cal_module
+import os
+from datetime import datetime
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+from .aggregation import day_totals
+
+SUMMARY_SHEET = "Monthly Summary"
+PKR_FORMAT = '"PKR "#,##0.00'
+NUMBER_FORMAT = '#,##0.00'
+PURCHASE_HEADERS = ['Vegetable (اردو/English)', 'Quantity', 'Rate (PKR)', 'Total (PKR)', 'Vendor', 'Payment Type']
+SALES_HEADERS = ['Vegetable (اردو/English)', 'Quantity', 'Rate (PKR)', 'Total (PKR)']
+SUMMARY_HEADERS = ['Date', 'Total Purchase', 'Total Sales', 'Profit/Loss', 'Profit %']
+
+_STYLE_CACHE = {}
+
+
+def get_styles(header_color='#27ae60'):
+    """Return style objects shared by every cell of every sheet (built once per header colour)."""
+    key = header_color.replace('#', '')
+    styles = _STYLE_CACHE.get(key)
+    if styles is None:
+        thin = Side(style='thin')
+        styles = {
+            'title': Font(name='Arial', size=16, bold=True),
+            'subtitle': Font(name='Arial', size=12),
+            'section': Font(name='Arial', size=14, bold=True),
+            'header_fill': PatternFill(start_color=key, end_color=key, fill_type="solid"),
+            'header_font': Font(name='Arial', size=12, bold=True, color="FFFFFF"),
+            'summary_header_font': Font(name='Arial', size=11, bold=True, color="FFFFFF"),
+            'border': Border(left=thin, right=thin, top=thin, bottom=thin),
+            'center': Alignment(horizontal='center'),
+            'bold': Font(bold=True),
+            'total': Font(bold=True, size=12),
+        }
+        _STYLE_CACHE[key] = styles
+    return styles
+
+
+# ============ LEDGER AGGREGATES ============
+def month_dates(year, month, all_purchases, all_sales, start=None, end=None):
+    """Dates (YYYY-MM-DD) of the given month that have any purchases or sales, in order.
+
+    `start`/`end` optionally clip the month to an inclusive date range.
+    """
+    days = cal_module.monthrange(year, month)[1]
+    dates = []
+    for day in range(1, days + 1):
+        date_str = f"{year:04d}-{month:02d}-{day:02d}"
+        if (start and date_str < start) or (end and date_str > end):
+            continue
+        if all_purchases.get(date_str) or all_sales.get(date_str):
+            dates.append(date_str)
+    return dates
+
+
+def months_in_range(start, end):
+    """(year, month) pairs covering the inclusive range start..end (YYYY-MM-DD strings)."""
+    year, month = int(start[:4]), int(start[5:7])
+    last = (int(end[:4]), int(end[5:7]))
+    months = []
+    while (year, month) <= last:
+        months.append((year, month))
+        month += 1
+        if month > 12:
+            month = 1
+            year += 1
+    return months
+
+
+def month_filename(year, month):
+    return f"{cal_module.month_name[month]}_{year}.xlsx"
+
+
+def qty_totals(purchases, sales):
+    """Group quantities per English item name and unit: {name: {'purchased': {unit: qty}, 'sold': {...}}}."""
+    totals = {}
+    for bucket, records in (('purchased', purchases), ('sold', sales)):
+        for t in records:
+            name = t.get('vegetable_english') or t.get('vegetable', '')
+            parts = str(t.get('quantity', '')).split(maxsplit=1)
+            try:
+                qty = float(parts[0])
+            except (ValueError, IndexError):
+                continue
+            unit = parts[1] if len(parts) > 1 else 'kg'
+            entry = totals.setdefault(name, {'purchased': {}, 'sold': {}})
+            entry[bucket][unit] = entry[bucket].get(unit, 0.0) + qty
+    return totals
+
+
+def format_qty_buckets(buckets):
+    if not buckets:
+        return "0.00"
+    return " + ".join(f"{qty:.2f} {unit}" for unit, qty in buckets.items())
+
+
+def sheet_name_for(date_str):
+    return datetime.strptime(date_str, "%Y-%m-%d").strftime("%d-%b-%Y")
+
+
+# ============ SHEET WRITERS ============
+def _cell(ws, value, font=None, fill=None, border=None, alignment=None, number_format=None):
+    cell = WriteOnlyCell(ws, value=value)
+    if font is not None:
+        cell.font = font
+    if fill is not None:
+        cell.fill = fill
+    if border is not None:
+        cell.border = border
+    if alignment is not None:
+        cell.alignment = alignment
+    if number_format is not None:
+        cell.number_format = number_format
+    return cell
+
+
+def _header_row(ws, headers, styles, font_key='header_font'):
+    return [_cell(ws, h, font=styles[font_key], fill=styles['header_fill'],
+                  border=styles['border'], alignment=styles['center']) for h in headers]
+
+
+def _display_name(t):
+    if t.get('vegetable_urdu') and t.get('vegetable_english'):
+        return f"{t['vegetable_urdu']} ({t['vegetable_english']})"
+    return t.get('vegetable', t.get('vegetable_english', ''))
+
+
+def _money_cell(ws, value, border):
+    try:
+        return _cell(ws, float(value), border=border, number_format=NUMBER_FORMAT)
+    except (TypeError, ValueError):
+        return _cell(ws, value, border=border, number_format=NUMBER_FORMAT)
+
+
+def write_daily_sheet(ws, date_str, purchases, sales, vegetables, styles):
+    """Stream one day's sheet (purchases, sales, summary, quantity movement) into a write-only worksheet."""
+    border = styles['border']
+    for col in ['A', 'B', 'C', 'D', 'E', 'F']:
+        ws.column_dimensions[col].width = 20
+    ws.merged_cells.add('A1:F1')
+    ws.merged_cells.add('A2:F2')
+
+    date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+    ws.append([_cell(ws, "FRUZY - Vegetable & Fruit Business", font=styles['title'])])
+    ws.append([_cell(ws, f"Date: {date_obj.strftime('%A, %B %d, %Y')}", font=styles['subtitle'])])
+    ws.append([])
+
+    ws.append([_cell(ws, "PURCHASES", font=styles['section'])])
+    ws.append(_header_row(ws, PURCHASE_HEADERS, styles))
+    for p in purchases:
+        ws.append([
+            _cell(ws, _display_name(p), border=border),
+            _cell(ws, p.get('quantity', ''), border=border),
+            _money_cell(ws, p.get('rate', ''), border),
+            _money_cell(ws, p.get('total', ''), border),
+            _cell(ws, p.get('vendor', ''), border=border),
+            _cell(ws, str(p.get('payment', '')).upper(), border=border),
+        ])
+    ws.append([])
+    ws.append([])
+
+    ws.append([_cell(ws, "SALES", font=styles['section'])])
+    ws.append(_header_row(ws, SALES_HEADERS, styles))
+    for s in sales:
+        ws.append([
+            _cell(ws, _display_name(s), border=border),
+            _cell(ws, s.get('quantity', ''), border=border),
+            _money_cell(ws, s.get('rate', ''), border),
+            _money_cell(ws, s.get('total', ''), border),
+        ])
+    ws.append([])
+    ws.append([])
+
+    total_purchase, total_sales, profit, profit_percent = day_totals(purchases, sales)
+    bold = styles['bold']
+    ws.append([_cell(ws, "DAILY SUMMARY", font=styles['section'])])
+    ws.append([_cell(ws, "Total Purchase:", font=bold), _cell(ws, total_purchase, font=bold, number_format=PKR_FORMAT)])
+    ws.append([_cell(ws, "Total Sales:", font=bold), _cell(ws, total_sales, font=bold, number_format=PKR_FORMAT)])
+    ws.append([_cell(ws, "Profit/Loss:", font=bold), _cell(ws, profit, font=bold, number_format=PKR_FORMAT)])
+    ws.append([_cell(ws, "Profit Percentage:", font=bold), _cell(ws, f"{profit_percent:.2f}%", font=bold)])
+
+    totals = qty_totals(purchases, sales)
+    if totals:
+        ws.append([])
+        ws.append([_cell(ws, "QUANTITY MOVEMENT", font=styles['section'])])
+        ws.append(_header_row(ws, ['Vegetable', 'Purchased', 'Sold'], styles))
+        for veg in vegetables:
+            entry = totals.get(veg.get('english', ''))
+            if not entry:
+                continue
+            p_display = format_qty_buckets(entry['purchased'])
+            s_display = format_qty_buckets(entry['sold'])
+            if p_display == "0.00" and s_display == "0.00":
+                continue
+            ws.append([
+                _cell(ws, f"{veg.get('urdu', '')} ({veg.get('english', '')})", border=border),
+                _cell(ws, p_display, border=border),
+                _cell(ws, s_display, border=border),
+            ])
+
+
+def write_summary_sheet(ws, title, day_rows, styles, heading="FRUZY - Monthly Summary"):
+    """Stream the summary sheet from precomputed (sheet_name, total_purchase, total_sales) rows."""
+    border = styles['border']
+    for col in ['A', 'B', 'C', 'D', 'E']:
+        ws.column_dimensions[col].width = 20
+    ws.merged_cells.add('A1:E1')
+
+    ws.append([_cell(ws, heading, font=styles['title'])])
+    ws.append([_cell(ws, title, font=styles['subtitle'])])
+    ws.append([])
+    ws.append(_header_row(ws, SUMMARY_HEADERS, styles, font_key='summary_header_font'))
+
+    total_purchase_sum = 0
+    total_sales_sum = 0
+    for sheet_name, total_purchase, total_sales in day_rows:
+        profit = total_sales - total_purchase
+        profit_percent = (profit / total_purchase * 100) if total_purchase > 0 else 0
+        ws.append([
+            _cell(ws, sheet_name, border=border),
+            _cell(ws, total_purchase, border=border, number_format=PKR_FORMAT),
+            _cell(ws, total_sales, border=border, number_format=PKR_FORMAT),
+            _cell(ws, profit, border=border, number_format=PKR_FORMAT),
+            _cell(ws, f"{profit_percent:.2f}%", border=border),
+        ])
+        total_purchase_sum += total_purchase
+        total_sales_sum += total_sales
+
+    ws.append([])
+    total_font = styles['total']
+    monthly_profit = total_sales_sum - total_purchase_sum
+    monthly_profit_percent = (monthly_profit / total_purchase_sum * 100) if total_purchase_sum > 0 else 0
+    ws.append([
+        _cell(ws, "MONTHLY TOTAL", font=total_font),
+        _cell(ws, total_purchase_sum, font=total_font, number_format=PKR_FORMAT),
+        _cell(ws, total_sales_sum, font=total_font, number_format=PKR_FORMAT),
+        _cell(ws, monthly_profit, font=total_font, number_format=PKR_FORMAT),
+        _cell(ws, f"{monthly_profit_percent:.2f}%", font=total_font),
+    ])
+
+
+def _write_days(filename, summary_title, dates, all_purchases, all_sales, vegetables, styles,
+                heading="FRUZY - Monthly Summary", progress=None, cancelled=None):
+    wb = openpyxl.Workbook(write_only=True)
+    day_rows = []
+    for date_str in dates:
+        total_purchase, total_sales, _, _ = day_totals(all_purchases.get(date_str, []), all_sales.get(date_str, []))
+        day_rows.append((sheet_name_for(date_str), total_purchase, total_sales))
+    write_summary_sheet(wb.create_sheet(SUMMARY_SHEET), summary_title, day_rows, styles, heading=heading)
+
+    for done, (date_str, (sheet_name, _, _)) in enumerate(zip(dates, day_rows), 1):
+        if cancelled and cancelled():
+            return None
+        ws = wb.create_sheet(sheet_name)
+        write_daily_sheet(ws, date_str, all_purchases.get(date_str, []), all_sales.get(date_str, []), vegetables, styles)
+        if progress:
+            progress(done, len(dates), sheet_name)
+
+    temp_path = filename + '.tmp'
+    wb.save(temp_path)
+    os.replace(temp_path, filename)
+    return len(dates)
+
+
+def write_month_workbook(filename, year, month, all_purchases, all_sales, vegetables, header_color='#27ae60',
+                         start=None, end=None):
+    """Write '<Month>_<Year>.xlsx' for every day of the month that has data. Returns the number of days written.
+
+    The summary sheet comes from ledger aggregates, so nothing is read back from the workbook.
+    The file is written next to the target and swapped in only once complete.
+    """
+    dates = month_dates(year, month, all_purchases, all_sales, start, end)
+    return _write_days(filename, f"{cal_module.month_name[month]} {year}", dates,
+                       all_purchases, all_sales, vegetables, get_styles(header_color))
+
+
+def write_range_workbook(filename, start, end, all_purchases, all_sales, vegetables, header_color='#27ae60',
+                         progress=None, cancelled=None):
+    """Write one consolidated workbook with a daily sheet for every day with data in start..end.
+
+    `progress(done, total, sheet_name)` is called after each sheet; returns None if `cancelled()` turns true.
+    """
+    dates = []
+    for year, month in months_in_range(start, end):
+        dates.extend(month_dates(year, month, all_purchases, all_sales, start, end))
+    title = f"{sheet_name_for(start)} to {sheet_name_for(end)}"
+    return _write_days(filename, title, dates, all_purchases, all_sales, vegetables, get_styles(header_color),
+                       heading="FRUZY - Summary", progress=progress, cancelled=cancelled)
+
+
+def export_month_task(task):
+    """Process-pool entry point: task is (out_dir, year, month, start, end, purchases, sales, vegetables, header_color).
+
+    Only the month's slice of the ledger is shipped to the worker. Returns (filename, days written).
+    """
+    out_dir, year, month, start, end, purchases, sales, vegetables, header_color = task
+    filename = os.path.join(out_dir, month_filename(year, month))
+    days = write_month_workbook(filename, year, month, purchases, sales, vegetables, header_color, start, end)
+    return filename, days
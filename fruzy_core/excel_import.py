@@ -0,0 +1,141 @@
+# fruzy_core/excel_import.py - Read-only, multi-process parsing of exported monthly workbooks
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import openpyxl
+
+SUMMARY_SHEET = "Monthly Summary"
+HEADER_VALUES = ("Vegetable", "PURCHASES", "SALES", "Vegetable (اردو/English)")
+SHEET_DATE_FORMATS = ["%Y-%m-%d", "%d-%b-%Y", "%d-%m-%Y", "%m/%d/%Y", "%d/%m/%Y"]
+
+
+def parse_date_from_sheet_name(sheet_name):
+    for fmt in SHEET_DATE_FORMATS:
+        try:
+            return datetime.strptime(sheet_name, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def _cell_str(row, idx, default):
+    return str(row[idx]) if len(row) > idx and row[idx] else default
+
+
+def parse_daily_rows(rows):
+    """Parse a daily sheet's value rows into (purchases, sales).
+
+    Records carry the raw 'vegetable' cell text; name resolution against the
+    catalog is left to the caller so it happens once per distinct name.
+    """
+    purchases = []
+    sales = []
+    in_purchases = False
+    in_sales = False
+    for row in rows:
+        if not row or not row[0]:
+            continue
+        first = row[0]
+        if first == "PURCHASES":
+            in_purchases, in_sales = True, False
+            continue
+        elif first == "SALES":
+            in_purchases, in_sales = False, True
+            continue
+        elif first == "DAILY SUMMARY":
+            break
+        if first in HEADER_VALUES or not (in_purchases or in_sales):
+            continue
+        try:
+            veg = str(first)
+            qty = _cell_str(row, 1, "0")
+            rate = _cell_str(row, 2, "0")
+            total = _cell_str(row, 3, "0")
+            if not (veg and total and float(total) > 0):
+                continue
+            if ' ' not in qty:
+                qty = f"{qty} kg"
+            if in_purchases:
+                purchases.append({
+                    'vegetable': veg,
+                    'quantity': qty,
+                    'rate': rate,
+                    'total': total,
+                    'vendor': _cell_str(row, 4, "Main Vendor"),
+                    'payment': _cell_str(row, 5, "cash").lower()
+                })
+            else:
+                sales.append({
+                    'source': _cell_str(row, 6, "Manual Entry"),
+                    'vegetable': veg,
+                    'quantity': qty,
+                    'rate': rate,
+                    'total': total
+                })
+        except (ValueError, IndexError):
+            continue
+    return purchases, sales
+
+
+def list_daily_sheets(filename):
+    wb = openpyxl.load_workbook(filename, read_only=True)
+    try:
+        return [s for s in wb.sheetnames if s != SUMMARY_SHEET]
+    finally:
+        wb.close()
+
+
+def parse_workbook_task(task):
+    """Process-pool entry point: task is (filename, sheet_names or None for all daily sheets).
+
+    Returns a list of (sheet_name, date_str, purchases, sales, error) in sheet order.
+    """
+    filename, sheet_names = task
+    wb = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+    results = []
+    try:
+        if sheet_names is None:
+            sheet_names = [s for s in wb.sheetnames if s != SUMMARY_SHEET]
+        for sheet_name in sheet_names:
+            date_str = parse_date_from_sheet_name(sheet_name)
+            if not date_str:
+                results.append((sheet_name, None, [], [], "Could not parse date"))
+                continue
+            try:
+                purchases, sales = parse_daily_rows(wb[sheet_name].iter_rows(values_only=True))
+                results.append((sheet_name, date_str, purchases, sales, None))
+            except Exception as e:
+                results.append((sheet_name, date_str, [], [], str(e)))
+    finally:
+        wb.close()
+    return results
+
+
+def build_tasks(filenames, workers):
+    """One task per file, or per chunk of sheets when there are fewer files than workers."""
+    if len(filenames) >= workers:
+        return [(f, None) for f in filenames]
+    per_file = max(1, workers // len(filenames))
+    tasks = []
+    for filename in filenames:
+        names = list_daily_sheets(filename)
+        size = max(1, math.ceil(len(names) / per_file))
+        tasks.extend((filename, names[i:i + size]) for i in range(0, len(names), size))
+    return tasks
+
+
+def parse_workbooks(filenames, max_workers=None):
+    """Parse every daily sheet of the given workbooks, in a process pool when there is more than one task.
+
+    Returns (sheet_name, date_str, purchases, sales, error) tuples in file/sheet order.
+    """
+    workers = max_workers or os.cpu_count() or 1
+    tasks = build_tasks(list(filenames), workers) if workers > 1 else [(f, None) for f in filenames]
+    if len(tasks) <= 1:
+        chunks = [parse_workbook_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            chunks = list(pool.map(parse_workbook_task, tasks))
+    return [result for chunk in chunks for result in chunk]
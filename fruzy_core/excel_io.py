@@ -0,0 +1,57 @@
+# fruzy_core/excel_io.py - Excel import into / export from a Ledger (openpyxl is loaded on first use)
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+HEADER_COLOR = '#27ae60'
+
+
+def import_workbooks(ledger, filenames, max_workers=None):
+    """Parse exported monthly workbooks and merge their days into the ledger (saved once).
+
+    Returns (imported dates, ["Sheet 'x': error"]).
+    """
+    from . import excel_import
+    return ledger.merge_imported_days(excel_import.parse_workbooks(filenames, max_workers))
+
+
+def export_month(ledger, year, month, out_dir='', header_color=HEADER_COLOR):
+    """Write '<Month>_<Year>.xlsx' for one month; returns (filename, days written)."""
+    from . import excel_export
+    filename = os.path.join(out_dir, excel_export.month_filename(year, month))
+    days = excel_export.write_month_workbook(filename, year, month, ledger.all_purchases, ledger.all_sales,
+                                             ledger.vegetables, header_color)
+    return filename, days
+
+
+def month_export_tasks(out_dir, start, end, purchases, sales, vegetables, header_color=HEADER_COLOR):
+    """excel_export.export_month_task arguments for every month of start..end that has data."""
+    from . import excel_export
+    tasks = []
+    for year, month in excel_export.months_in_range(start, end):
+        prefix = f"{year:04d}-{month:02d}-"
+        month_purchases = {d: v for d, v in purchases.items() if d.startswith(prefix)}
+        month_sales = {d: v for d, v in sales.items() if d.startswith(prefix)}
+        if any(month_purchases.values()) or any(month_sales.values()):
+            tasks.append((out_dir, year, month, start, end, month_purchases, month_sales, vegetables, header_color))
+    return tasks
+
+
+def export_range(ledger, start, end, out_dir, single_workbook=False, header_color=HEADER_COLOR, max_workers=None):
+    """Export start..end as one workbook per month (in a process pool) or one consolidated file.
+
+    Returns [(filename, days written)], oldest month first.
+    """
+    from . import excel_export
+    purchases, sales = ledger.snapshot(start, end)
+    vegetables = [dict(v) for v in ledger.vegetables]
+    if single_workbook:
+        filename = os.path.join(out_dir, f"Fruzy_{start}_to_{end}.xlsx")
+        return [(filename, excel_export.write_range_workbook(filename, start, end, purchases, sales,
+                                                             vegetables, header_color))]
+    tasks = month_export_tasks(out_dir, start, end, purchases, sales, vegetables, header_color)
+    workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    # Tasks are in month order and map() keeps it
+    if workers <= 1:
+        return [excel_export.export_month_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(excel_export.export_month_task, tasks))
@@ -0,0 +1,159 @@
+# fruzy_core/import_manifest.py - Persistent record of imported invoice files (content hash + size/mtime)
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = 'import_manifest.json'
+
+# classify() outcomes
+NEW = 'new'
+UNCHANGED = 'unchanged'
+DUPLICATE = 'duplicate'
+CHANGED = 'changed'
+
+
+def hash_file(path, chunk_size=1 << 16):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stat(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class ImportManifest:
+    """Tracks every invoice file already ingested so bulk re-imports can skip it without opening it.
+
+    Entries are keyed by absolute path and hold the file's sha256, size, mtime and the
+    invoice number it produced; a reverse index by hash catches copies under new names.
+    """
+
+    def __init__(self, data_dir):
+        self.path = os.path.join(data_dir, MANIFEST_FILE)
+        self.entries = {}
+        self.by_hash = {}
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"Error loading import manifest: {e}")
+                self.entries = {}
+        self.by_hash = {entry['sha256']: path for path, entry in self.entries.items() if entry.get('sha256')}
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Error saving import manifest: {e}")
+
+    def classify(self, path):
+        """Return (outcome, info) for a candidate file.
+
+        UNCHANGED: known path with the same size/mtime (never opened) or the same hash.
+        DUPLICATE: same content already imported from another path.
+        CHANGED: known path whose content differs; it needs a human to review it.
+        NEW: never seen before.
+        info is {'sha256', 'size', 'mtime'} plus the matching manifest entry, if any.
+        """
+        path = os.path.abspath(path)
+        size, mtime = file_stat(path)
+        entry = self.entries.get(path)
+        if entry and entry.get('size') == size and entry.get('mtime') == mtime and not entry.get('needs_review'):
+            return UNCHANGED, {'sha256': entry.get('sha256'), 'size': size, 'mtime': mtime, 'entry': entry}
+        sha = hash_file(path)
+        info = {'sha256': sha, 'size': size, 'mtime': mtime, 'entry': entry}
+        if entry and entry.get('sha256') == sha:
+            return UNCHANGED, info
+        if entry:
+            return CHANGED, info
+        other = self.by_hash.get(sha)
+        if other:
+            info['entry'] = self.entries.get(other)
+            return DUPLICATE, info
+        return NEW, info
+
+    def record(self, path, info, invoice_number=None, needs_review=False):
+        path = os.path.abspath(path)
+        previous = self.entries.get(path) or {}
+        if previous.get('sha256') and self.by_hash.get(previous['sha256']) == path:
+            del self.by_hash[previous['sha256']]
+        entry = {
+            'sha256': info['sha256'] if not needs_review else previous.get('sha256', info['sha256']),
+            'size': info['size'] if not needs_review else previous.get('size'),
+            'mtime': info['mtime'] if not needs_review else previous.get('mtime'),
+            'invoice_number': invoice_number if invoice_number is not None else previous.get('invoice_number'),
+        }
+        if needs_review:
+            entry['needs_review'] = True
+            entry['changed_sha256'] = info['sha256']
+        self.entries[path] = entry
+        if entry['sha256']:
+            self.by_hash[entry['sha256']] = path
+
+    def invoice_number_for(self, path):
+        """Invoice number previously recorded for this file (by path, then by content)."""
+        path = os.path.abspath(path)
+        entry = self.entries.get(path)
+        if entry and entry.get('invoice_number') is not None:
+            return entry['invoice_number']
+        try:
+            other = self.by_hash.get(hash_file(path))
+        except OSError:
+            return None
+        if other:
+            return self.entries[other].get('invoice_number')
+        return None
+
+
+def plan_imports(manifest, filenames):
+    """Sort candidate files by classify() without opening any workbook.
+
+    Returns {'new': [files to parse], 'info': {file: info}, 'skipped': [(file, info)],
+    'review': [(file, info)]}. Files that cannot be stat'ed are parsed anyway so the
+    parser reports the problem.
+    """
+    plan = {'new': [], 'info': {}, 'skipped': [], 'review': []}
+    for filename in filenames:
+        try:
+            outcome, info = manifest.classify(filename)
+        except OSError:
+            plan['new'].append(filename)
+            continue
+        if outcome == NEW:
+            plan['info'][filename] = info
+            plan['new'].append(filename)
+        elif outcome == CHANGED:
+            plan['review'].append((filename, info))
+        else:
+            plan['skipped'].append((filename, info))
+    return plan
+
+
+def record_imports(manifest, plan, results, imported, rejected):
+    """Remember every planned file that is now accounted for in the ledger, then save.
+
+    `results` are (filename, parsed) pairs, `imported` the new invoice records and
+    `rejected` (filename, reason) pairs from committing them.
+    """
+    imported_numbers = {inv['filepath']: inv['invoice_number'] for inv in imported}
+    rejected_files = {f for f, reason in rejected if reason != "Invoice already exists"}
+    for filename, parsed in results:
+        info = plan['info'].get(filename)
+        if info and filename not in rejected_files:
+            manifest.record(filename, info, imported_numbers.get(filename, parsed.get('invoice_number')))
+    for filename, info in plan['skipped']:
+        manifest.record(filename, info)
+    for filename, info in plan['review']:
+        manifest.record(filename, info, needs_review=True)
+    manifest.save()
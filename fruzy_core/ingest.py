@@ -0,0 +1,264 @@
+# fruzy_core/ingest.py - Localhost HTTP endpoint that queues posted web invoices (no UI)
+import itertools
+import json
+import math
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .web_invoice import TIME_FORMAT, parse_display_item, pk_now
+
+DEFAULT_PORT = 8765
+MAX_BODY = 1 << 20          # bytes per POST
+RESULT_HISTORY = 1000       # outcomes kept for GET /invoices/<ticket>
+SIZES = ('Small', 'Normal', 'Large')
+
+
+def _number(value, what, english):
+    """A finite float from a JSON number or numeric string; bools and nan/inf are refused."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"item {english!r}: {what} must be a number")
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"item {english!r}: {what} must be a number") from None
+    if not math.isfinite(number):
+        raise ValueError(f"item {english!r}: {what} must be a finite number")
+    return number
+
+
+def _item_from_json(item):
+    if not isinstance(item, dict):
+        raise ValueError("each item must be a JSON object")
+    name = item.get('vegetable') or item.get('item')
+    if not name:
+        raise ValueError("item without 'vegetable'")
+    if not isinstance(name, str) or not isinstance(item.get('urdu', ''), str):
+        raise ValueError("'vegetable' and 'urdu' must be strings")
+    english, urdu, size = parse_display_item(name)
+    size = str(item.get('size') or size).capitalize()
+    if size not in SIZES:
+        raise ValueError(f"size must be one of {', '.join(SIZES)}")
+    quantity = item.get('quantity')
+    if isinstance(quantity, (int, float)) and not isinstance(quantity, bool):
+        quantity = f"{quantity} kg"
+    if not isinstance(quantity, str) or not quantity.split():
+        raise ValueError(f"item {english!r}: quantity must be a number or text like '2 kg'")
+    qty = _number(quantity.split()[0], 'quantity', english)
+    if qty <= 0:
+        raise ValueError(f"item {english!r}: quantity must be more than 0")
+    if 'rate' not in item:
+        raise ValueError(f"item {english!r} has no rate")
+    rate = _number(item['rate'], 'rate', english)
+    if rate < 0:
+        raise ValueError(f"item {english!r}: rate cannot be negative")
+    total = round(qty * rate, 2)
+    # A client total is only a cross-check; what is stored is always quantity x rate
+    if item.get('total') not in (None, '') and abs(_number(item['total'], 'total', english) - total) > 0.005:
+        raise ValueError(f"item {english!r}: total must be quantity x rate ({total:.2f})")
+    return {
+        'vegetable': english,
+        'urdu': item.get('urdu') or urdu,
+        'size': size,
+        'quantity': quantity,
+        'rate': rate,
+        'total': total
+    }
+
+
+def invoice_from_json(data):
+    """Check one posted invoice and return it in the shape parse_web_invoice produces.
+
+    Accepted fields: invoice_number (optional), date ('YYYY-MM-DD'), time
+    ('09-Jan-2026 02:30 PM'), customer_name, customer_phone and items, each with
+    vegetable (plain or display name), urdu, size, quantity (> 0), rate (>= 0) and an
+    optional total, which must equal quantity x rate; the total stored is always
+    recomputed. Raises ValueError describing the first problem.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("an invoice must be a JSON object")
+    number = data.get('invoice_number')
+    if number not in (None, ''):
+        try:
+            number = int(str(number).lstrip('#'))
+        except ValueError:
+            raise ValueError("invoice_number must be a number") from None
+    else:
+        number = None
+    date = data.get('date') or None
+    time = data.get('time') or None
+    try:
+        if date:
+            datetime.strptime(date, "%Y-%m-%d")
+        if time:
+            parsed_time = datetime.strptime(time, TIME_FORMAT)
+            date = date or parsed_time.strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise ValueError(f"date must be YYYY-MM-DD and time like {datetime(2026, 1, 9, 14, 30).strftime(TIME_FORMAT)!r}") from None
+    if number is not None and not (date or time) and len(str(number)) == 14:
+        # Timestamp numbers carry the invoice's own PKT time, as in the B2 cell
+        try:
+            stamped = datetime.strptime(str(number), "%Y%m%d%H%M%S")
+            date, time = stamped.strftime("%Y-%m-%d"), stamped.strftime(TIME_FORMAT)
+        except ValueError:
+            pass
+    if not all(isinstance(data.get(field) or '', str) for field in ('customer_name', 'customer_phone')):
+        raise ValueError("customer_name and customer_phone must be strings")
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        raise ValueError("No items found")
+    return {
+        'invoice_number': number,
+        'date': date,
+        'time': time,
+        'customer_name': str(data.get('customer_name') or ''),
+        'customer_phone': str(data.get('customer_phone') or ''),
+        'items': [_item_from_json(item) for item in items],
+        'filepath': ''
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'FruzyInvoiceIngest/1'
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self):
+        token = self.server.ingest.token
+        if token and self.headers.get('X-Fruzy-Token') != token:
+            self._send(401, {'error': "missing or wrong X-Fruzy-Token"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        ingest = self.server.ingest
+        if self.path == '/health':
+            self._send(200, {'ok': True, 'pending': ingest.queue.qsize()})
+        elif self.path.startswith('/invoices/'):
+            result = ingest.result(self.path[len('/invoices/'):])
+            self._send(200 if result else 404, result or {'error': "unknown ticket"})
+        else:
+            self._send(404, {'error': "not found"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self.path != '/invoices':
+            self._send(404, {'error': "not found"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length <= 0 or length > MAX_BODY:
+            self._send(413 if length > MAX_BODY else 411, {'error': f"send a JSON body of at most {MAX_BODY} bytes"})
+            return
+        try:
+            data = json.loads(self.rfile.read(length).decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            self._send(400, {'error': f"invalid JSON: {e}"})
+            return
+        if isinstance(data, dict) and 'invoices' in data:
+            data = data['invoices']
+        posted = data if isinstance(data, list) else [data]
+        invoices = []
+        for index, invoice in enumerate(posted):
+            try:
+                invoices.append(invoice_from_json(invoice))
+            except ValueError as e:
+                # All or nothing, so a client can simply fix and resend the batch
+                self._send(400, {'error': str(e), 'index': index})
+                return
+        self._send(202, {'queued': self.server.ingest.submit(invoices)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class InvoiceIngestServer:
+    """POST /invoices on localhost queues invoices for the app; nothing here touches the ledger.
+
+    The Tk thread drains the queue on a timer, commits each batch and reports every
+    invoice's outcome, which clients read back from GET /invoices/<ticket>.
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, token=None):
+        self.token = token
+        self.queue = queue.Queue()
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._tickets = itertools.count(1)
+        self._last_number = 0
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.ingest = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='invoice-ingest', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.httpd.server_close()
+
+    def submit(self, invoices):
+        """Queue validated invoices; returns their tickets. Called on the HTTP threads."""
+        tickets = []
+        with self._lock:
+            for invoice in invoices:
+                if invoice['invoice_number'] is None:
+                    # Same PKT timestamp numbering as invoices made in the app, kept unique here
+                    number = max(int(pk_now().strftime("%Y%m%d%H%M%S")), self._last_number + 1)
+                    invoice['invoice_number'] = self._last_number = number
+                ticket = str(next(self._tickets))
+                self._remember(ticket, {'ticket': ticket, 'status': 'queued',
+                                        'invoice_number': invoice['invoice_number']})
+                tickets.append(ticket)
+        for ticket, invoice in zip(tickets, invoices):
+            self.queue.put((ticket, invoice))
+        return tickets
+
+    def drain(self):
+        """Everything queued so far, as [(ticket, invoice)]. Called on the Tk thread."""
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def report(self, ticket, status, **details):
+        with self._lock:
+            self._remember(ticket, {**self._results.get(ticket, {'ticket': ticket}), 'status': status, **details})
+
+    def result(self, ticket):
+        with self._lock:
+            return dict(self._results[ticket]) if ticket in self._results else None
+
+    def _remember(self, ticket, result):
+        self._results[ticket] = result
+        self._results.move_to_end(ticket)
+        while len(self._results) > RESULT_HISTORY:
+            self._results.popitem(last=False)
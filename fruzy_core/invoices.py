@@ -0,0 +1,166 @@
+# fruzy_core/invoices.py - Invoice storage, per-date lookup and the sales ledger lines an invoice produces
+import json
+import os
+from datetime import datetime
+
+from .records import new_record_id
+from .web_invoice import TIME_FORMAT, sale_display_name
+
+INVOICES_FILE = 'invoices.json'
+COUNTER_FILE = 'invoice_counter.json'
+
+
+def load_invoices(data_dir):
+    path = os.path.join(data_dir, INVOICES_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return []
+
+
+def save_invoices(data_dir, invoices):
+    """Write invoices.json via a temp file; returns True on success."""
+    path = os.path.join(data_dir, INVOICES_FILE)
+    try:
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(invoices, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+        return True
+    except Exception as e:
+        print(f"Error saving invoices: {e}")
+        return False
+
+
+def load_invoice_counter(data_dir):
+    path = os.path.join(data_dir, COUNTER_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f).get('last_invoice', 0)
+        except (OSError, ValueError, AttributeError):
+            pass
+    return 0
+
+
+def save_invoice_counter(data_dir, counter):
+    """Returns True on success."""
+    path = os.path.join(data_dir, COUNTER_FILE)
+    try:
+        with open(path, 'w') as f:
+            json.dump({'last_invoice': counter}, f)
+        return True
+    except Exception as e:
+        print(f"Error saving invoice counter: {e}")
+        return False
+
+
+def invoice_date(invoice):
+    """'YYYY-MM-DD' of an invoice record; older records only carry 'time' ('01-Jan-2026 12:00 PM')."""
+    date = invoice.get('date', '')
+    if not date and invoice.get('time'):
+        try:
+            date = datetime.strptime(invoice['time'].split()[0], "%d-%b-%Y").strftime("%Y-%m-%d")
+        except (ValueError, IndexError):
+            return ''
+    return date
+
+
+class InvoiceDateIndex:
+    """Invoices grouped by date, newest first, so a day's list costs O(invoices that day).
+
+    The grouping is rebuilt only when the invoices list is replaced or changes length;
+    callers that swap a record in place (editing an invoice) call invalidate().
+    Deleted invoices are filtered at lookup time since their status changes in place.
+    """
+
+    def __init__(self):
+        self._source = None
+        self._length = -1
+        self._by_date = {}
+
+    def invalidate(self):
+        self._source = None
+
+    def _refresh(self, invoices):
+        if invoices is self._source and len(invoices) == self._length:
+            return
+        by_date = {}
+        for invoice in reversed(invoices):
+            by_date.setdefault(invoice_date(invoice), []).append(invoice)
+        self._by_date = by_date
+        self._source = invoices
+        self._length = len(invoices)
+
+    def for_date(self, invoices, date):
+        """Active invoices dated `date`, newest first."""
+        self._refresh(invoices)
+        return [inv for inv in self._by_date.get(date, []) if inv.get('status') != 'deleted']
+
+
+def search_invoices(invoices, text):
+    """Active invoices whose number or customer name contains `text`, newest first."""
+    needle = text.strip().lstrip('#').casefold()
+    return [inv for inv in reversed(invoices)
+            if inv.get('status') != 'deleted'
+            and (needle in str(inv.get('invoice_number', '')) or needle in str(inv.get('customer_name') or '').casefold())]
+
+
+def invoice_sales(invoice):
+    """Sales ledger records for each item of an invoice, tagged with its number."""
+    invoice_num = invoice['invoice_number']
+    sales = []
+    for item in invoice.get('items', []):
+        display = sale_display_name(item['vegetable'], item.get('urdu', ''), item.get('size', 'Normal'))
+        sales.append({
+            'id': new_record_id(),
+            'source': f"Invoice #{invoice_num}",
+            'vegetable': display,
+            'vegetable_display': display,
+            'vegetable_english': item['vegetable'],
+            'vegetable_urdu': item.get('urdu', ''),
+            'quantity': item['quantity'],
+            'rate': f"{float(item['rate']):.2f}",
+            'total': f"{float(item['total']):.2f}",
+            'invoice_number': invoice_num
+        })
+    return sales
+
+
+def accept_web_invoices(parsed_invoices, invoices, counter, default_date):
+    """Validate and dedupe parsed web invoices against the stored ones.
+
+    Returns (new invoice records, [(filepath, reason)] for rejected ones, new counter value).
+    Legacy files without a timestamp ID are numbered from the counter.
+    """
+    known_numbers = {inv.get('invoice_number') for inv in invoices}
+    accepted = []
+    rejected = []
+    for parsed in parsed_invoices:
+        invoice_items = parsed.get('items') or []
+        invoice_number = parsed.get('invoice_number')
+        if not invoice_items:
+            rejected.append((parsed.get('filepath', ''), "No items found"))
+            continue
+        if invoice_number and invoice_number in known_numbers:
+            rejected.append((parsed.get('filepath', ''), "Invoice already exists"))
+            continue
+        if not invoice_number:
+            counter += 1
+            invoice_number = counter
+        known_numbers.add(invoice_number)
+        accepted.append({
+            'invoice_number': invoice_number,
+            'customer_name': parsed.get('customer_name', ''),
+            'customer_phone': parsed.get('customer_phone', ''),
+            'items': invoice_items,
+            'total_amount': sum(item['total'] for item in invoice_items),
+            'date': parsed.get('date') or default_date,
+            'time': parsed.get('time') or datetime.now().strftime(TIME_FORMAT),
+            'status': 'active',
+            'filepath': parsed.get('filepath', '')
+        })
+    return accepted, rejected, counter
@@ -0,0 +1,554 @@
+# fruzy_core/ledger.py - Purchases, sales and invoices of one data directory (no UI)
+import contextlib
+import json
+import os
+import shutil
+
+from .catalog import load_vegetables, save_vegetables
+from .datalock import DataDirLock, DataDirLocked
+from .events import (RECORD_EVENTS, CatalogChanged, DayReplaced, EventBus, InvoiceAdded, InvoiceRemoved,
+                     InvoicesReplaced, InvoiceUpdated)
+from .invoices import (accept_web_invoices, invoice_date, invoice_sales, load_invoice_counter, load_invoices,
+                       save_invoice_counter, save_invoices)
+from .records import item_names, make_purchase, make_sale, new_record_id, normalize_transactions
+from .versions import VERSIONS_FILE, fingerprints, load_versions, merge_records, save_versions
+
+KINDS = ('purchases', 'sales')
+LEDGER_FILES = {'purchases': 'purchases_by_date.json', 'sales': 'sales_by_date.json'}
+# Whole-list stores: (load, save, merge key). Vegetables key on id and name so two
+# windows adding an item at once (both picking the next id) keep both.
+LIST_STORES = {
+    'vegetables': (load_vegetables, save_vegetables, lambda veg: (veg.get('id'), veg.get('english'))),
+    'invoices': (load_invoices, save_invoices, lambda inv: inv.get('invoice_number')),
+}
+STORES = KINDS + tuple(LIST_STORES) + ('invoice_counter',)
+
+
+def _record_key(record):
+    return record.get('id')
+
+
+def _day_base(stored, records):
+    """Merge base of one day read from disk, given the stored and the normalized records.
+
+    Fingerprints are taken after normalizing, so normalizing alone is not a local edit.
+    A day with records stored without ids keeps the stored fingerprints instead: the
+    ids given out here then count as changes and get written.
+    """
+    if all(r.get('id') for r in stored):
+        return fingerprints(records, _record_key)
+    return fingerprints(stored, _record_key)
+
+
+def load_by_date(path):
+    """{date: [records]} from a ledger file, or {} when it is missing or unreadable."""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading {os.path.basename(path)}: {e}")
+    return {}
+
+
+def save_by_date(path, by_date):
+    """Write a ledger file via a verified temp file; the previous file is kept as .backup.
+
+    Returns True on success. On failure the backup is restored if the file went missing.
+    """
+    backup_path = path + '.backup'
+    try:
+        if os.path.exists(path):
+            shutil.copy2(path, backup_path)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(by_date, f, ensure_ascii=False, indent=2)
+        with open(temp_path, 'r', encoding='utf-8') as f:
+            json.load(f)
+        os.replace(temp_path, path)
+        return True
+    except Exception as e:
+        print(f"✗ Error saving {os.path.basename(path)}: {e}")
+        try:
+            if os.path.exists(backup_path) and not os.path.exists(path):
+                shutil.copy2(backup_path, path)
+                print("Restored from backup")
+        except OSError:
+            pass
+        return False
+
+
+class Ledger:
+    """Everything Fruzy keeps in a data directory: the catalog, purchases and sales by
+    date, invoices and the invoice counter.
+
+    Records are plain dicts, exactly as stored in the JSON files. The Tk app and any
+    script work on the same object; nothing here touches the UI.
+
+    Several ledgers (app windows on different counters, batch runs) may share one data
+    directory. Saves happen under the directory's DataDirLock and only write what changed
+    here; versions.json carries a version per date (and per invoice/catalog file), and
+    when another process moved one of them since we read it, its records are merged in
+    by id before writing (see _sync_days). refresh() pulls such changes in between saves.
+
+    Every change made through these methods, or pulled from disk, is published on
+    `events` (see fruzy_core.events) so views can apply deltas instead of reloading.
+    Code that edits a record dict in place reports it with mark_updated().
+    """
+
+    # Seconds a save waits for another process to finish writing
+    LOCK_TIMEOUT = 5
+
+    def __init__(self, data_dir, owner='Fruzy'):
+        self.data_dir = data_dir
+        self.invoices_dir = os.path.join(data_dir, 'Customer_Invoices')
+        self.vegetables = []
+        self.all_purchases = {}
+        self.all_sales = {}
+        self.invoices = []
+        self.invoice_counter = 0
+        # kind -> (list, length, {record id: position}) for the last day looked up, see position()
+        self._position_cache = {}
+        self.lock = DataDirLock(data_dir, owner)
+        # Versions and record fingerprints as last read from or written to disk, per store
+        self._versions = {}
+        self._base = {}
+        self._versions_stamp = None
+        self.events = EventBus()
+        # Stores whose last save failed (e.g. the folder stayed locked); see flush()
+        self.unsaved = set()
+
+    @classmethod
+    def open(cls, data_dir, owner='Fruzy'):
+        ledger = cls(data_dir, owner)
+        ledger.load()
+        return ledger
+
+    # ---- persistence ----
+    def path(self, kind):
+        return os.path.join(self.data_dir, LEDGER_FILES[kind])
+
+    def load(self):
+        os.makedirs(self.invoices_dir, exist_ok=True)
+        try:
+            self.lock.acquire(self.LOCK_TIMEOUT)
+        except DataDirLocked as e:
+            print(f"⚠️ {e} Loading anyway.")
+        try:
+            self._versions = load_versions(self.data_dir)
+            self._versions_stamp = self._stamp()
+            self.vegetables = load_vegetables(self.data_dir)
+            self.invoices = load_invoices(self.data_dir)
+            self.invoice_counter = load_invoice_counter(self.data_dir)
+            self._base = {store: fingerprints(getattr(self, store), key)
+                          for store, (_, _, key) in LIST_STORES.items()}
+            missing_ids = []
+            for kind in KINDS:
+                by_date = load_by_date(self.path(kind))
+                normalized = {date: normalize_transactions(records, self.vegetables, 'kg')
+                              for date, records in by_date.items()}
+                self._base[kind] = {date: _day_base(by_date[date], records) for date, records in normalized.items()}
+                setattr(self, f'all_{kind}', normalized)
+                if any(not r.get('id') for records in by_date.values() for r in records):
+                    missing_ids.append(kind)
+            if missing_ids and self.lock.held:
+                # Ids are the merge key, so every process must see the same ones: write them now
+                self._save(*missing_ids)
+        finally:
+            self.lock.release()
+        self._position_cache = {}
+
+    def _stamp(self):
+        try:
+            st = os.stat(os.path.join(self.data_dir, VERSIONS_FILE))
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Hold the data directory lock (nests), first pulling in anything saved elsewhere.
+
+        If another process keeps it past LOCK_TIMEOUT the body runs unlocked; saves
+        inside still merge, they just may have to wait for the next save.
+        """
+        try:
+            self.lock.acquire(self.LOCK_TIMEOUT)
+        except DataDirLocked as e:
+            print(f"⚠️ {e} Continuing without the lock.")
+            yield False
+            return
+        try:
+            self.refresh()
+            yield True
+        finally:
+            self.lock.release()
+
+    def save(self, *kinds):
+        """Persist the given ledgers ('purchases', 'sales'; both by default).
+
+        Only dates changed here since they were last read are rewritten and versioned;
+        if another process saved the same date meanwhile, its records are merged in by
+        id first. Returns False when the data folder stayed locked or a write failed;
+        the changes stay pending and go out with the next save.
+        """
+        return self._save(*(kinds or KINDS))
+
+    def save_vegetables(self):
+        return self._save('vegetables')
+
+    def save_invoices(self):
+        return self._save('invoices')
+
+    def save_invoice_counter(self):
+        return self._save('invoice_counter')
+
+    def save_all(self):
+        return self._save(*STORES)
+
+    def flush(self):
+        """Retry the saves that failed; True when nothing is left unsaved."""
+        return not self.unsaved or self._save(*[store for store in STORES if store in self.unsaved])
+
+    def refresh(self):
+        """Pull in records other processes saved since we last looked, without writing.
+
+        Cheap when nothing changed (one stat of versions.json). Returns [(store, date)]
+        pulled, date None for whole-file stores; each is also published as an event.
+        """
+        stamp = self._stamp()
+        if stamp == self._versions_stamp:
+            return []
+        try:
+            self.lock.acquire()
+        except DataDirLocked:
+            return []  # a save is in progress elsewhere; look again next time
+        try:
+            disk_versions = load_versions(self.data_dir)
+            pulled = []
+            for store in STORES:
+                pulled += self._sync(store, disk_versions, write=False)[0]
+            self._versions_stamp = stamp
+        finally:
+            self.lock.release()
+        self._notify(pulled)
+        return pulled
+
+    def _save(self, *stores):
+        try:
+            self.lock.acquire(self.LOCK_TIMEOUT)
+        except DataDirLocked as e:
+            print(f"✗ Not saved yet, kept for the next save: {e}")
+            self.unsaved.update(stores)
+            return False
+        ok = True
+        pulled = []
+        try:
+            disk_versions = load_versions(self.data_dir)
+            before = json.dumps(disk_versions, sort_keys=True)
+            for store in stores:
+                store_pulled, store_ok = self._sync(store, disk_versions, write=True)
+                pulled += store_pulled
+                ok = ok and store_ok
+                if store_ok:
+                    self.unsaved.discard(store)
+                else:
+                    self.unsaved.add(store)
+            if json.dumps(disk_versions, sort_keys=True) != before:
+                save_versions(self.data_dir, disk_versions)
+            # Stores not synced here may have moved too; the next refresh() checks them all
+            self._versions_stamp = None
+        except OSError as e:
+            print(f"✗ Error saving versions: {e}")
+            self.unsaved.update(stores)
+            ok = False
+        finally:
+            self.lock.release()
+        self._notify(pulled)
+        return ok
+
+    def _notify(self, pulled):
+        if pulled:
+            self._position_cache = {}
+        for store, date in pulled:
+            if store in KINDS:
+                self.events.publish(DayReplaced(store, date))
+            elif store == 'invoices':
+                self.events.publish(InvoicesReplaced())
+            else:
+                self.events.publish(CatalogChanged())
+
+    def _sync(self, store, disk_versions, write):
+        """Pull `store` if its version on disk moved, then write it if it changed here.
+
+        Returns ([(store, date)] pulled, False if a write failed). Call with the lock held.
+        """
+        if store in KINDS:
+            return self._sync_days(store, disk_versions, write)
+        if store in LIST_STORES:
+            return self._sync_list(store, disk_versions, write)
+        stored = load_invoice_counter(self.data_dir)
+        if stored > self.invoice_counter:
+            self.invoice_counter = stored
+        elif write and self.invoice_counter > stored:
+            return [], save_invoice_counter(self.data_dir, self.invoice_counter)
+        return [], True
+
+    def _sync_days(self, kind, disk_versions, write):
+        ours = self.by_date(kind)
+        base = self._base.setdefault(kind, {})
+        versions = self._versions.setdefault(kind, {})
+        stored_versions = disk_versions.setdefault(kind, {})
+        moved = [date for date, version in stored_versions.items() if versions.get(date, 0) != version]
+        if write:
+            dirty = {date for date, records in ours.items()
+                     if fingerprints(records, _record_key) != base.get(date, {})}
+        else:
+            dirty = {date for date in moved if fingerprints(ours.get(date, []), _record_key) != base.get(date, {})}
+        pulled = []
+        if moved:
+            stored = load_by_date(self.path(kind))
+            for date in moved:
+                theirs = stored.get(date, [])
+                records = normalize_transactions(theirs, self.vegetables, 'kg')
+                stored_base = _day_base(theirs, records)
+                if date in dirty:
+                    records = merge_records(base.get(date, {}), ours.get(date, []), records, _record_key)
+                ours[date] = records
+                base[date] = stored_base
+                versions[date] = stored_versions[date]
+                pulled.append((kind, date))
+        if not (write and dirty):
+            return pulled, True
+        if not save_by_date(self.path(kind), ours):
+            return pulled, False
+        print(f"✓ {kind.capitalize()} saved successfully ({len(dirty)} of {len(ours)} dates changed)")
+        for date in dirty:
+            stored_versions[date] = versions[date] = stored_versions.get(date, 0) + 1
+            base[date] = fingerprints(ours[date], _record_key)
+        return pulled, True
+
+    def _sync_list(self, store, disk_versions, write):
+        load, save, key = LIST_STORES[store]
+        base = self._base.get(store, {})
+        moved = self._versions.get(store, 0) != disk_versions.get(store, 0)
+        dirty = (write or moved) and fingerprints(getattr(self, store), key) != base
+        pulled = []
+        if moved:
+            theirs = load(self.data_dir)
+            merged = merge_records(base, getattr(self, store), theirs, key) if dirty else theirs
+            setattr(self, store, merged)
+            self._base[store] = fingerprints(theirs, key)
+            self._versions[store] = disk_versions.get(store, 0)
+            pulled.append((store, None))
+        if not (write and dirty):
+            return pulled, True
+        if not save(self.data_dir, getattr(self, store)):
+            return pulled, False
+        disk_versions[store] = self._versions[store] = disk_versions.get(store, 0) + 1
+        self._base[store] = fingerprints(getattr(self, store), key)
+        return pulled, True
+
+    # ---- days ----
+    def by_date(self, kind):
+        return getattr(self, f'all_{kind}')
+
+    def day(self, kind, date):
+        """The live record list for one date (created empty on first use)."""
+        return self.by_date(kind).setdefault(date, [])
+
+    def set_day(self, kind, date, records):
+        self.by_date(kind)[date] = records
+        self.events.publish(DayReplaced(kind, date))
+
+    def dates(self, start=None, end=None):
+        """Dates with any purchases or sales, oldest first, optionally clipped to start..end."""
+        return sorted(d for d in set(self.all_purchases) | set(self.all_sales)
+                      if (self.all_purchases.get(d) or self.all_sales.get(d))
+                      and (not start or d >= start) and (not end or d <= end))
+
+    def snapshot(self, start, end):
+        """Copies of the purchases and sales dated start..end, safe to hand to a worker."""
+        return ({d: list(v) for d, v in self.all_purchases.items() if start <= d <= end},
+                {d: list(v) for d, v in self.all_sales.items() if start <= d <= end})
+
+    # ---- records ----
+    def _publish(self, kind, change, date, records):
+        if records:
+            self.events.publish(RECORD_EVENTS[(kind, change)](date, records))
+
+    def add_records(self, kind, date, records):
+        """Append ready-made records to `date`. Not saved."""
+        records = list(records)
+        self.day(kind, date).extend(records)
+        self._publish(kind, 'added', date, records)
+        return records
+
+    def mark_updated(self, kind, date, records):
+        """Announce records of `date` that were edited in place."""
+        self._publish(kind, 'updated', date, list(records))
+
+    def add_purchase(self, date, vegetable, quantity, rate, vendor='Main Vendor', payment='cash', unit='kg'):
+        """Append a purchase to `date` and return it; raises InvalidRecord for bad input. Not saved."""
+        purchase = make_purchase(self.vegetables, vegetable, quantity, rate, vendor, payment, unit)
+        self.add_records('purchases', date, [purchase])
+        return purchase
+
+    def add_sale(self, date, vegetable, quantity, rate, unit='kg', source='Manual Entry'):
+        """Append a sale to `date` and return it; raises InvalidRecord for bad input. Not saved."""
+        sale = make_sale(self.vegetables, vegetable, quantity, rate, unit, source)
+        self.add_records('sales', date, [sale])
+        return sale
+
+    def position(self, kind, date, record_id):
+        """Position of the record with this id in that day's list, or None.
+
+        The id -> position map is rebuilt only when the list is replaced or changes
+        length, and every hit is checked against the record's id, so a list edited in
+        place can never hand back the wrong row.
+        """
+        records = self.day(kind, date)
+        for _ in range(2):
+            cached = self._position_cache.get(kind)
+            if cached is None or cached[0] is not records or cached[1] != len(records):
+                cached = (records, len(records), {r.get('id'): i for i, r in enumerate(records)})
+                self._position_cache[kind] = cached
+            position = cached[2].get(record_id)
+            if position is None or records[position].get('id') == record_id:
+                return position
+            del self._position_cache[kind]
+        return None
+
+    def find(self, kind, date, record_id):
+        position = self.position(kind, date, record_id)
+        return None if position is None else self.day(kind, date)[position]
+
+    def remove(self, kind, date, record_ids):
+        """Delete the records with these ids from that day; returns how many were removed."""
+        records = self.day(kind, date)
+        positions = set()
+        for record_id in record_ids:
+            position = self.position(kind, date, record_id)
+            if position is not None:
+                positions.add(position)
+        removed = [records[position] for position in sorted(positions)]
+        for position in sorted(positions, reverse=True):
+            del records[position]
+        self._publish(kind, 'removed', date, removed)
+        return len(positions)
+
+    # ---- invoices ----
+    def find_invoice(self, invoice_number):
+        for invoice in self.invoices:
+            if invoice.get('invoice_number') == invoice_number:
+                return invoice
+        return None
+
+    def add_invoice_sales(self, invoice):
+        """Append the sales lines of an invoice to its own date."""
+        self.add_records('sales', invoice['date'], invoice_sales(invoice))
+
+    def _remove_invoice_sales(self, invoice_number, dates):
+        for date in dict.fromkeys(d for d in dates if d in self.all_sales):
+            records = self.all_sales[date]
+            removed = [s for s in records if s.get('invoice_number') == invoice_number]
+            if removed:
+                records[:] = [s for s in records if s.get('invoice_number') != invoice_number]
+                self._publish('sales', 'removed', date, removed)
+
+    def add_invoice(self, invoice):
+        """Append a new invoice record and its sales lines. Not saved."""
+        self.invoices.append(invoice)
+        self.add_invoice_sales(invoice)
+        self.events.publish(InvoiceAdded(invoice))
+
+    def update_invoice(self, invoice, position=None):
+        """Replace the invoice with the same number; its sales lines are rebuilt if its items or date changed.
+
+        `position` is an optional hint (its index in self.invoices) that saves the scan in
+        batch updates. Returns the previous record, or None (and changes nothing) if there
+        is none. Not saved.
+        """
+        number = invoice['invoice_number']
+        if position is None or not (0 <= position < len(self.invoices)) \
+                or self.invoices[position].get('invoice_number') != number:
+            position = next((i for i, inv in enumerate(self.invoices) if inv.get('invoice_number') == number), None)
+            if position is None:
+                return None
+        previous = self.invoices[position]
+        self.invoices[position] = invoice
+        if invoice.get('items') != previous.get('items') or invoice_date(invoice) != invoice_date(previous):
+            self._remove_invoice_sales(invoice['invoice_number'], [invoice_date(previous), invoice_date(invoice)])
+            self.add_records('sales', invoice_date(invoice), invoice_sales(invoice))
+        self.events.publish(InvoiceUpdated(invoice, previous))
+        return previous
+
+    def delete_invoice(self, invoice_number):
+        """Remove an invoice record and its sales lines; returns it, or None. Not saved."""
+        for position, invoice in enumerate(self.invoices):
+            if invoice.get('invoice_number') == invoice_number:
+                break
+        else:
+            return None
+        del self.invoices[position]
+        self._remove_invoice_sales(invoice_number, [invoice_date(invoice)])
+        self.events.publish(InvoiceRemoved(invoice))
+        return invoice
+
+    def commit_web_invoices(self, parsed_invoices, default_date):
+        """Validate, dedupe and append parsed web invoices in one transaction.
+
+        Sales go to each invoice's own date (`default_date` when the file has none), and
+        each store is flushed once however many invoices arrive. Returns (new invoice
+        records, [(filepath, reason)] for rejected ones).
+        """
+        # Dedupe against invoices other windows imported too, not just the ones we had
+        with self.locked():
+            accepted, rejected, counter = accept_web_invoices(
+                parsed_invoices, self.invoices, self.invoice_counter, default_date)
+            if not accepted:
+                return [], rejected
+            for invoice in accepted:
+                self.add_invoice(invoice)
+            self.invoice_counter = counter
+            self._save('sales', 'invoices', 'invoice_counter')
+        return accepted, rejected
+
+    # ---- Excel import ----
+    def merge_imported_days(self, results):
+        """Merge parsed workbook sheets (see excel_import.parse_workbook_task) and save once.
+
+        An imported day replaces that date's purchases and manual sales; invoice sales
+        already on the date are kept. Returns (imported dates, ["Sheet 'x': error"]).
+        """
+        import_errors = [f"Sheet '{name}': {error}" for name, _, _, _, error in results if error]
+        names = {}
+
+        def resolve(veg):
+            if veg not in names:
+                names[veg] = item_names(self.vegetables, veg)
+            return names[veg]
+
+        imported_dates = []
+        for _, date_str, raw_purchases, raw_sales, error in results:
+            if error or not (raw_purchases or raw_sales):
+                continue
+            purchases = []
+            for p in raw_purchases:
+                p = dict(p)
+                purchases.append({'id': new_record_id(), **resolve(p.pop('vegetable')), **p})
+            sales = []
+            for s in raw_sales:
+                s = dict(s)
+                sales.append({'id': new_record_id(), 'source': s.pop('source'),
+                              **resolve(s.pop('vegetable')), **s})
+            self.all_purchases[date_str] = purchases
+            existing_sales = self.all_sales.get(date_str, [])
+            kept = [s for s in existing_sales if 'invoice' in s.get('source', '').lower()]
+            self.all_sales[date_str] = sales + kept
+            imported_dates.append(date_str)
+            self.events.publish(DayReplaced('purchases', date_str))
+            self.events.publish(DayReplaced('sales', date_str))
+        if imported_dates:
+            self.save()
+        return imported_dates, import_errors
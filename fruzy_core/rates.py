@@ -0,0 +1,142 @@
+# fruzy_core/rates.py - Rate list parsing and lookup (no UI, safe to run in workers)
+from .web_invoice import parse_display_item
+
+
+def load_sale_rate_list(filename):
+    """Read the invoice rate list: column A item name, column B rate, optional 'Item' header row."""
+    import openpyxl
+
+    wb = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+    rate_list = {}
+    try:
+        header_found = False
+        for row in wb.active.iter_rows(min_row=1, values_only=True):
+            if not row:
+                continue
+            if not header_found:
+                if row[0] and 'Item' in str(row[0]):
+                    header_found = True
+                    continue
+            if row[0] and len(row) > 1 and row[1]:
+                try:
+                    rate_list[str(row[0]).strip()] = float(row[1])
+                except Exception:
+                    continue
+    finally:
+        wb.close()
+    return rate_list
+
+
+def load_purchase_rates(filename):
+    """Read purchase rates (item name, rate) from the first two columns of a sheet.
+
+    Returns (rates, failed_rows) where failed_rows holds (row number, item, raw rate)
+    for every non-blank row that could not be parsed. A non-numeric first row is
+    treated as a header and not reported.
+    """
+    import pandas as pd
+
+    df = pd.read_excel(filename, usecols=[0, 1], header=None, dtype=str)
+    if df.shape[1] < 2:
+        raise ValueError("Excel file must have at least two columns: Item Name and Rate.")
+
+    df.columns = ['Item', 'Rate']
+    items = df['Item'].str.strip()
+    raw_rates = df['Rate'].str.strip()
+    rates = pd.to_numeric(raw_rates.str.replace(',', '', regex=False), errors='coerce')
+
+    has_item = items.notna() & (items != '')
+    has_rate = raw_rates.notna() & (raw_rates != '')
+    valid = has_item & rates.notna()
+    rate_dict = dict(zip(items[valid], rates[valid].astype(float)))
+
+    failed = df.index[~valid & (has_item | has_rate)]
+    if len(failed) and failed[0] == 0:
+        failed = failed[1:]
+    failed_rows = [(int(i) + 1, items[i] if has_item[i] else '', raw_rates[i] if has_rate[i] else '')
+                   for i in failed]
+    return rate_dict, failed_rows
+
+
+def normalize_item_name(name):
+    return ' '.join(str(name).split()).casefold()
+
+
+class RateTable(dict):
+    """Item name -> rate, plus a normalized-name index built once for lookups.
+
+    Tables are replaced wholesale when a new list is imported, never edited in place,
+    so the index stays in step with the dict contents.
+    """
+
+    def __init__(self, rates=()):
+        super().__init__(rates)
+        self._by_key = {}
+        for name, rate in self.items():
+            self._by_key.setdefault(normalize_item_name(name), rate)
+        for name, rate in self.items():
+            english_name, _, _ = parse_display_item(name)
+            self._by_key.setdefault(normalize_item_name(english_name), rate)
+
+    def lookup(self, name, fuzzy=False):
+        """Rate for a plain or display name ('اردو (English)'); `fuzzy` adds substring matching."""
+        if not self._by_key or not name:
+            return None
+        key = normalize_item_name(name)
+        if key in self._by_key:
+            return self._by_key[key]
+        english_key = normalize_item_name(parse_display_item(name)[0])
+        if english_key in self._by_key:
+            return self._by_key[english_key]
+        if fuzzy:
+            for rate_key, rate in self._by_key.items():
+                if english_key in rate_key or rate_key in english_key:
+                    return rate
+        return None
+
+
+class RateIndex:
+    """The app's single rate structure: the invoice (sale) list and the purchase list."""
+
+    def __init__(self):
+        self.sale = RateTable()
+        self.purchase = RateTable()
+
+    def load(self, kind, rates):
+        table = RateTable(rates)
+        setattr(self, kind, table)
+        return table
+
+    def set_rate(self, kind, name, rate):
+        """Record one edited rate (rebuilds that table so its index stays consistent)."""
+        return self.load(kind, {**getattr(self, kind), name: rate})
+
+    def lookup(self, kind, name, fuzzy=False):
+        return getattr(self, kind).lookup(name, fuzzy=fuzzy)
+
+
+def quantity_value(quantity):
+    """Numeric part of a quantity such as '2.5 kg' or 3."""
+    if isinstance(quantity, (int, float)):
+        return float(quantity)
+    return float(str(quantity).split()[0])
+
+
+def reprice_items(items, rate_list):
+    """Return (items re-priced from rate_list, number of lines whose rate changed)."""
+    if not isinstance(rate_list, RateTable):
+        rate_list = RateTable(rate_list or {})
+    repriced = []
+    changed = 0
+    for item in items:
+        item = dict(item)
+        new_rate = rate_list.lookup(item.get('vegetable', ''), fuzzy=True)
+        if new_rate is not None and abs(new_rate - float(item.get('rate', 0) or 0)) > 1e-6:
+            try:
+                item['total'] = round(quantity_value(item.get('quantity', 0)) * new_rate, 2)
+                item['rate'] = float(new_rate)
+                changed += 1
+            except (ValueError, IndexError):
+                pass
+        repriced.append(item)
+    return repriced, changed
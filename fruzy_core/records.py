@@ -0,0 +1,107 @@
+# fruzy_core/records.py - Purchase and sale records: ids, validation and normalization
+import uuid
+
+from .catalog import lookup_vegetable
+
+
+class InvalidRecord(ValueError):
+    """A purchase or sale was rejected; the message is fit to show the user."""
+
+
+def new_record_id():
+    """Stable id for a purchase or sale record, used as its Treeview iid."""
+    return uuid.uuid4().hex
+
+
+def item_names(vegetables, vegetable):
+    """The vegetable_urdu/_english/_display fields for an item name, resolved against the catalog."""
+    veg_data = lookup_vegetable(vegetables, vegetable) or {'urdu': vegetable, 'english': vegetable}
+    return {
+        'vegetable_urdu': veg_data['urdu'],
+        'vegetable_english': veg_data['english'],
+        'vegetable_display': f"{veg_data['urdu']} ({veg_data['english']})",
+    }
+
+
+def _amounts(vegetable, quantity, rate, unit):
+    """(quantity, rate, total) strings for a new record; raises InvalidRecord.
+
+    `quantity` is a number or a 'value unit' string; a unit in the string wins over `unit`.
+    """
+    if not vegetable or quantity in (None, '') or rate in (None, ''):
+        raise InvalidRecord("Please fill all fields")
+    try:
+        parts = str(quantity).split(maxsplit=1)
+        qty = float(parts[0])
+        rate = float(rate)
+    except (ValueError, IndexError):
+        raise InvalidRecord("Please enter valid numbers") from None
+    if len(parts) > 1:
+        unit = parts[1]
+    if qty <= 0:
+        raise InvalidRecord("Quantity must be greater than 0")
+    if rate < 0:
+        raise InvalidRecord("Rate cannot be negative")
+    return f"{qty:.2f} {unit}", f"{rate:.2f}", f"{qty * rate:.2f}"
+
+
+def make_purchase(vegetables, vegetable, quantity, rate, vendor='Main Vendor', payment='cash', unit='kg'):
+    quantity, rate, total = _amounts(vegetable, quantity, rate, unit)
+    return {
+        'id': new_record_id(),
+        **item_names(vegetables, vegetable),
+        'quantity': quantity,
+        'rate': rate,
+        'total': total,
+        'vendor': vendor,
+        'payment': payment
+    }
+
+
+def make_sale(vegetables, vegetable, quantity, rate, unit='kg', source='Manual Entry'):
+    quantity, rate, total = _amounts(vegetable, quantity, rate, unit)
+    return {
+        'id': new_record_id(),
+        'source': source,
+        **item_names(vegetables, vegetable),
+        'quantity': quantity,
+        'rate': rate,
+        'total': total
+    }
+
+
+def normalize_transactions(transactions, vegetables, default_unit='kg'):
+    """Ensure all transactions have an 'id', 'quantity' as 'value unit' string and proper name fields."""
+    normalized = []
+    for t in transactions:
+        t = t.copy()
+        # Records saved before ids existed get one now; it is persisted on the next save
+        if not t.get('id'):
+            t['id'] = new_record_id()
+        # Ensure quantity is formatted
+        qty = t.get('quantity', '0')
+        if isinstance(qty, (int, float)):
+            t['quantity'] = f"{float(qty):.2f} {default_unit}"
+        elif isinstance(qty, str) and qty.strip() and ' ' not in qty.strip():
+            try:
+                float_val = float(qty.strip())
+                t['quantity'] = f"{float_val:.2f} {default_unit}"
+            except ValueError:
+                t['quantity'] = f"0.00 {default_unit}"
+        elif not qty.strip():
+            t['quantity'] = f"0.00 {default_unit}"
+
+        # Ensure name fields exist
+        if 'vegetable_urdu' not in t or 'vegetable_english' not in t:
+            veg_data = lookup_vegetable(vegetables, t.get('vegetable', ''))
+            if veg_data:
+                t['vegetable_urdu'] = veg_data['urdu']
+                t['vegetable_english'] = veg_data['english']
+            else:
+                t['vegetable_urdu'] = t.get('vegetable', '')
+                t['vegetable_english'] = t.get('vegetable', '')
+
+        # Ensure display name
+        t['vegetable_display'] = f"{t['vegetable_urdu']} ({t['vegetable_english']})"
+        normalized.append(t)
+    return normalized
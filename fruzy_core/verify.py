@@ -0,0 +1,111 @@
+# fruzy_core/verify.py - Consistency checks over the files of a data directory
+import json
+import os
+
+from .aggregation import to_float
+from .invoices import COUNTER_FILE, INVOICES_FILE, invoice_date
+from .ledger import KINDS, LEDGER_FILES
+
+# Differences up to this much between quantity x rate and the stored total are rounding
+TOTAL_TOLERANCE = 0.05
+
+
+def _problem(level, where, message):
+    return {'level': level, 'where': where, 'problem': message}
+
+
+def _read_json(path, problems, expected_type, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        problems.append(_problem('error', os.path.basename(path), f"unreadable: {e}"))
+        return default
+    if not isinstance(data, expected_type):
+        problems.append(_problem('error', os.path.basename(path), f"expected a JSON {expected_type.__name__}"))
+        return default
+    return data
+
+
+def _check_record(kind, date, record, problems):
+    where = f"{kind} {date} {record.get('id') or '(no id)'}"
+    if not record.get('id'):
+        problems.append(_problem('warning', where, "record has no id (one is assigned on next load)"))
+    try:
+        qty = float(str(record.get('quantity', '')).split()[0])
+        rate = float(record.get('rate'))
+        total = float(record.get('total'))
+    except (TypeError, ValueError, IndexError):
+        problems.append(_problem('error', where, "quantity, rate or total is not a number"))
+        return
+    if abs(qty * rate - total) > TOTAL_TOLERANCE:
+        problems.append(_problem('warning', where, f"total {total:.2f} != quantity x rate {qty * rate:.2f}"))
+
+
+def verify_data_dir(data_dir):
+    """Check the raw ledger, invoice and counter files; returns (problems, counts).
+
+    Problems are {'level': 'error'|'warning', 'where', 'problem'} dicts. The files are
+    read as stored, before the normalization a Ledger applies on load.
+    """
+    problems = []
+    counts = {}
+    sales_by_invoice = {}
+    for kind in KINDS:
+        by_date = _read_json(os.path.join(data_dir, LEDGER_FILES[kind]), problems, dict, {})
+        seen = {}
+        records = 0
+        for date, day in by_date.items():
+            if not isinstance(day, list):
+                problems.append(_problem('error', f"{kind} {date}", "day is not a list of records"))
+                continue
+            for record in day:
+                records += 1
+                _check_record(kind, date, record, problems)
+                record_id = record.get('id')
+                if record_id:
+                    if record_id in seen:
+                        problems.append(_problem('error', f"{kind} {date} {record_id}",
+                                                 f"id also used on {seen[record_id]}"))
+                    seen[record_id] = date
+                if kind == 'sales' and record.get('invoice_number') is not None:
+                    dates = sales_by_invoice.setdefault(record['invoice_number'], {})
+                    dates[date] = dates.get(date, 0) + 1
+        counts[kind] = records
+        counts[f'{kind}_dates'] = len(by_date)
+
+    invoices = _read_json(os.path.join(data_dir, INVOICES_FILE), problems, list, [])
+    counter = _read_json(os.path.join(data_dir, COUNTER_FILE), problems, dict, {}).get('last_invoice', 0)
+    counts['invoices'] = len(invoices)
+    numbers = set()
+    for invoice in invoices:
+        number = invoice.get('invoice_number')
+        where = f"invoice #{number}"
+        if number in numbers:
+            problems.append(_problem('error', where, "invoice number used more than once"))
+            continue
+        numbers.add(number)
+        items = invoice.get('items') or []
+        items_total = sum(to_float(item.get('total')) for item in items)
+        if abs(items_total - to_float(invoice.get('total_amount'))) > TOTAL_TOLERANCE:
+            problems.append(_problem('warning', where, f"total_amount {to_float(invoice.get('total_amount')):.2f} "
+                                                       f"!= sum of items {items_total:.2f}"))
+        line_dates = sales_by_invoice.pop(number, {})
+        lines = sum(line_dates.values())
+        if invoice.get('status') == 'deleted':
+            if lines:
+                problems.append(_problem('error', where, f"deleted invoice still has {lines} sales line(s)"))
+        elif lines != len(items):
+            problems.append(_problem('error', where, f"{len(items)} item(s) but {lines} sales line(s)"))
+        elif lines and set(line_dates) != {invoice_date(invoice)}:
+            problems.append(_problem('warning', where, f"sales lines on {', '.join(sorted(line_dates))}, "
+                                                       f"invoice dated {invoice_date(invoice) or 'unknown'}"))
+        # Counter-numbered invoices (not 14-digit timestamps) must stay at or below the counter
+        if isinstance(number, int) and len(str(number)) != 14 and number > counter:
+            problems.append(_problem('warning', where, f"above the invoice counter ({counter})"))
+    for number, line_dates in sales_by_invoice.items():
+        for date, lines in line_dates.items():
+            problems.append(_problem('error', f"sales {date}", f"{lines} line(s) for unknown invoice #{number}"))
+    return problems, counts
@@ -0,0 +1,59 @@
+# fruzy_core/versions.py - Per-date version numbers and record-level merges for shared data folders
+import json
+import os
+
+VERSIONS_FILE = 'versions.json'
+
+
+def load_versions(data_dir):
+    """{'purchases': {date: n}, 'sales': {date: n}, 'invoices': n, 'vegetables': n}; missing means 0."""
+    path = os.path.join(data_dir, VERSIONS_FILE)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                versions = json.load(f)
+            if isinstance(versions, dict):
+                return versions
+        except (OSError, ValueError):
+            pass
+    return {}
+
+
+def save_versions(data_dir, versions):
+    path = os.path.join(data_dir, VERSIONS_FILE)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(versions, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def fingerprint(record):
+    """Cheap change detector for one record dict (only compared within this process)."""
+    try:
+        return hash(tuple(sorted(record.items())))
+    except TypeError:  # nested values, e.g. an invoice's items
+        return hash(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def fingerprints(records, key):
+    return {key(r): fingerprint(r) for r in records}
+
+
+def merge_records(base, ours, theirs, key):
+    """Three-way merge of record lists by key.
+
+    `base` is {key: fingerprint} of the records as last read from or written to disk,
+    `ours` the local list and `theirs` the list now on disk. Records added or edited
+    locally replace or join theirs, records deleted locally are dropped; everything
+    else is taken from disk as is. A record edited on both sides keeps the local edit.
+    """
+    removed = set(base) - {key(r) for r in ours}
+    changed = {key(r): r for r in ours if base.get(key(r)) != fingerprint(r)}
+    merged = []
+    for record in theirs:
+        k = key(record)
+        if k in removed:
+            continue
+        merged.append(changed.pop(k, record))
+    merged.extend(r for r in ours if key(r) in changed)
+    return merged
@@ -0,0 +1,164 @@
+# fruzy_core/web_invoice.py - Parsing of web-generated invoice workbooks (no UI, safe to run in workers)
+import re
+from datetime import datetime
+from functools import lru_cache
+
+TIME_FORMAT = "%d-%b-%Y %I:%M %p"
+ITEM_HEADERS = ['No.', 'Item Name', 'Quantity', 'Rate (PKR)', 'Total (PKR)']
+
+
+def parse_display_item(display_str):
+    """Extract English name, Urdu name, and size from display string like 'اردو (English) (Large)'"""
+    size = 'Normal'
+    raw_item = str(display_str).strip()
+    m_size = re.search(r"\((Small|Normal|Large)\)\s*$", raw_item, flags=re.IGNORECASE)
+    if m_size:
+        size = m_size.group(1).capitalize()
+        raw_item = re.sub(r"\s*\(%s\)\s*$" % re.escape(m_size.group(1)), '', raw_item, flags=re.IGNORECASE).strip()
+    english_name = raw_item
+    urdu_name = ''
+    m2 = re.search(r"\(([^)]+)\)\s*$", raw_item)
+    if m2:
+        english_name = m2.group(1).strip()
+        urdu_name = raw_item[:m2.start()].strip()
+    else:
+        english_name = raw_item.strip()
+    return english_name, urdu_name, size
+
+
+def find_urdu_for_english(vegetables, english_name):
+    """Look up Urdu name from the vegetables catalog"""
+    for v in vegetables:
+        if v.get('english', '').strip().lower() == english_name.lower():
+            return v.get('urdu', '')
+    return ''
+
+
+@lru_cache(maxsize=None)
+def pk_timezone():
+    """Asia/Karachi tzinfo, or None if pytz is not installed (pytz is only imported once)."""
+    try:
+        from pytz import timezone
+    except ImportError:
+        return None  # Fallback to naive datetime if pytz not installed
+    return timezone('Asia/Karachi')
+
+
+def pk_now():
+    return datetime.now(pk_timezone())
+
+
+def _parse_invoice_datetime(b2_value, e2_value):
+    """Invoice number from B2 ('Invoice #YYYYmmddHHMMSS') and PKT time from B2/E2."""
+    pk_tz = pk_timezone()
+
+    invoice_number = None
+    invoice_datetime = None
+    if b2_value and "Invoice #" in str(b2_value):
+        try:
+            num_str = str(b2_value).replace("Invoice #", "").strip()
+            if num_str.isdigit() and len(num_str) == 14:
+                invoice_number = int(num_str)
+                dt_from_num = datetime.strptime(num_str, "%Y%m%d%H%M%S")
+                invoice_datetime = pk_tz.localize(dt_from_num) if pk_tz else dt_from_num
+        except Exception:
+            pass
+
+    # E2 holds the display time, e.g. "09-Jan-2026 02:30 PM"
+    if e2_value:
+        try:
+            parsed_time = datetime.strptime(str(e2_value), TIME_FORMAT)
+            invoice_datetime = pk_tz.localize(parsed_time) if pk_tz else parsed_time
+        except Exception:
+            pass
+    return invoice_number, invoice_datetime
+
+
+def parse_web_invoice(filename, vegetables=()):
+    """Read one web invoice workbook into a plain dict.
+
+    Returns {'invoice_number', 'date', 'time', 'customer_name', 'customer_phone',
+    'items', 'filepath'}; 'invoice_number', 'date' and 'time' are None when the
+    file does not carry them. Raises ValueError for files without items.
+    """
+    import openpyxl
+
+    wb = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+    try:
+        rows = list(wb.active.iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+    def cell(row_idx, col_idx):
+        if row_idx < len(rows) and col_idx < len(rows[row_idx]):
+            return rows[row_idx][col_idx]
+        return None
+
+    invoice_number, invoice_datetime = _parse_invoice_datetime(cell(1, 1), cell(1, 4))
+
+    customer_name = ""
+    customer_phone = ""
+    for row in rows[:10]:
+        if row and len(row) >= 5:
+            if row[1] and "Customer Name:" in str(row[1]):
+                customer_name = str(row[2]) if row[2] else ""
+                customer_phone = str(row[4]) if row[4] else ""
+                break
+        elif row and row[0] and "Customer Name:" in str(row[0]):
+            customer_name = str(row[1]) if len(row) > 1 and row[1] else ""
+            customer_phone = str(row[4]) if len(row) > 4 and row[4] else ""
+            break
+
+    items_start = None
+    for idx, row in enumerate(rows):
+        if row and row[0] and str(row[0]).strip() == 'No.':
+            if len(row) >= 5 and 'Item Name' in str(row[1]) and 'Quantity' in str(row[2]):
+                items_start = idx + 1
+                break
+    if items_start is None:
+        raise ValueError("Items table not found")
+
+    items = []
+    for idx in range(items_start, len(rows)):
+        row = tuple(rows[idx]) + (None,) * 5
+        if not row[0] or "Total Amount:" in str(row[0]):
+            break
+        try:
+            english_name, urdu_name, size = parse_display_item(row[1] or "")
+            if not urdu_name:
+                urdu_name = find_urdu_for_english(vegetables, english_name)
+            items.append({
+                'vegetable': english_name,
+                'urdu': urdu_name,
+                'size': size,
+                'quantity': str(row[2]) if row[2] else "0 kg",
+                'rate': float(row[3]) if row[3] not in (None, "") else 0.0,
+                'total': float(row[4]) if row[4] not in (None, "") else 0.0
+            })
+        except Exception as e:
+            print(f"Skipping invalid row {idx + 1}: {e}")
+    if not items:
+        raise ValueError("No items found")
+
+    return {
+        'invoice_number': invoice_number,
+        'date': invoice_datetime.strftime("%Y-%m-%d") if invoice_datetime else None,
+        'time': invoice_datetime.strftime(TIME_FORMAT) if invoice_datetime else None,
+        'customer_name': customer_name,
+        'customer_phone': customer_phone,
+        'items': items,
+        'filepath': filename
+    }
+
+
+def sale_display_name(english_name, urdu_name, size):
+    """Ledger display name for an invoice line, e.g. 'ٹماٹر بڑا سائز (Tomato big size)'."""
+    if urdu_name and size.lower() != 'normal':
+        urdu_size_map = {'Small': 'چھوٹا سائز', 'Normal': 'درمیانہ سائز', 'Large': 'بڑا سائز'}
+        english_size_map = {'Small': 'small size', 'Large': 'big size'}
+        urdu_display = f"{urdu_name} {urdu_size_map.get(size, '')}"
+        english_display = f"{english_name} {english_size_map.get(size, size)}"
+        return f"{urdu_display} ({english_display})"
+    elif urdu_name:
+        return f"{urdu_name} ({english_name})"
+    return english_name
@@ -0,0 +1,145 @@
+# invoice_draft.py - The invoice being composed on the Customer Invoice tab (no UI)
+from invoice_render import invoice_item_label
+from fruzy_core.rates import quantity_value
+from fruzy_core.records import new_record_id
+from fruzy_core.web_invoice import find_urdu_for_english, parse_display_item
+
+
+class DraftLine:
+    """One typed invoice line; `id` doubles as its row iid in invoice_items_tree.
+
+    Rate and total are kept rounded to paisa, as they were when the tree's display
+    strings were the source of truth.
+    """
+
+    __slots__ = ('id', 'name', 'english', 'urdu', 'size', 'quantity', 'rate', 'total')
+
+    def __init__(self, name, english, urdu, size, quantity, rate, total=None):
+        self.id = new_record_id()
+        self.name = name            # as shown in the Item column, without the size suffix
+        self.english = english
+        self.urdu = urdu
+        self.size = size
+        self.quantity = quantity    # '2.5 kg'
+        if total is None:
+            total = quantity_value(quantity) * float(rate)
+        self.rate = round(float(rate), 2)
+        self.total = round(float(total), 2)
+
+    @classmethod
+    def from_entry(cls, item_text, quantity, rate, size, vegetables=()):
+        """Line from the add-item form: item_text is the combobox text, e.g. 'ٹماٹر (Tomato)'."""
+        english, urdu, _ = parse_display_item(item_text)
+        if not urdu:
+            urdu = find_urdu_for_english(vegetables, english)
+        return cls(item_text, english, urdu, size, quantity, rate)
+
+    @classmethod
+    def from_item(cls, item, vegetables=(), rate=None):
+        """Line from a stored invoice item; `rate` overrides the saved rate and recomputes the total."""
+        english = item.get('vegetable', '')
+        urdu = item.get('urdu', '') or find_urdu_for_english(vegetables, english)
+        line = cls(english, english, urdu, item.get('size', 'Normal'), item.get('quantity', ''),
+                   item.get('rate', 0) if rate is None else rate, item.get('total', 0))
+        if rate is not None:
+            try:
+                line.total = line.line_total()
+            except (ValueError, IndexError):
+                pass
+        return line
+
+    def line_total(self):
+        return round(quantity_value(self.quantity) * self.rate, 2)
+
+    def values(self):
+        """Row values for invoice_items_tree."""
+        return (f"{self.name} ({self.size})", self.quantity, f"{self.rate:.2f}", f"{self.total:.2f}")
+
+    def as_invoice_item(self):
+        """Item dict as stored in invoices.json."""
+        return {
+            'vegetable': self.english,
+            'urdu': self.urdu,
+            'size': self.size,
+            'quantity': self.quantity,
+            'rate': self.rate,
+            'total': self.total
+        }
+
+    def render_line(self):
+        """(label, quantity, rate, total) for invoice_render."""
+        return (invoice_item_label(self.english, self.urdu, self.size), self.quantity,
+                f"{self.rate:.2f}", f"{self.total:.2f}")
+
+
+class InvoiceDraft:
+    """Ordered invoice lines plus a running total.
+
+    Adding, editing or removing a line adjusts the total by that line alone, so the
+    form never re-reads the tree; generating the invoice reads the typed lines directly
+    instead of re-parsing display strings.
+    """
+
+    def __init__(self):
+        self.lines = {}    # line id -> DraftLine, in display order
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines.values())
+
+    def get(self, line_id):
+        return self.lines.get(line_id)
+
+    def add(self, line):
+        self.lines[line.id] = line
+        self.total += line.total
+        return line
+
+    def remove(self, line_ids):
+        removed = []
+        for line_id in line_ids:
+            line = self.lines.pop(line_id, None)
+            if line is not None:
+                self.total -= line.total
+                removed.append(line)
+        if not self.lines:
+            self.total = 0.0  # drop any float residue
+        return removed
+
+    def update(self, line_id, **fields):
+        """Change fields of one line; the total is recomputed unless given explicitly.
+
+        If the new quantity or rate cannot be parsed the line is left as it was.
+        """
+        line = self.lines[line_id]
+        previous = {name: getattr(line, name) for name in line.__slots__}
+        try:
+            for name, value in fields.items():
+                setattr(line, name, round(float(value), 2) if name in ('rate', 'total') else value)
+            if 'total' not in fields:
+                line.total = line.line_total()
+        except (TypeError, ValueError, IndexError):
+            for name, value in previous.items():
+                setattr(line, name, value)
+            raise
+        self.total += line.total - previous['total']
+        return line
+
+    def clear(self):
+        self.lines = {}
+        self.total = 0.0
+
+    def load_items(self, items, vegetables=()):
+        """Replace the draft with a stored invoice's items."""
+        self.clear()
+        for item in items:
+            self.add(DraftLine.from_item(item, vegetables))
+
+    def invoice_items(self):
+        return [line.as_invoice_item() for line in self]
+
+    def render_lines(self):
+        return [line.render_line() for line in self]
@@ -0,0 +1,267 @@
+# invoice_render.py - Customer invoice .xlsx rendering (no UI, safe to run in workers)
+import io
+import os
+import re
+import zipfile
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+ITEM_HEADERS = ['No.', 'Item Name', 'Quantity', 'Rate (PKR)', 'Total (PKR)']
+HEADER_ROW = 6
+COLUMN_WIDTHS = {'A': 8, 'B': 30, 'C': 15, 'D': 15, 'E': 15}
+MONEY_FORMAT = '#,##0.00'
+
+SHEET_PART = 'xl/worksheets/sheet1.xml'
+CORE_PART = 'docProps/core.xml'
+
+_STYLE_CACHE = {}
+_TEMPLATE_CACHE = {}
+
+
+def get_styles(header_color='#27ae60'):
+    """Style objects shared by every invoice rendered with this header colour."""
+    styles = _STYLE_CACHE.get(header_color)
+    if styles is None:
+        from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+        color = header_color.replace('#', '')
+        thin = Side(style='thin')
+        styles = {
+            'title_font': Font(name='Calibri', size=72, bold=True, color='FFFFFF'),
+            'header_fill': PatternFill(start_color=color, end_color=color, fill_type="solid"),
+            'header_font': Font(name='Calibri', size=11, bold=True, color='FFFFFF'),
+            'plain_font': Font(name='Calibri', size=11),
+            'bold_font': Font(name='Calibri', size=11, bold=True),
+            'border': Border(left=thin, right=thin, top=thin, bottom=thin),
+            'center': Alignment(horizontal='center', vertical='center'),
+            'header_align': Alignment(horizontal='center'),
+            'right': Alignment(horizontal='right'),
+            'wrap': Alignment(wrap_text=True),
+        }
+        _STYLE_CACHE[header_color] = styles
+    return styles
+
+
+def invoice_item_label(english_name, urdu_name, size):
+    """Item Name cell text, e.g. 'ٹماٹر بڑا سائز (Tomato big size)'."""
+    urdu_size_map = {'Small': 'چھوٹا سائز', 'Normal': 'درمیانہ سائز', 'Large': 'بڑا سائز'}
+    english_size_map = {'Small': 'small size', 'Large': 'big size'}
+    english_plain = english_name
+    urdu_cell = urdu_name
+    if size.lower() != 'normal':
+        english_plain = f"{english_name} {english_size_map.get(size, size)}"
+        if urdu_name:
+            urdu_cell = f"{urdu_name} {urdu_size_map.get(size, '')}"
+    if urdu_name:
+        return f"{urdu_cell} ({english_plain})"
+    return english_plain
+
+
+def invoice_filename(invoice_number, customer_name):
+    customer_name_clean = ''.join(c for c in customer_name if c.isalnum()) or "Customer"
+    return f"Invoice_{invoice_number}_{customer_name_clean}.xlsx"
+
+
+def _number_or_raw(value):
+    try:
+        return float(value), True
+    except (TypeError, ValueError):
+        return value, False
+
+
+def build_invoice_workbook(invoice, header_color='#27ae60'):
+    """Build the invoice workbook in memory.
+
+    `invoice` is a plain dict: 'invoice_number', 'time', 'customer_name', 'customer_phone'
+    and 'lines' as (item label, quantity, rate, total) tuples.
+    """
+    import openpyxl
+
+    styles = get_styles(header_color)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+
+    ws['A1'] = "FRUZY"
+    ws['A1'].font = styles['title_font']
+    for col in 'ABCDE':
+        ws[f"{col}1"].fill = styles['header_fill']
+    ws.merge_cells('A1:E1')
+    ws['A1'].alignment = styles['center']
+
+    ws['B2'] = f"Invoice #{invoice['invoice_number']}"
+    ws['B2'].font = styles['plain_font']
+    ws['E2'] = invoice['time']
+    ws['E2'].font = styles['plain_font']
+    ws['E2'].alignment = styles['right']
+
+    ws['B4'] = "Customer Name:"
+    ws['B4'].font = styles['plain_font']
+    ws['C4'] = invoice['customer_name']
+    ws['C4'].font = styles['bold_font']
+    ws['E4'] = invoice['customer_phone']
+    ws['E4'].font = styles['bold_font']
+
+    border = styles['border']
+    for col, header in enumerate(ITEM_HEADERS, 1):
+        cell = ws.cell(row=HEADER_ROW, column=col, value=header)
+        cell.fill = styles['header_fill']
+        cell.font = styles['header_font']
+        cell.border = border
+        cell.alignment = styles['header_align']
+
+    row = HEADER_ROW + 1
+    total = 0.0
+    for idx, (label, quantity, rate, line_total) in enumerate(invoice['lines'], 1):
+        ws.cell(row=row, column=1, value=idx).border = border
+        cell = ws.cell(row=row, column=2, value=label)
+        cell.alignment = styles['wrap']
+        cell.border = border
+        ws.cell(row=row, column=3, value=quantity).border = border
+        for column, value in ((4, rate), (5, line_total)):
+            value, numeric = _number_or_raw(value)
+            cell = ws.cell(row=row, column=column, value=value)
+            cell.border = border
+            if numeric:
+                cell.number_format = MONEY_FORMAT
+                if column == 5:
+                    total += value
+        row += 1
+
+    ws.cell(row=row + 1, column=1, value="Total Amount:").font = styles['bold_font']
+    total_cell = ws.cell(row=row + 1, column=5, value=total)
+    total_cell.font = styles['bold_font']
+    total_cell.number_format = MONEY_FORMAT
+
+    for col, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+    return wb
+
+
+class InvoiceTemplate:
+    """Static invoice skeleton built once per header colour; renders fill only the dynamic cells.
+
+    The skeleton is saved once with openpyxl and kept as the package's part bytes.
+    Styles, theme, merged title, column widths and the item header row are reused
+    verbatim; each render writes a new sheetData (invoice number, timestamp,
+    customer and line items) into that package, so no workbook object is built.
+    """
+
+    def __init__(self, header_color='#27ae60'):
+        prototype = {
+            'invoice_number': 0, 'time': 'x', 'customer_name': 'x', 'customer_phone': 'x',
+            'lines': [('x', 'x', 1.0, 1.0), ('x', 'x', 'x', 'x')]
+        }
+        buffer = io.BytesIO()
+        build_invoice_workbook(prototype, header_color).save(buffer)
+        with zipfile.ZipFile(buffer) as package:
+            self.parts = [(info.filename, package.read(info.filename)) for info in package.infolist()]
+        sheet = dict(self.parts)[SHEET_PART].decode('utf-8')
+        self.head, rest = sheet.split('<sheetData>', 1)
+        body, self.tail = rest.split('</sheetData>', 1)
+        rows = {number: xml for xml, number in re.findall(r'(<row r="(\d+)".*?</row>)', body)}
+        self.title_row = rows['1']
+        self.header_row = rows[str(HEADER_ROW)]
+        # Style index of each prototype cell, e.g. {'B2': '2', 'D7': '8', ...}
+        self.style = dict(re.findall(r'<c r="([A-Z]+\d+)" s="(\d+)"', body))
+
+    @staticmethod
+    def _text(ref, style, value):
+        text = escape(str(value))
+        space = ' xml:space="preserve"' if text != text.strip() else ''
+        return f'<c r="{ref}" s="{style}" t="inlineStr"><is><t{space}>{text}</t></is></c>'
+
+    @staticmethod
+    def _number(ref, style, value):
+        return f'<c r="{ref}" s="{style}" t="n"><v>{value!r}</v></c>'
+
+    def _value(self, ref, numeric_style, text_style, value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return self._text(ref, text_style, value)
+        return self._number(ref, numeric_style, value)
+
+    def sheet_xml(self, invoice):
+        style = self.style
+        cells = [
+            self.title_row,
+            '<row r="2">' + self._text('B2', style['B2'], f"Invoice #{invoice['invoice_number']}")
+            + self._text('E2', style['E2'], invoice['time']) + '</row>',
+            '<row r="4">' + self._text('B4', style['B4'], "Customer Name:")
+            + self._text('C4', style['C4'], invoice['customer_name'])
+            + self._text('E4', style['E4'], invoice['customer_phone']) + '</row>',
+            self.header_row,
+        ]
+        row = HEADER_ROW + 1
+        total = 0.0
+        bordered = style['C7']
+        for idx, (label, quantity, rate, line_total) in enumerate(invoice['lines'], 1):
+            parts = [self._number(f'A{row}', style['A7'], idx),
+                     self._text(f'B{row}', style['B7'], label),
+                     self._value(f'C{row}', bordered, bordered, quantity)]
+            for column, value in (('D', rate), ('E', line_total)):
+                value, numeric = _number_or_raw(value)
+                if numeric:
+                    parts.append(self._number(f'{column}{row}', style['D7'], value))
+                    if column == 'E':
+                        total += value
+                else:
+                    parts.append(self._text(f'{column}{row}', bordered, value))
+            cells.append(f'<row r="{row}">' + ''.join(parts) + '</row>')
+            row += 1
+        total_row = row + 1
+        cells.append(f'<row r="{total_row}">' + self._text(f'A{total_row}', style['A10'], "Total Amount:")
+                     + self._number(f'E{total_row}', style['E10'], total) + '</row>')
+        head = re.sub(r'<dimension ref="[^"]*"', f'<dimension ref="A1:E{total_row}"', self.head, count=1)
+        return head + '<sheetData>' + ''.join(cells) + '</sheetData>' + self.tail
+
+    def render(self, invoice):
+        """Return the finished .xlsx as bytes."""
+        stamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as package:
+            for name, data in self.parts:
+                if name == SHEET_PART:
+                    data = self.sheet_xml(invoice).encode('utf-8')
+                elif name == CORE_PART:
+                    data = re.sub(rb'(<dcterms:(?:created|modified)[^>]*>)[^<]*', rb'\g<1>' + stamp.encode(), data)
+                package.writestr(name, data)
+        return buffer.getvalue()
+
+
+def get_template(header_color='#27ae60'):
+    template = _TEMPLATE_CACHE.get(header_color)
+    if template is None:
+        template = _TEMPLATE_CACHE[header_color] = InvoiceTemplate(header_color)
+    return template
+
+
+def render_invoice(path, invoice, header_color='#27ae60'):
+    """Write the invoice to `path` atomically from the cached template and return the path."""
+    data = get_template(header_color).render(invoice)
+    temp_path = path + '.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path
+
+
+def invoice_payload(invoice):
+    """Render payload for a stored invoice record from invoices.json."""
+    return {
+        'invoice_number': invoice['invoice_number'],
+        'time': invoice.get('time', ''),
+        'customer_name': invoice.get('customer_name', ''),
+        'customer_phone': invoice.get('customer_phone', ''),
+        'lines': [(invoice_item_label(item.get('vegetable', ''), item.get('urdu', ''), item.get('size', 'Normal')),
+                   item.get('quantity', ''), item.get('rate', 0), item.get('total', 0))
+                  for item in invoice.get('items', [])]
+    }
+
+
+def render_invoice_task(task):
+    """Process-pool entry point: task is (path, payload, header_color)."""
+    path, payload, header_color = task
+    return render_invoice(path, payload, header_color)
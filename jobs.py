@@ -0,0 +1,262 @@
+# jobs.py - Background jobs with progress reporting and cancellation for the Tk UI
+import os
+import queue
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import customtkinter as ctk
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's work function when the user pressed Cancel."""
+
+
+class ProgressDialog:
+    """Small non-blocking window with a progress bar, status text and a Cancel button."""
+
+    def __init__(self, root, title, on_cancel):
+        self.window = ctk.CTkToplevel(root)
+        self.window.title(f"{title} - Fruzy")
+        self.window.geometry("420x160")
+        self.window.resizable(False, False)
+        self.window.transient(root)
+        self.window.protocol("WM_DELETE_WINDOW", on_cancel)
+
+        ctk.CTkLabel(self.window, text=title, font=('Arial', 14, 'bold')).pack(pady=(15, 5))
+        self.progress_bar = ctk.CTkProgressBar(self.window, width=360)
+        self.progress_bar.set(0)
+        self.progress_bar.pack(pady=5)
+        self.status_label = ctk.CTkLabel(self.window, text="Starting...", font=('Arial', 10))
+        self.status_label.pack(pady=5)
+        self.cancel_button = ctk.CTkButton(self.window, text="Cancel", width=100, command=on_cancel)
+        self.cancel_button.pack(pady=(5, 15))
+
+    def update_progress(self, done, total, message=''):
+        fraction = (done / total) if total else 0
+        self.progress_bar.set(min(max(fraction, 0), 1))
+        text = f"{done}/{total}" if total else str(done)
+        self.status_label.configure(text=f"{text}  {message}".strip())
+
+    def set_cancelling(self):
+        self.status_label.configure(text="Cancelling...")
+        self.cancel_button.configure(state='disabled')
+
+    def close(self):
+        try:
+            self.window.destroy()
+        except Exception:
+            pass
+
+
+class BackgroundJob:
+    """Run `work(job)` on a worker thread and stream its events back to the Tk thread.
+
+    The work function reports with `job.report(done, total, message)` and should call
+    `job.check_cancelled()` between units of work. `on_done(result)`, `on_cancel()` and
+    `on_error(exc)` always run on the Tk thread via `root.after`.
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, root, title, work, on_done=None, on_cancel=None, on_error=None):
+        self.root = root
+        self.title = title
+        self.work = work
+        self.on_done = on_done
+        self.on_cancel = on_cancel
+        self.on_error = on_error
+        self.cancel_event = threading.Event()
+        self.dialog = None
+        self._events = queue.Queue()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        if not self.cancel_event.is_set():
+            self.cancel_event.set()
+            if self.dialog:
+                self.dialog.set_cancelling()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def report(self, done, total, message=''):
+        """Thread-safe progress update; may be called from the worker."""
+        self._events.put(('progress', done, total, message))
+
+    def start(self):
+        self.dialog = ProgressDialog(self.root, self.title, self.cancel)
+        threading.Thread(target=self._run, daemon=True).start()
+        self.root.after(self.POLL_MS, self._poll)
+        return self
+
+    def _run(self):
+        try:
+            result = self.work(self)
+            if self.cancel_event.is_set():
+                self._events.put(('cancelled',))
+            else:
+                self._events.put(('done', result))
+        except JobCancelled:
+            self._events.put(('cancelled',))
+        except Exception as e:
+            traceback.print_exc()
+            self._events.put(('error', e))
+
+    def _poll(self):
+        try:
+            while True:
+                event = self._events.get_nowait()
+                if event[0] == 'progress':
+                    self.dialog.update_progress(*event[1:])
+                    continue
+                self.dialog.close()
+                if event[0] == 'done' and self.on_done:
+                    self.on_done(event[1])
+                elif event[0] == 'cancelled' and self.on_cancel:
+                    self.on_cancel()
+                elif event[0] == 'error' and self.on_error:
+                    self.on_error(event[1])
+                return
+        except queue.Empty:
+            pass
+        self.root.after(self.POLL_MS, self._poll)
+
+
+class BatchJob(BackgroundJob):
+    """Shared runner for batch work (imports, re-renders): process each task off the Tk
+    thread, then commit everything at once.
+
+    `process(task)` runs on the worker thread, or in a process pool when `use_processes`
+    is set (it must then be a picklable module-level function). `tasks` may be a list
+    or a callable returning one, so expensive planning also stays off the Tk thread.
+    When processing finishes, `commit(results, errors)` runs once on the Tk thread with
+    `results` as (task, value) pairs and `errors` as (task, message) pairs. Nothing is
+    committed if the job is cancelled or fails.
+    """
+
+    def __init__(self, root, title, tasks, process, commit, use_processes=False, max_workers=None,
+                 describe=None, on_cancel=None, on_error=None, status="Reading files..."):
+        super().__init__(root, title, self._process_all, on_done=self._commit,
+                         on_cancel=on_cancel, on_error=on_error)
+        self.tasks = tasks
+        self.process = process
+        self.commit = commit
+        self.use_processes = use_processes
+        self.max_workers = max_workers
+        self.describe = describe or self._describe
+        self.status = status
+
+    @staticmethod
+    def _describe(task):
+        name = task[0] if isinstance(task, tuple) else task
+        return os.path.basename(str(name))
+
+    def _process_all(self, job):
+        tasks = self.tasks() if callable(self.tasks) else list(self.tasks)
+        results = []
+        errors = []
+        self.report(0, len(tasks), self.status)
+        if self.use_processes and len(tasks) > 1:
+            workers = max(1, min(len(tasks), self.max_workers or os.cpu_count() or 1))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = {pool.submit(self.process, task): task for task in tasks}
+                while pending:
+                    if self.cancelled:
+                        pool.shutdown(wait=True, cancel_futures=True)
+                        raise JobCancelled()
+                    finished, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        task = pending.pop(future)
+                        try:
+                            results.append((task, future.result()))
+                        except Exception as e:
+                            errors.append((task, str(e)))
+                        self.report(len(results) + len(errors), len(tasks), self.describe(task))
+            order = {id(task): i for i, task in enumerate(tasks)}
+            results.sort(key=lambda pair: order.get(id(pair[0]), 0))
+        else:
+            for task in tasks:
+                self.check_cancelled()
+                try:
+                    results.append((task, self.process(task)))
+                except Exception as e:
+                    traceback.print_exc()
+                    errors.append((task, str(e)))
+                self.report(len(results) + len(errors), len(tasks), self.describe(task))
+        return results, errors
+
+    def _commit(self, outcome):
+        results, errors = outcome
+        self.commit(results, errors)
+
+
+class SerialWorker:
+    """One daemon thread running submitted calls in order, off the Tk thread.
+
+    `submit(fn, *args, on_done=..., on_error=...)` returns immediately; the callbacks
+    run on the Tk thread when that call finishes. Results are polled only while
+    something is pending.
+    """
+
+    POLL_MS = 100
+
+    def __init__(self, root):
+        self.root = root
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._pending = 0
+        self._polling = False
+        self._thread = None
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def submit(self, fn, *args, on_done=None, on_error=None):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._pending += 1
+        self._tasks.put((fn, args, on_done, on_error))
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_MS, self._poll)
+
+    def wait(self, timeout=None):
+        """Block until every submitted call has finished (used on shutdown)."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._tasks.put((None, done, None, None))
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            fn, args, on_done, on_error = self._tasks.get()
+            if fn is None:
+                args.set()  # wait() marker: everything queued before it is done
+                continue
+            try:
+                self._results.put((on_done, fn(*args), None))
+            except Exception as e:
+                traceback.print_exc()
+                self._results.put((on_error, None, e))
+
+    def _poll(self):
+        try:
+            while True:
+                callback, result, error = self._results.get_nowait()
+                self._pending -= 1
+                if callback:
+                    callback(error if error is not None else result)
+        except queue.Empty:
+            pass
+        if self._pending > 0:
+            self.root.after(self.POLL_MS, self._poll)
+        else:
+            self._polling = False
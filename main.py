@@ -1,31 +1,58 @@
 # main.py - Fruzy Business Manager with Calendar and Date-Based Data Persistence
+import time
+STARTUP_TIME = time.perf_counter()  # reference point for --profile-startup
+
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, font as tkfont
-from datetime import datetime, timedelta
+from datetime import datetime
 import calendar as cal_module
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 import os
-import json
 import sys
 import subprocess
-import shutil
-from pathlib import Path
-from PIL import Image, ImageTk
-# Import modular tabs
-from purchase_entry import PurchaseEntryTab
-from sales_entry import SalesEntryTab
-from customer_invoice import CustomerInvoiceTab
-from daily_summary import DailySummaryTab
+import platform
+import importlib
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+# Tab modules and the Excel/PIL-backed engines are imported where first used
+from jobs import BackgroundJob, BatchJob, JobCancelled, SerialWorker
+from fruzy_core import InvalidRecord, Ledger, day_totals, lookup_vegetable, normalize_transactions
+from fruzy_core.events import CatalogChanged, DateChanged, DayReplaced, RecordsEvent
+from fruzy_core.import_manifest import ImportManifest
+from fruzy_core.rates import RateIndex
+from utils import Debouncer, StartupProfiler, load_scaled_image
+
+# Notebook tabs: (name, title) in display order, and where each tab class lives
+TAB_TITLES = [
+    ('purchase', '📦 Purchase Entry'),
+    ('sales', '💰 Sales Entry'),
+    ('invoice', '🧾 Customer Invoice'),
+    ('summary', '📊 Daily Summary'),
+]
+TAB_CLASSES = {
+    'purchase': ('purchase_entry', 'PurchaseEntryTab'),
+    'sales': ('sales_entry', 'SalesEntryTab'),
+    'invoice': ('customer_invoice', 'CustomerInvoiceTab'),
+    'summary': ('daily_summary', 'DailySummaryTab'),
+}
+# Views the refresh scheduler repaints, in repaint order, and the tab each lives on
+REFRESH_VIEWS = [
+    ('purchases', 'purchase'),
+    ('sales', 'sales'),
+    ('invoices', 'invoice'),
+    ('summary', 'summary'),
+]
+
+# How often to retry failed saves and look for records other counters saved to the shared data folder
+DATA_POLL_MS = 3000
 
 # Set CustomTkinter appearance
 ctk.set_appearance_mode("Light")
 ctk.set_default_color_theme("blue")
 
 class FruzyBusinessManager:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None):
         self.root = root
+        self.profiler = profiler or StartupProfiler(STARTUP_TIME, enabled=False)
         self.root.title("Fruzy - Vegetable & Fruit Business Manager")
         self.root.geometry("1400x900")
         # Fruzy color scheme
@@ -42,35 +69,25 @@ class FruzyBusinessManager:
         # ✅ PORTABLE: All data stored in ./data/ under the script directory
         script_dir = os.path.dirname(os.path.abspath(__file__))
         self.data_dir = os.path.join(script_dir, 'data')
-        self.invoices_dir = os.path.join(self.data_dir, 'Customer_Invoices')
-        os.makedirs(self.invoices_dir, exist_ok=True)
-
-        # Load data structures
-        self.vegetables = self.load_vegetables()
-        self.all_purchases = self.load_all_purchases()
-        self.all_sales = self.load_all_sales()
-
-        # Normalize data on load
-        for date in self.all_purchases:
-            self.all_purchases[date] = self.normalize_transaction_data(self.all_purchases[date], 'kg')
-        for date in self.all_sales:
-            self.all_sales[date] = self.normalize_transaction_data(self.all_sales[date], 'kg')
+        # Catalog, purchases/sales by date, invoices and the invoice counter (see fruzy_core).
+        # Other counters may share the folder: saves merge, and _poll_data_dir pulls their changes.
+        self.ledger = Ledger.open(self.data_dir, owner=f"Fruzy Business Manager on {platform.node() or 'this PC'}")
+        self.invoices_dir = self.ledger.invoices_dir
+        self.profiler.mark('ledger loaded')
 
-        # Current date tracking
+        # Current date tracking; self.purchases / self.sales are this day's lists in the ledger
         self.current_date = datetime.now()
         self.selected_date = self.current_date.strftime("%Y-%m-%d")
 
-        # Load data for today
-        self.purchases = self.get_purchases_for_date(self.selected_date)
-        self.sales = self.get_sales_for_date(self.selected_date)
-        self.purchases = self.normalize_transaction_data(self.purchases, 'kg')
-        self.sales = self.normalize_transaction_data(self.sales, 'kg')
-
-        # Invoice data
-        self.invoices = self.load_invoices()
-        self.rate_list = {}
-        self.invoice_counter = self.load_invoice_counter()
+        # Sale (invoice) and purchase rate lists behind one normalized lookup
+        self.rates = RateIndex()
         self.editing_invoice_number = None
+        # Files already ingested by bulk invoice imports (hash + size/mtime)
+        self.import_manifest = ImportManifest(self.data_dir)
+        # Invoice .xlsx files are written off the Tk thread, one at a time
+        self.invoice_renderer = SerialWorker(self.root)
+        # Optional localhost endpoint for invoices posted by the web generator (see start_invoice_server)
+        self.invoice_server = None
 
         # UI variables
         self.purchase_veg_var = ctk.StringVar()
@@ -112,203 +129,145 @@ class FruzyBusinessManager:
         self.qty_movement_tree = None
         self.current_date_label = None
 
+        # Notebook tabs (built lazily by ensure_tab)
+        self.purchase_tab_instance = None
+        self.sales_tab_instance = None
+        self.invoice_tab_instance = None
+        self.summary_tab_instance = None
+
+        # Views marked stale since the last idle refresh pass (see invalidate)
+        self._dirty_views = set()
+        self._refresh_scheduled = False
+        # Ledger changes repaint only what they touch (the tabs subscribe for their own lists)
+        events = self.ledger.events
+        events.subscribe(DateChanged, lambda e: self.invalidate('purchases', 'sales', 'invoices', 'summary'))
+        events.subscribe(RecordsEvent, self._on_records_changed)
+        events.subscribe(DayReplaced, self._on_day_replaced)
+        events.subscribe(CatalogChanged, self._on_catalog_changed)
+
         self.create_ui()
+        self.profiler.mark('UI built')
+        self.root.after(DATA_POLL_MS, self._poll_data_dir)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
+    # ============ LEDGER ACCESS ============
+    # The data lives in self.ledger; these keep the attribute names the tabs use.
+    @property
+    def vegetables(self):
+        return self.ledger.vegetables
+
+    @vegetables.setter
+    def vegetables(self, vegetables):
+        self.ledger.vegetables = vegetables
+
+    @property
+    def all_purchases(self):
+        return self.ledger.all_purchases
+
+    @property
+    def all_sales(self):
+        return self.ledger.all_sales
+
+    @property
+    def purchases(self):
+        return self.ledger.day('purchases', self.selected_date)
+
+    @purchases.setter
+    def purchases(self, records):
+        self.ledger.set_day('purchases', self.selected_date, records)
+
+    @property
+    def sales(self):
+        return self.ledger.day('sales', self.selected_date)
+
+    @sales.setter
+    def sales(self, records):
+        self.ledger.set_day('sales', self.selected_date, records)
+
+    @property
+    def invoices(self):
+        return self.ledger.invoices
+
+    @property
+    def invoice_counter(self):
+        return self.ledger.invoice_counter
+
+    @invoice_counter.setter
+    def invoice_counter(self, value):
+        self.ledger.invoice_counter = value
+
     # ============ DATA NORMALIZATION ============
     def normalize_transaction_data(self, transactions, default_unit='kg'):
-        """Ensure all transactions have 'quantity' as 'value unit' string and proper name fields."""
-        normalized = []
-        for t in transactions:
-            t = t.copy()
-            # Ensure quantity is formatted
-            qty = t.get('quantity', '0')
-            if isinstance(qty, (int, float)):
-                t['quantity'] = f"{float(qty):.2f} {default_unit}"
-            elif isinstance(qty, str) and qty.strip() and ' ' not in qty.strip():
-                try:
-                    float_val = float(qty.strip())
-                    t['quantity'] = f"{float_val:.2f} {default_unit}"
-                except ValueError:
-                    t['quantity'] = f"0.00 {default_unit}"
-            elif not qty.strip():
-                t['quantity'] = f"0.00 {default_unit}"
-
-            # Ensure name fields exist
-            if 'vegetable_urdu' not in t or 'vegetable_english' not in t:
-                veg_data = self.get_vegetable_data(t.get('vegetable', ''))
-                if veg_data:
-                    t['vegetable_urdu'] = veg_data['urdu']
-                    t['vegetable_english'] = veg_data['english']
-                else:
-                    t['vegetable_urdu'] = t.get('vegetable', '')
-                    t['vegetable_english'] = t.get('vegetable', '')
-
-            # Ensure display name
-            t['vegetable_display'] = f"{t['vegetable_urdu']} ({t['vegetable_english']})"
-            normalized.append(t)
-        return normalized
+        return normalize_transactions(transactions, self.vegetables, default_unit)
 
     # ============ DATA PERSISTENCE FUNCTIONS ============
-    def load_vegetables(self):
-        default_vegetables = [
-            {"id": 1, "urdu": "ٹماٹر", "english": "Tomato"},
-            {"id": 2, "urdu": "سبز مرچ", "english": "Green Chili"},
-            {"id": 3, "urdu": "لہسن", "english": "Garlic"},
-            {"id": 4, "urdu": "پیاز", "english": "Onion"},
-            {"id": 5, "urdu": "آلو پرانا", "english": "Old Potato"}
-        ]
-        veg_path = os.path.join(self.data_dir, 'vegetables.json')
-        if os.path.exists(veg_path):
-            try:
-                with open(veg_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading vegetables: {e}")
-        self.save_vegetables(default_vegetables)
-        return default_vegetables
-
-    def save_vegetables(self, vegetables=None):
-        if vegetables is None:
-            vegetables = self.vegetables
-        veg_path = os.path.join(self.data_dir, 'vegetables.json')
-        try:
-            with open(veg_path, 'w', encoding='utf-8') as f:
-                json.dump(vegetables, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving vegetables: {e}")
-
-    def load_all_purchases(self):
-        purchase_path = os.path.join(self.data_dir, 'purchases_by_date.json')
-        if os.path.exists(purchase_path):
-            try:
-                with open(purchase_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading purchases: {e}")
-        return {}
+    def save_vegetables(self):
+        return self.ledger.save_vegetables()
 
     def save_all_purchases(self):
-        purchase_path = os.path.join(self.data_dir, 'purchases_by_date.json')
-        try:
-            backup_path = purchase_path + '.backup'
-            if os.path.exists(purchase_path):
-                shutil.copy2(purchase_path, backup_path)
-            temp_path = purchase_path + '.tmp'
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(self.all_purchases, f, ensure_ascii=False, indent=2)
-            with open(temp_path, 'r', encoding='utf-8') as f:
-                test_load = json.load(f)
-            if os.path.exists(purchase_path):
-                os.remove(purchase_path)
-            os.rename(temp_path, purchase_path)
-            print(f"✓ Purchases saved successfully ({len(self.all_purchases)} dates)")
-        except Exception as e:
-            print(f"✗ Error saving purchases: {e}")
-            try:
-                if os.path.exists(backup_path) and not os.path.exists(purchase_path):
-                    shutil.copy2(backup_path, purchase_path)
-                    print(f"Restored from backup")
-            except:
-                pass
-
-    def load_all_sales(self):
-        sales_path = os.path.join(self.data_dir, 'sales_by_date.json')
-        if os.path.exists(sales_path):
-            try:
-                with open(sales_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading sales: {e}")
-        return {}
+        return self.ledger.save('purchases')
 
     def save_all_sales(self):
-        sales_path = os.path.join(self.data_dir, 'sales_by_date.json')
-        try:
-            backup_path = sales_path + '.backup'
-            if os.path.exists(sales_path):
-                shutil.copy2(sales_path, backup_path)
-            temp_path = sales_path + '.tmp'
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(self.all_sales, f, ensure_ascii=False, indent=2)
-            with open(temp_path, 'r', encoding='utf-8') as f:
-                test_load = json.load(f)
-            if os.path.exists(sales_path):
-                os.remove(sales_path)
-            os.rename(temp_path, sales_path)
-            print(f"✓ Sales saved successfully ({len(self.all_sales)} dates)")
-        except Exception as e:
-            print(f"✗ Error saving sales: {e}")
-            try:
-                if os.path.exists(backup_path) and not os.path.exists(sales_path):
-                    shutil.copy2(backup_path, sales_path)
-                    print(f"Restored from backup")
-            except:
-                pass
-
-    def get_purchases_for_date(self, date_str):
-        return self.all_purchases.get(date_str, [])
-
-    def get_sales_for_date(self, date_str):
-        return self.all_sales.get(date_str, [])
+        return self.ledger.save('sales')
 
     def save_purchases(self):
         try:
-            self.all_purchases[self.selected_date] = self.purchases
-            self.save_all_purchases()
+            saved = self.save_all_purchases()
         except Exception as e:
             print(f"Error in save_purchases: {e}")
             messagebox.showerror("Save Error", f"Failed to save purchases: {str(e)}")
+            return
+        if not saved:
+            messagebox.showerror("Save Error", "Failed to save purchases. They are kept and will be "
+                                 "saved again automatically.")
 
     def save_sales(self):
         try:
-            self.all_sales[self.selected_date] = self.sales
-            self.save_all_sales()
+            saved = self.save_all_sales()
         except Exception as e:
             print(f"Error in save_sales: {e}")
             messagebox.showerror("Save Error", f"Failed to save sales: {str(e)}")
+            return
+        if not saved:
+            messagebox.showerror("Save Error", "Failed to save sales. They are kept and will be "
+                                 "saved again automatically.")
 
-    def set_date(self, date_str):
-        self.all_purchases[self.selected_date] = self.purchases
-        self.all_sales[self.selected_date] = self.sales
-        self.save_all_purchases()
-        self.save_all_sales()
-        self.selected_date = date_str
-        self.purchases = self.get_purchases_for_date(date_str)
-        self.sales = self.get_sales_for_date(date_str)
-        self.purchases = self.normalize_transaction_data(self.purchases, 'kg')
-        self.sales = self.normalize_transaction_data(self.sales, 'kg')
-        self.refresh_all_trees()
-        self.update_summary()
+    def _poll_data_dir(self):
+        try:
+            self.ledger.flush()
+            pulled = self.ledger.refresh()
+            if pulled:
+                print(f"↻ Pulled {len(pulled)} change(s) saved by another counter")
+        except Exception as e:
+            print(f"⚠️ Could not check for changes from other counters: {e}")
+        self.root.after(DATA_POLL_MS, self._poll_data_dir)
+
+    def _on_records_changed(self, event):
+        if event.date == self.selected_date:
+            self.invalidate('summary')
+
+    def _on_day_replaced(self, event):
+        if event.date == self.selected_date:
+            self.invalidate(event.kind, 'summary')
+
+    def _on_catalog_changed(self, event):
+        if getattr(self, 'veg_listbox', None) is not None:
+            self.populate_vegetable_list(self.search_var.get())
+
+    def set_date(self, date_str, save=True):
+        if save:
+            self.ledger.save()
+        previous, self.selected_date = self.selected_date, date_str
+        self.ledger.events.publish(DateChanged(date_str, previous))
         self.update_date_label()
 
     # ============ PUBLIC METHOD FOR TABS ============
     def refresh_daily_summary(self):
-        if hasattr(self, 'summary_tab_instance'):
-            self.summary_tab_instance.refresh_all_data()
+        self.invalidate('summary')
 
     # ============ VEGETABLE NAME HELPER FUNCTIONS ============
     def get_vegetable_data(self, veg_display_name):
-        if not veg_display_name:
-            return None
-        for veg in self.vegetables:
-            display_text = f"{veg['urdu']} ({veg['english']})"
-            if veg_display_name == display_text:
-                return {'urdu': veg['urdu'], 'english': veg['english']}
-        for veg in self.vegetables:
-            if veg['english'].lower() == veg_display_name.lower():
-                return {'urdu': veg['urdu'], 'english': veg['english']}
-        for veg in self.vegetables:
-            if veg['urdu'] == veg_display_name:
-                return {'urdu': veg['urdu'], 'english': veg['english']}
-        if '(' in veg_display_name and ')' in veg_display_name:
-            try:
-                urdu_part = veg_display_name.split('(')[0].strip()
-                english_part = veg_display_name.split('(')[1].split(')')[0].strip()
-                return {'urdu': urdu_part, 'english': english_part}
-            except:
-                pass
-        return {'urdu': veg_display_name, 'english': veg_display_name}
+        return lookup_vegetable(self.vegetables, veg_display_name)
 
     def get_vegetable_display_name(self, veg_data):
         if isinstance(veg_data, dict):
@@ -330,42 +289,68 @@ class FruzyBusinessManager:
         return str(veg_data)
 
     # ============ INVOICE FUNCTIONS ============
-    def load_invoice_counter(self):
-        path = os.path.join(self.data_dir, 'invoice_counter.json')
-        if os.path.exists(path):
-            try:
-                with open(path, 'r') as f:
-                    data = json.load(f)
-                    return data.get('last_invoice', 0)
-            except:
-                pass
-        return 0
-
     def save_invoice_counter(self):
-        path = os.path.join(self.data_dir, 'invoice_counter.json')
-        try:
-            with open(path, 'w') as f:
-                json.dump({'last_invoice': self.invoice_counter}, f)
-        except Exception as e:
-            print(f"Error saving invoice counter: {e}")
-
-    def load_invoices(self):
-        path = os.path.join(self.data_dir, 'invoices.json')
-        if os.path.exists(path):
-            try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
+        return self.ledger.save_invoice_counter()
 
     def save_invoices(self):
-        path = os.path.join(self.data_dir, 'invoices.json')
+        return self.ledger.save_invoices()
+
+    # ============ INVOICE SERVER ============
+    def start_invoice_server(self, port=None, token=None):
+        """Accept invoices POSTed to http://127.0.0.1:<port>/invoices while the app runs.
+
+        Requests are validated and queued on the server's threads; the ledger is only
+        touched here on the Tk thread, one batch per poll, through the same commit path
+        as imported invoice files.
+        """
+        from fruzy_core.ingest import DEFAULT_PORT, InvoiceIngestServer
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump(self.invoices, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving invoices: {e}")
+            self.invoice_server = InvoiceIngestServer(port=DEFAULT_PORT if port is None else port, token=token).start()
+        except OSError as e:
+            print(f"⚠️ Invoice server not started: {e}")
+            return None
+        print(f"✓ Invoice server listening on {self.invoice_server.url}/invoices")
+        self.root.after(self.invoice_server.POLL_MS, self._apply_posted_invoices)
+        return self.invoice_server
+
+    def _apply_posted_invoices(self):
+        server = self.invoice_server
+        if server is None:
+            return
+        batch = server.drain()
+        if batch:
+            try:
+                self._commit_posted_invoices(batch)
+            except Exception as e:
+                print(f"⚠️ Posted invoices not applied: {e}")
+                for ticket, _ in batch:
+                    server.report(ticket, 'error', reason=str(e))
+        self.root.after(server.POLL_MS, self._apply_posted_invoices)
+
+    def _commit_posted_invoices(self, batch):
+        from invoice_render import invoice_filename, invoice_payload
+        from fruzy_core.web_invoice import find_urdu_for_english
+        tickets = {}
+        for ticket, parsed in batch:
+            for item in parsed['items']:
+                if not item['urdu']:
+                    item['urdu'] = find_urdu_for_english(self.vegetables, item['vegetable'])
+            # Posted invoices get the file name generated invoices get; it also ties results to tickets
+            parsed['filepath'] = os.path.join(
+                self.invoices_dir, invoice_filename(parsed['invoice_number'], parsed['customer_name']))
+            tickets.setdefault(parsed['filepath'], []).append(ticket)
+
+        invoice_tab = self.ensure_tab('invoice')
+        accepted, rejected = invoice_tab._commit_web_invoices([parsed for _, parsed in batch])
+        for invoice in accepted:
+            self.invoice_server.report(tickets[invoice['filepath']].pop(0), 'imported',
+                                       invoice_number=invoice['invoice_number'], date=invoice['date'],
+                                       total=invoice['total_amount'])
+            invoice_tab._queue_invoice_render(invoice['filepath'], invoice_payload(invoice))
+        for filepath, reason in rejected:
+            self.invoice_server.report(tickets[filepath].pop(0), 'rejected', reason=reason)
+        if accepted:
+            print(f"✓ {len(accepted)} posted invoice(s) added")
 
     # ============ UI CREATION ============
     def create_ui(self):
@@ -379,9 +364,7 @@ class FruzyBusinessManager:
         try:
             logo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fruzy_logo.png')
             if os.path.exists(logo_path):
-                img = Image.open(logo_path)
-                img = img.resize((60, 60), Image.Resampling.LANCZOS)
-                self.logo_image = ImageTk.PhotoImage(img)
+                self.logo_image = load_scaled_image(logo_path, (60, 60), os.path.join(self.data_dir, 'cache'))
                 logo_label = ctk.CTkLabel(logo_frame, image=self.logo_image, text="")
                 logo_label.pack(side='left', padx=(0, 15))
         except Exception as e:
@@ -407,6 +390,8 @@ class FruzyBusinessManager:
                       command=self.open_invoice_folder).pack(side='left', padx=5)
         ctk.CTkButton(btn_frame, text="📊 Export", font=('Arial', 11, 'bold'),
                       command=self.export_to_excel).pack(side='left', padx=5)
+        ctk.CTkButton(btn_frame, text="🗂️ Export Range", font=('Arial', 11, 'bold'),
+                      command=self.export_range_dialog).pack(side='left', padx=5)
 
         main_container = ctk.CTkFrame(self.root)
         main_container.pack(fill='both', expand=True, padx=10, pady=10)
@@ -427,7 +412,7 @@ class FruzyBusinessManager:
         search_frame.pack(fill='x', padx=10, pady=10)
         ctk.CTkLabel(search_frame, text="🔍", font=('Arial', 13)).pack(side='left', padx=5)
         self.search_var = ctk.StringVar()
-        self.search_var.trace('w', self.filter_vegetables)
+        self.search_var.trace('w', Debouncer(self.root, self.filter_vegetables))
         ctk.CTkEntry(search_frame, textvariable=self.search_var, font=('Arial', 10), width=180).pack(side='left', fill='x', expand=True)
 
         ctk.CTkButton(sidebar, text="➕ Add New Item", font=('Arial', 10, 'bold'),
@@ -485,7 +470,7 @@ class FruzyBusinessManager:
                 self.sales_veg_var.set(veg_name)
             elif current_tab == 2:
                 self.invoice_item_var.set(veg_name)
-            if hasattr(self, 'invoice_tab_instance'):
+            if self.invoice_tab_instance:
                 self.invoice_tab_instance.load_item_rate()
 
     def add_vegetable_dialog(self):
@@ -614,21 +599,70 @@ class FruzyBusinessManager:
         self.notebook = ttk.Notebook(notebook_frame)
         self.notebook.pack(fill='both', expand=True)
 
-        self.purchase_tab = ctk.CTkFrame(self.notebook, fg_color=self.colors['light'])
-        self.notebook.add(self.purchase_tab, text='📦 Purchase Entry')
-        self.purchase_tab_instance = PurchaseEntryTab(self.purchase_tab, self)
-
-        self.sales_tab = ctk.CTkFrame(self.notebook, fg_color=self.colors['light'])
-        self.notebook.add(self.sales_tab, text='💰 Sales Entry')
-        self.sales_tab_instance = SalesEntryTab(self.sales_tab, self)
-
-        self.invoice_tab = ctk.CTkFrame(self.notebook, fg_color=self.colors['light'])
-        self.notebook.add(self.invoice_tab, text='🧾 Customer Invoice')
-        self.invoice_tab_instance = CustomerInvoiceTab(self.invoice_tab, self)
-
-        self.summary_tab = ctk.CTkFrame(self.notebook, fg_color=self.colors['light'])
-        self.notebook.add(self.summary_tab, text='📊 Daily Summary')
-        self.summary_tab_instance = DailySummaryTab(self.summary_tab, self)
+        # Tabs are constructed on first visit; until then <name>_tab_instance is None
+        self._tab_names = {}
+        for name, title in TAB_TITLES:
+            frame = ctk.CTkFrame(self.notebook, fg_color=self.colors['light'])
+            self.notebook.add(frame, text=title)
+            setattr(self, f'{name}_tab', frame)
+            self._tab_names[str(frame)] = name
+        self.notebook.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        self.ensure_tab('purchase')
+
+    def ensure_tab(self, name):
+        """Build a notebook tab the first time it is needed and return its instance."""
+        instance = getattr(self, f'{name}_tab_instance')
+        if instance is None:
+            module_name, class_name = TAB_CLASSES[name]
+            tab_class = getattr(importlib.import_module(module_name), class_name)
+            instance = tab_class(getattr(self, f'{name}_tab'), self)
+            setattr(self, f'{name}_tab_instance', instance)
+            self.profiler.mark(f'tab built: {name}')
+            # Catch the new tab up with the selected day
+            self.invalidate(*[view for view, tab in REFRESH_VIEWS if tab == name])
+        return instance
+
+    def _on_tab_changed(self, event=None):
+        name = self._tab_names.get(self.notebook.select())
+        if name:
+            self.ensure_tab(name)
+            self.invalidate()  # repaint whatever went stale while the tab was hidden
+
+    # ============ REFRESH SCHEDULER ============
+    def invalidate(self, *views):
+        """Mark views ('purchases', 'sales', 'invoices', 'summary') as stale.
+
+        Nothing is repainted here: one after_idle pass repaints every dirty view, so a
+        burst of mutations costs a single repaint. Views on hidden tabs stay dirty until
+        their tab is shown.
+        """
+        self._dirty_views.update(views)
+        if not self._refresh_scheduled:
+            self._refresh_scheduled = True
+            self.root.after_idle(self._run_refresh)
+
+    def is_stale(self, view):
+        """True while a full repaint of `view` is pending; deltas for it can be skipped."""
+        return view in self._dirty_views
+
+    def _run_refresh(self):
+        self._refresh_scheduled = False
+        notebook = getattr(self, 'notebook', None)
+        current = self._tab_names.get(notebook.select()) if notebook else None
+        repaint = {
+            'purchases': self.refresh_purchase_tree,
+            'sales': lambda: self.sales_tab_instance.reload_sales_list(),
+            'invoices': lambda: self.invoice_tab_instance.populate_invoices_tree(),
+            'summary': self._repaint_summary,
+        }
+        for view, tab in REFRESH_VIEWS:
+            if view not in self._dirty_views or tab != current:
+                continue
+            self._dirty_views.discard(view)
+            try:
+                repaint[view]()
+            except Exception as e:
+                print(f"Error refreshing {view}: {e}")
 
     # ============ CALENDAR FEATURE ============
     def open_calendar_dialog(self):
@@ -662,7 +696,7 @@ class FruzyBusinessManager:
                     if day == 0:
                         continue
                     date_str = f"{new_year:04d}-{new_month:02d}-{day:02d}"
-                    has_data = date_str in self.all_purchases or date_str in self.all_sales
+                    has_data = bool(self.all_purchases.get(date_str) or self.all_sales.get(date_str))
                     bg_color = self.colors['primary'] if has_data else self.colors['light']
                     btn = ctk.CTkButton(
                         cal_frame,
@@ -733,83 +767,58 @@ class FruzyBusinessManager:
         except:
             self.sales_total_var.set("0.00")
 
-    def add_purchase(self):
-        if not all([self.purchase_veg_var.get(), self.purchase_qty_var.get(), self.purchase_rate_var.get()]):
-            messagebox.showwarning("Missing Data", "Please fill all fields")
-            return
+    def add_purchase(self, vegetable=None, quantity=None, rate=None, vendor=None, payment=None, unit=None):
+        """Add a purchase to the selected day and save it; returns the record, or None if rejected.
+
+        Arguments left out are read from the purchase form; `quantity` may carry its unit ('2.00 kg').
+        """
         try:
-            qty = float(self.purchase_qty_var.get())
-            if qty <= 0:
-                messagebox.showerror("Invalid Data", "Quantity must be greater than 0")
-                return
-            rate = float(self.purchase_rate_var.get())
-            if rate < 0:
-                messagebox.showerror("Invalid Data", "Rate cannot be negative")
-                return
-            total = qty * rate
-            veg_data = self.get_vegetable_data(self.purchase_veg_var.get())
-            if veg_data is None:
-                veg_data = {'urdu': self.purchase_veg_var.get(), 'english': self.purchase_veg_var.get()}
-            purchase = {
-                'vegetable_urdu': veg_data['urdu'],
-                'vegetable_english': veg_data['english'],
-                'vegetable_display': f"{veg_data['urdu']} ({veg_data['english']})",
-                'quantity': f"{qty:.2f} {self.purchase_unit_var.get()}",
-                'rate': f"{rate:.2f}",
-                'total': f"{total:.2f}",
-                'vendor': self.purchase_vendor_var.get(),
-                'payment': self.purchase_payment_var.get()
-            }
-            self.purchases.append(purchase)
-            self.purchase_veg_var.set('')
-            self.purchase_qty_var.set('')
-            self.purchase_rate_var.set('')
-            self.purchase_total_var.set('0.00')
-            self.save_purchases()
-            self.update_summary()
-            messagebox.showinfo("Success", "Purchase added!")
-        except ValueError:
-            messagebox.showerror("Invalid Data", "Please enter valid numbers")
-
-    def add_sale(self):
-        if not all([self.sales_veg_var.get(), self.sales_qty_var.get(), self.sales_rate_var.get()]):
-            messagebox.showwarning("Missing Data", "Please fill all fields")
-            return
+            purchase = self.ledger.add_purchase(
+                self.selected_date,
+                self.purchase_veg_var.get() if vegetable is None else vegetable,
+                self.purchase_qty_var.get() if quantity is None else quantity,
+                self.purchase_rate_var.get() if rate is None else rate,
+                vendor=self.purchase_vendor_var.get() if vendor is None else vendor,
+                payment=self.purchase_payment_var.get() if payment is None else payment,
+                unit=self.purchase_unit_var.get() if unit is None else unit
+            )
+        except InvalidRecord as e:
+            messagebox.showerror("Invalid Data", str(e))
+            return None
+        self.save_purchases()
+        messagebox.showinfo("Success", "Purchase added!")
+        return purchase
+
+    def add_sale(self, vegetable=None, quantity=None, rate=None, unit=None):
+        """Add a manual sale to the selected day and save it; returns the record, or None if rejected.
+
+        Arguments left out are read from the sales form; `quantity` may carry its unit ('2.00 kg').
+        """
         try:
-            qty = float(self.sales_qty_var.get())
-            if qty <= 0:
-                messagebox.showerror("Invalid Data", "Quantity must be greater than 0")
-                return
-            rate = float(self.sales_rate_var.get())
-            if rate < 0:
-                messagebox.showerror("Invalid Data", "Rate cannot be negative")
-                return
-            total = qty * rate
-            veg_data = self.get_vegetable_data(self.sales_veg_var.get())
-            if veg_data is None:
-                veg_data = {'urdu': self.sales_veg_var.get(), 'english': self.sales_veg_var.get()}
-            sale = {
-                'source': 'Manual Entry',
-                'vegetable_urdu': veg_data['urdu'],
-                'vegetable_english': veg_data['english'],
-                'vegetable_display': f"{veg_data['urdu']} ({veg_data['english']})",
-                'quantity': f"{qty:.2f} {self.sales_unit_var.get()}",
-                'rate': f"{rate:.2f}",
-                'total': f"{total:.2f}"
-            }
-            self.sales.append(sale)
-            self.sales_veg_var.set('')
-            self.sales_qty_var.set('')
-            self.sales_rate_var.set('')
-            self.sales_total_var.set('0.00')
-            self.save_sales()
-            self.update_summary()
-            self.sales_tab_instance.reload_sales_list()
-            messagebox.showinfo("Success", "Sale added!")
-        except ValueError:
-            messagebox.showerror("Invalid Data", "Please enter valid numbers")
+            sale = self.ledger.add_sale(
+                self.selected_date,
+                self.sales_veg_var.get() if vegetable is None else vegetable,
+                self.sales_qty_var.get() if quantity is None else quantity,
+                self.sales_rate_var.get() if rate is None else rate,
+                unit=self.sales_unit_var.get() if unit is None else unit
+            )
+        except InvalidRecord as e:
+            messagebox.showerror("Invalid Data", str(e))
+            return None
+        self.save_sales()
+        messagebox.showinfo("Success", "Sale added!")
+        return sale
+
+    def find_record(self, kind, record_id):
+        """The purchase or sale record with this id (the Treeview iid), for in-place edits."""
+        return self.ledger.find(kind, self.selected_date, record_id)
+
+    def remove_records(self, kind, record_ids):
+        """Delete the records with these ids from self.purchases / self.sales; returns how many."""
+        return self.ledger.remove(kind, self.selected_date, record_ids)
 
     def delete_purchase(self):
+        """Delete selected purchase entries (supports multi-select)."""
         if not self.purchase_tree:
             messagebox.showwarning("No Data", "No purchases to delete")
             return
@@ -817,12 +826,10 @@ class FruzyBusinessManager:
         if not selection:
             messagebox.showwarning("No Selection", "Please select a purchase")
             return
-        if messagebox.askyesno("Confirm", "Delete this purchase?"):
-            index = self.purchase_tree.index(selection[0])
-            self.purchases.pop(index)
-            self.purchase_tree.delete(selection)
+        if messagebox.askyesno("Confirm", f"Delete {len(selection)} selected purchase(s)?"):
+            self.remove_records('purchases', selection)
             self.save_purchases()
-            self.update_summary()
+
     def delete_sale(self):
         """Delete selected sales entries (supports multi-select)."""
         selected = self.sales_tree.selection()
@@ -833,33 +840,16 @@ class FruzyBusinessManager:
         if not messagebox.askyesno("Confirm Delete", f"Delete {len(selected)} selected sale(s)?"):
             return
 
-        # Try to interpret iids as indices
-        try:
-            indices = sorted([int(iid) for iid in selected], reverse=True)
-        except ValueError:
-            # Invalid iids found → likely from refresh_sales_tree
-            messagebox.showerror(
-                "Sync Error",
-                "Sales list is out of sync. Reloading...\nPlease try again."
-            )
-            if hasattr(self, 'sales_tab_instance'):
-                self.sales_tab_instance.reload_sales_list()
-            return
-
-        # Delete from data list
-        for idx in indices:
-            if 0 <= idx < len(self.sales):
-                del self.sales[idx]
-
-        # Save and refresh via the tab (which uses correct iids)
+        # Tree iids are the records' ids; the sales tab drops the rows when the ledger reports it
+        self.remove_records('sales', selected)
         self.save_sales()
-        self.update_summary()
-        self.sales_tab_instance.reload_sales_list()
+
     def update_summary(self):
-        total_purchase = sum(float(p['total']) for p in self.purchases) if self.purchases else 0
-        total_sales = sum(float(s['total']) for s in self.sales) if self.sales else 0
-        profit = total_sales - total_purchase
-        profit_percent = (profit / total_purchase * 100) if total_purchase > 0 else 0
+        """Schedule a repaint of the totals and the daily summary (coalesced, see invalidate)."""
+        self.invalidate('summary')
+
+    def _repaint_summary(self):
+        total_purchase, total_sales, profit, profit_percent = day_totals(self.purchases, self.sales)
 
         if self.total_purchase_label:
             self.total_purchase_label.configure(text=f"PKR {total_purchase:,.2f}")
@@ -875,33 +865,15 @@ class FruzyBusinessManager:
         if self.sales_items_label:
             self.sales_items_label.configure(text=str(len(self.sales)))
 
-        if hasattr(self, 'summary_tab_instance') and self.summary_tab_instance:
-            try:
-                self.summary_tab_instance.refresh_all_data()
-            except Exception as e:
-                print(f"Error refreshing daily summary: {e}")
+        if self.summary_tab_instance:
+            self.summary_tab_instance.refresh_all_data()
 
     def refresh_purchase_tree(self):
-        if self.purchase_tree:
-            try:
-                for item in self.purchase_tree.get_children():
-                    self.purchase_tree.delete(item)
-                for purchase in self.purchases:
-                    self.purchase_tree.insert('', 'end', values=(
-                        purchase['vegetable_display'],
-                        purchase['quantity'],
-                        purchase['rate'],
-                        purchase['total'],
-                        purchase['vendor'],
-                        purchase['payment']
-                    ))
-            except:
-                pass
+        if self.purchase_tab_instance:
+            self.purchase_tab_instance.reload_purchase_list()
+
     def refresh_all_trees(self):
-        self.refresh_purchase_tree()
-        self.sales_tab_instance.reload_sales_list()  # ← GOOD
-        if hasattr(self, 'invoice_tab_instance'):
-            self.invoice_tab_instance.populate_invoices_tree()
+        self.invalidate('purchases', 'sales', 'invoices')
 
     def open_invoice_folder(self):
         try:
@@ -916,397 +888,186 @@ class FruzyBusinessManager:
             messagebox.showerror("Error", f"Failed to open folder: {str(e)}")
 
     def import_excel_data(self):
-        filename = filedialog.askopenfilename(
-            title="Select Excel File with Monthly Data",
+        filenames = filedialog.askopenfilenames(
+            title="Select Excel File(s) with Monthly Data",
             filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
         )
-        if not filename:
+        if not filenames:
             return
-        try:
-            wb = openpyxl.load_workbook(filename)
-            sheet_names = [s for s in wb.sheetnames if s != "Monthly Summary"]
-            if not sheet_names:
-                messagebox.showwarning("No Data", "No daily sheets found in this file")
+        filenames = list(filenames)
+        from fruzy_core import excel_import
+
+        def commit(results, errors):
+            sheets = [sheet for _, chunk in results for sheet in chunk]
+            sheets += [(os.path.basename(task[0]), None, [], [], message) for task, message in errors]
+            if not sheets:
+                messagebox.showwarning("No Data", "No daily sheets found in the selected file(s)")
                 return
-
-            imported_count = 0
-            import_errors = []
-            for sheet_name in sheet_names:
-                try:
-                    ws = wb[sheet_name]
-                    date_str = self._parse_date_from_sheet_name(sheet_name)
-                    if not date_str:
-                        import_errors.append(f"Sheet '{sheet_name}': Could not parse date")
-                        continue
-
-                    purchases = []
-                    sales = []
-                    in_purchases = False
-                    in_sales = False
-
-                    for row in ws.iter_rows(min_row=1):
-                        if not row or not row[0].value:
-                            continue
-                        if row[0].value == "PURCHASES":
-                            in_purchases = True
-                            in_sales = False
-                            continue
-                        elif row[0].value == "SALES":
-                            in_sales = True
-                            in_purchases = False
-                            continue
-                        elif row[0].value == "DAILY SUMMARY":
-                            break
-
-                        if in_purchases and row[0].value and row[0].value not in ["Vegetable", "PURCHASES", "Vegetable (اردو/English)"]:
-                            try:
-                                veg = str(row[0].value) if row[0].value else ""
-                                qty = str(row[1].value) if len(row) > 1 and row[1].value else "0"
-                                rate = str(row[2].value) if len(row) > 2 and row[2].value else "0"
-                                total = str(row[3].value) if len(row) > 3 and row[3].value else "0"
-                                vendor = str(row[4].value) if len(row) > 4 and row[4].value else "Main Vendor"
-                                payment = str(row[5].value).lower() if len(row) > 5 and row[5].value else "cash"
-                                if veg and total and float(total) > 0:
-                                    veg_data = self.get_vegetable_data(veg)
-                                    if veg_data is None:
-                                        veg_data = {'urdu': veg, 'english': veg}
-                                    if ' ' not in qty:
-                                        qty = f"{qty} kg"
-                                    purchase = {
-                                        'vegetable_urdu': veg_data['urdu'],
-                                        'vegetable_english': veg_data['english'],
-                                        'vegetable_display': f"{veg_data['urdu']} ({veg_data['english']})",
-                                        'quantity': qty,
-                                        'rate': rate,
-                                        'total': total,
-                                        'vendor': vendor,
-                                        'payment': payment
-                                    }
-                                    purchases.append(purchase)
-                            except (ValueError, IndexError):
-                                continue
-
-                        if in_sales and row[0].value and row[0].value not in ["Vegetable", "SALES", "Vegetable (اردو/English)"]:
-                            try:
-                                veg = str(row[0].value) if row[0].value else ""
-                                qty = str(row[1].value) if len(row) > 1 and row[1].value else "0"
-                                rate = str(row[2].value) if len(row) > 2 and row[2].value else "0"
-                                total = str(row[3].value) if len(row) > 3 and row[3].value else "0"
-                                source = str(row[6].value) if len(row) > 6 and row[6].value else "Manual Entry"
-                                if veg and total and float(total) > 0:
-                                    veg_data = self.get_vegetable_data(veg)
-                                    if veg_data is None:
-                                        veg_data = {'urdu': veg, 'english': veg}
-                                    if ' ' not in qty:
-                                        qty = f"{qty} kg"
-                                    sale = {
-                                        'source': source,
-                                        'vegetable_urdu': veg_data['urdu'],
-                                        'vegetable_english': veg_data['english'],
-                                        'vegetable_display': f"{veg_data['urdu']} ({veg_data['english']})",
-                                        'quantity': qty,
-                                        'rate': rate,
-                                        'total': total
-                                    }
-                                    sales.append(sale)
-                            except (ValueError, IndexError):
-                                continue
-
-                    if purchases or sales:
-                        self.all_purchases[date_str] = purchases
-                        existing_sales = self.all_sales.get(date_str, [])
-                        invoice_sales = [s for s in existing_sales if 'invoice' in s.get('source', '').lower()]
-                        self.all_sales[date_str] = sales + invoice_sales
-                        imported_count += 1
-                except Exception as e:
-                    import_errors.append(f"Sheet '{sheet_name}': {str(e)}")
-                    continue
-
-            if imported_count > 0:
-                self.save_all_purchases()
-                self.save_all_sales()
-                first_date = self._parse_date_from_sheet_name(sheet_names[0])
-                if first_date:
-                    self.set_date(first_date)
-
-                error_info = ""
-                if import_errors:
-                    error_info = f"\nWarnings:\n" + "\n".join(import_errors[:5])
-                    if len(import_errors) > 5:
-                        error_info += f"\n... and {len(import_errors) - 5} more warnings"
-                messagebox.showinfo("Success", f"✅ Imported data for {imported_count} dates!\nNavigate using the calendar to view different dates.{error_info}")
-            else:
-                error_msg = "No valid data was imported.\nMake sure your Excel file has:\n"
-                error_msg += "- Sheet names as dates (DD-MMM-YYYY or YYYY-MM-DD)\n"
-                error_msg += "- 'PURCHASES' and 'SALES' sections\n"
-                error_msg += "- Data rows with at least Vegetable, Quantity, Rate, Total"
-                if import_errors:
-                    error_msg += "\nErrors:\n" + "\n".join(import_errors[:3])
-                messagebox.showwarning("Import Failed", error_msg)
-        except Exception as e:
-            messagebox.showerror("Error", f"Import error: {str(e)}")
-
-    def _parse_date_from_sheet_name(self, sheet_name):
-        formats = ["%Y-%m-%d", "%d-%b-%Y", "%d-%m-%Y", "%m/%d/%Y", "%d/%m/%Y"]
-        for fmt in formats:
-            try:
-                date_obj = datetime.strptime(sheet_name, fmt)
-                return date_obj.strftime("%Y-%m-%d")
-            except ValueError:
-                continue
-        return None
+            self._apply_imported_days(sheets)
+
+        BatchJob(
+            self.root, "Importing Excel Data",
+            tasks=lambda: excel_import.build_tasks(filenames, os.cpu_count() or 1),
+            process=excel_import.parse_workbook_task,
+            commit=commit,
+            use_processes=True,
+            on_cancel=lambda: messagebox.showinfo("Import Cancelled", "Nothing was imported."),
+            on_error=lambda e: messagebox.showerror("Error", f"Import error: {str(e)}")
+        ).start()
+
+    def _apply_imported_days(self, results):
+        """Merge parsed sheets into the ledger in one batch, then persist once."""
+        imported_dates, import_errors = self.ledger.merge_imported_days(results)
+        if imported_dates:
+            self.set_date(imported_dates[0], save=False)
+
+            error_info = ""
+            if import_errors:
+                error_info = "\nWarnings:\n" + "\n".join(import_errors[:5])
+                if len(import_errors) > 5:
+                    error_info += f"\n... and {len(import_errors) - 5} more warnings"
+            messagebox.showinfo("Success", f"✅ Imported data for {len(imported_dates)} dates!\nNavigate using the calendar to view different dates.{error_info}")
+        else:
+            error_msg = "No valid data was imported.\nMake sure your Excel file has:\n"
+            error_msg += "- Sheet names as dates (DD-MMM-YYYY or YYYY-MM-DD)\n"
+            error_msg += "- 'PURCHASES' and 'SALES' sections\n"
+            error_msg += "- Data rows with at least Vegetable, Quantity, Rate, Total"
+            if import_errors:
+                error_msg += "\nErrors:\n" + "\n".join(import_errors[:3])
+            messagebox.showwarning("Import Failed", error_msg)
 
     def export_to_excel(self):
         if not self.purchases and not self.sales:
             messagebox.showwarning("No Data", "Please add data first")
             return
         try:
+            from fruzy_core import excel_io
             selected_date_obj = datetime.strptime(self.selected_date, "%Y-%m-%d")
-            month_year = selected_date_obj.strftime("%B_%Y")
-            filename = f"{month_year}.xlsx"
-            if os.path.exists(filename):
-                wb = openpyxl.load_workbook(filename)
-            else:
-                wb = openpyxl.Workbook()
-                if wb.active:
-                    wb.remove(wb.active)
-                summary_sheet = wb.create_sheet("Monthly Summary", 0)
-                self.create_summary_sheet(summary_sheet)
-            sheet_name = selected_date_obj.strftime("%d-%b-%Y")
-            if sheet_name in wb.sheetnames:
-                if not messagebox.askyesno("Exists", f"Overwrite '{sheet_name}'?"):
-                    return
-                del wb[sheet_name]
-            ws = wb.create_sheet(sheet_name)
-            self.write_daily_sheet(ws)
-            if "Monthly Summary" in wb.sheetnames:
-                self.update_summary_sheet(wb["Monthly Summary"], wb)
-            wb.save(filename)
-            messagebox.showinfo("Success", f"Exported to {filename}")
+            filename, days = excel_io.export_month(
+                self.ledger, selected_date_obj.year, selected_date_obj.month, header_color=self.colors['dark']
+            )
+            messagebox.showinfo("Success", f"Exported {days} day(s) to {filename}")
         except Exception as e:
             messagebox.showerror("Error", f"Export error: {str(e)}")
 
-    def write_daily_sheet(self, ws):
-        header_fill = PatternFill(start_color=self.colors['dark'].replace('#', ''),
-                                 end_color=self.colors['dark'].replace('#', ''), fill_type="solid")
-        header_font = Font(name='Arial', size=12, bold=True, color="FFFFFF")
-        border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                        top=Side(style='thin'), bottom=Side(style='thin'))
-        ws['A1'] = "FRUZY - Vegetable & Fruit Business"
-        ws['A1'].font = Font(name='Arial', size=16, bold=True)
-        ws.merge_cells('A1:F1')
-        selected_date_obj = datetime.strptime(self.selected_date, "%Y-%m-%d")
-        ws['A2'] = f"Date: {selected_date_obj.strftime('%A, %B %d, %Y')}"
-        ws['A2'].font = Font(name='Arial', size=12)
-        ws.merge_cells('A2:F2')
-        row = 4
-        ws[f'A{row}'] = "PURCHASES"
-        ws[f'A{row}'].font = Font(name='Arial', size=14, bold=True)
-        row += 1
-        for col, header in enumerate(['Vegetable (اردو/English)', 'Quantity', 'Rate (PKR)', 'Total (PKR)', 'Vendor', 'Payment Type'], 1):
-            cell = ws.cell(row, col, header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-        row += 1
-        for purchase in self.purchases:
-            # Get the display name with both Urdu and English
-            veg_display = purchase.get('vegetable', purchase.get('vegetable_english', ''))
-            if purchase.get('vegetable_urdu') and purchase.get('vegetable_english'):
-                veg_display = f"{purchase.get('vegetable_urdu')} ({purchase.get('vegetable_english')})"
-            
-            ws.cell(row, 1, veg_display).border = border
-            ws.cell(row, 2, purchase['quantity']).border = border
-            try:
-                ws.cell(row, 3, float(purchase['rate'])).border = border
-            except Exception:
-                ws.cell(row, 3, purchase['rate']).border = border
-            ws.cell(row, 3).number_format = '#,##0.00'
-            try:
-                ws.cell(row, 4, float(purchase['total'])).border = border
-            except Exception:
-                ws.cell(row, 4, purchase['total']).border = border
-            ws.cell(row, 4).number_format = '#,##0.00'
-            ws.cell(row, 5, purchase['vendor']).border = border
-            ws.cell(row, 6, purchase['payment'].upper()).border = border
-            row += 1
-        row += 2
-        ws[f'A{row}'] = "SALES"
-        ws[f'A{row}'].font = Font(name='Arial', size=14, bold=True)
-        row += 1
-        for col, header in enumerate(['Vegetable (اردو/English)', 'Quantity', 'Rate (PKR)', 'Total (PKR)'], 1):
-            cell = ws.cell(row, col, header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-        row += 1
-        for sale in self.sales:
-            # Get the display name with both Urdu and English
-            veg_display = sale.get('vegetable', sale.get('vegetable_english', ''))
-            if sale.get('vegetable_urdu') and sale.get('vegetable_english'):
-                veg_display = f"{sale.get('vegetable_urdu')} ({sale.get('vegetable_english')})"
-            
-            ws.cell(row, 1, veg_display).border = border
-            ws.cell(row, 2, sale['quantity']).border = border
-            try:
-                ws.cell(row, 3, float(sale['rate'])).border = border
-            except Exception:
-                ws.cell(row, 3, sale['rate']).border = border
-            ws.cell(row, 3).number_format = '#,##0.00'
+    def export_range_dialog(self):
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title("Export Date Range - Fruzy")
+        dialog.geometry("460x330")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        ctk.CTkLabel(dialog, text="🗂️ Export Date Range", font=('Arial', 14, 'bold')).pack(pady=15)
+        frame = ctk.CTkFrame(dialog)
+        frame.pack(padx=30, pady=10, fill='both', expand=True)
+
+        selected = datetime.strptime(self.selected_date, "%Y-%m-%d")
+        last_day = cal_module.monthrange(selected.year, selected.month)[1]
+        start_var = tk.StringVar(value=selected.strftime("%Y-%m-01"))
+        end_var = tk.StringVar(value=selected.strftime(f"%Y-%m-{last_day:02d}"))
+        mode_var = tk.StringVar(value='per_month')
+
+        ctk.CTkLabel(frame, text="From (YYYY-MM-DD):", font=('Arial', 11, 'bold')).grid(row=0, column=0, sticky='w', padx=10, pady=8)
+        ctk.CTkEntry(frame, textvariable=start_var, width=150).grid(row=0, column=1, padx=10, pady=8, sticky='w')
+        ctk.CTkLabel(frame, text="To (YYYY-MM-DD):", font=('Arial', 11, 'bold')).grid(row=1, column=0, sticky='w', padx=10, pady=8)
+        ctk.CTkEntry(frame, textvariable=end_var, width=150).grid(row=1, column=1, padx=10, pady=8, sticky='w')
+
+        def full_year():
+            start_var.set(f"{selected.year}-01-01")
+            end_var.set(f"{selected.year}-12-31")
+
+        ctk.CTkButton(frame, text="Full Year", width=90, command=full_year).grid(row=2, column=1, padx=10, pady=4, sticky='w')
+        mode_btn = ctk.CTkSegmentedButton(
+            frame,
+            values=["One file per month", "Single workbook"],
+            command=lambda v: mode_var.set('per_month' if v == "One file per month" else 'single')
+        )
+        mode_btn.set("One file per month")
+        mode_btn.grid(row=3, column=0, columnspan=2, padx=10, pady=12)
+
+        def start():
             try:
-                ws.cell(row, 4, float(sale['total'])).border = border
-            except Exception:
-                ws.cell(row, 4, sale['total']).border = border
-            ws.cell(row, 4).number_format = '#,##0.00'
-            row += 1
-        total_purchase = sum(float(p['total']) for p in self.purchases) if self.purchases else 0
-        total_sales = sum(float(s['total']) for s in self.sales) if self.sales else 0
-        profit = total_sales - total_purchase
-        profit_percent = (profit / total_purchase * 100) if total_purchase > 0 else 0
-        row += 2
-        ws[f'A{row}'] = "DAILY SUMMARY"
-        ws[f'A{row}'].font = Font(name='Arial', size=14, bold=True)
-        row += 1
-        ws.cell(row, 1, "Total Purchase:").font = Font(bold=True)
-        ws.cell(row, 2, total_purchase).number_format = '"PKR "#,##0.00'
-        ws.cell(row, 2).font = Font(bold=True)
-        row += 1
-        ws.cell(row, 1, "Total Sales:").font = Font(bold=True)
-        ws.cell(row, 2, total_sales).number_format = '"PKR "#,##0.00'
-        ws.cell(row, 2).font = Font(bold=True)
-        row += 1
-        ws.cell(row, 1, "Profit/Loss:").font = Font(bold=True)
-        ws.cell(row, 2, profit).number_format = '"PKR "#,##0.00'
-        ws.cell(row, 2).font = Font(bold=True)
-        row += 1
-        ws.cell(row, 1, "Profit Percentage:").font = Font(bold=True)
-        ws.cell(row, 2, f"{profit_percent:.2f}%")
-        ws.cell(row, 2).font = Font(bold=True)
-        for col in ['A', 'B', 'C', 'D', 'E', 'F']:
-            ws.column_dimensions[col].width = 20
-        try:
-            totals = self.get_qty_totals()
-            if totals:
-                row += 2
-                ws[f'A{row}'] = "QUANTITY MOVEMENT"
-                ws[f'A{row}'].font = Font(name='Arial', size=14, bold=True)
-                row += 1
-                headers = ['Vegetable', 'Purchased', 'Sold']
-                for col_idx, header in enumerate(headers, 1):
-                    cell = ws.cell(row, col_idx, header)
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.border = border
-                    cell.alignment = Alignment(horizontal='center')
-                row += 1
-                for veg_dict in self.vegetables:
-                    veg_label = f"{veg_dict.get('urdu', '')} ({veg_dict.get('english', '')})"
-                    entry = None
-                    for key in totals.keys():
-                        if veg_dict.get('english') and veg_dict.get('english') in key:
-                            entry = totals[key]
-                            break
-                        if veg_dict.get('urdu') and veg_dict.get('urdu') in key:
-                            entry = totals[key]
-                            break
-                        if key == veg_dict.get('english') or key == veg_dict.get('urdu'):
-                            entry = totals[key]
-                            break
-                    if not entry:
-                        continue
-                    p_display = self._format_qty_buckets(entry.get('purchased', {}))
-                    s_display = self._format_qty_buckets(entry.get('sold', {}))
-                    if p_display == "0.00" and s_display == "0.00":
-                        continue
-                    ws.cell(row, 1, veg_label).border = border
-                    ws.cell(row, 2, p_display).border = border
-                    ws.cell(row, 3, s_display).border = border
-                    row += 1
-                for col in ['G', 'H', 'I']:
-                    try:
-                        ws.column_dimensions[col].width = 20
-                    except Exception:
-                        pass
-        except Exception:
-            pass
+                start_date = datetime.strptime(start_var.get().strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+                end_date = datetime.strptime(end_var.get().strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                messagebox.showwarning("Invalid Date", "Please enter dates as YYYY-MM-DD", parent=dialog)
+                return
+            if start_date > end_date:
+                messagebox.showwarning("Invalid Range", "Start date must be on or before end date", parent=dialog)
+                return
+            out_dir = filedialog.askdirectory(title="Select Export Folder", initialdir=os.getcwd(), parent=dialog)
+            if not out_dir:
+                return
+            dialog.destroy()
+            self.export_range(start_date, end_date, out_dir, single_workbook=(mode_var.get() == 'single'))
 
-    def create_summary_sheet(self, ws):
-        ws['A1'] = "FRUZY - Monthly Summary"
-        ws['A1'].font = Font(name='Arial', size=16, bold=True)
-        ws.merge_cells('A1:E1')
-        selected_date_obj = datetime.strptime(self.selected_date, "%Y-%m-%d")
-        ws['A2'] = selected_date_obj.strftime("%B %Y")
-        ws['A2'].font = Font(name='Arial', size=12)
-        header_fill = PatternFill(start_color=self.colors['dark'].replace('#', ''),
-                                 end_color=self.colors['dark'].replace('#', ''), fill_type="solid")
-        header_font = Font(name='Arial', size=11, bold=True, color="FFFFFF")
-        border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                        top=Side(style='thin'), bottom=Side(style='thin'))
-        row = 4
-        for col, header in enumerate(['Date', 'Total Purchase', 'Total Sales', 'Profit/Loss', 'Profit %'], 1):
-            cell = ws.cell(row, col, header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.border = border
-            cell.alignment = Alignment(horizontal='center')
-        for col in ['A', 'B', 'C', 'D', 'E']:
-            ws.column_dimensions[col].width = 20
-
-    def update_summary_sheet(self, ws, wb):
-        for row in ws.iter_rows(min_row=5, max_row=ws.max_row):
-            for cell in row:
-                cell.value = None
-        border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                        top=Side(style='thin'), bottom=Side(style='thin'))
-        row = 5
-        total_purchase_sum = 0
-        total_sales_sum = 0
-        for sheet_name in wb.sheetnames:
-            if sheet_name == "Monthly Summary":
-                continue
-            sheet = wb[sheet_name]
-            total_purchase = 0
-            total_sales = 0
-            for r in sheet.iter_rows(min_row=1):
-                if r[0].value == "Total Purchase:":
-                    total_purchase = r[1].value if r[1].value else 0
-                elif r[0].value == "Total Sales:":
-                    total_sales = r[1].value if r[1].value else 0
-            profit = total_sales - total_purchase
-            profit_percent = (profit / total_purchase * 100) if total_purchase > 0 else 0
-            ws.cell(row, 1, sheet_name).border = border
-            ws.cell(row, 2, total_purchase).border = border
-            ws.cell(row, 2).number_format = '"PKR "#,##0.00'
-            ws.cell(row, 3, total_sales).border = border
-            ws.cell(row, 3).number_format = '"PKR "#,##0.00'
-            ws.cell(row, 4, profit).border = border
-            ws.cell(row, 4).number_format = '"PKR "#,##0.00'
-            ws.cell(row, 5, f"{profit_percent:.2f}%").border = border
-            total_purchase_sum += total_purchase
-            total_sales_sum += total_sales
-            row += 1
-        row += 1
-        ws.cell(row, 1, "MONTHLY TOTAL").font = Font(bold=True, size=12)
-        ws.cell(row, 2, total_purchase_sum).font = Font(bold=True, size=12)
-        ws.cell(row, 2).number_format = '"PKR "#,##0.00'
-        ws.cell(row, 3, total_sales_sum).font = Font(bold=True, size=12)
-        ws.cell(row, 3).number_format = '"PKR "#,##0.00'
-        ws.cell(row, 4, total_sales_sum - total_purchase_sum).font = Font(bold=True, size=12)
-        ws.cell(row, 4).number_format = '"PKR "#,##0.00'
-        monthly_profit_percent = ((total_sales_sum - total_purchase_sum) / total_purchase_sum * 100) if total_purchase_sum > 0 else 0
-        ws.cell(row, 5, f"{monthly_profit_percent:.2f}%").font = Font(bold=True, size=12)
+        btn_frame = ctk.CTkFrame(dialog)
+        btn_frame.pack(pady=15)
+        ctk.CTkButton(btn_frame, text="Export", command=start, width=100).pack(side='left', padx=10)
+        ctk.CTkButton(btn_frame, text="Cancel", command=dialog.destroy, width=100).pack(side='left', padx=10)
+
+    def export_range(self, start_date, end_date, out_dir, single_workbook=False):
+        """Export start_date..end_date in the background, one workbook per month or one consolidated file."""
+        from fruzy_core import excel_export
+        from fruzy_core import excel_io
+
+        # Snapshot the slice being exported so the worker never sees the UI mutate it
+        purchases, sales = self.ledger.snapshot(start_date, end_date)
+        vegetables = [dict(v) for v in self.vegetables]
+        header_color = self.colors['dark']
+
+        if not any(purchases.values()) and not any(sales.values()):
+            messagebox.showwarning("No Data", "No purchases or sales in the selected range")
+            return
+
+        def work(job):
+            if single_workbook:
+                filename = os.path.join(out_dir, f"Fruzy_{start_date}_to_{end_date}.xlsx")
+                days = excel_export.write_range_workbook(
+                    filename, start_date, end_date, purchases, sales, vegetables, header_color,
+                    progress=job.report, cancelled=lambda: job.cancelled
+                )
+                job.check_cancelled()
+                return [(filename, days)]
+
+            tasks = excel_io.month_export_tasks(out_dir, start_date, end_date, purchases, sales,
+                                                vegetables, header_color)
+            results = {}
+            job.report(0, len(tasks), "Starting workers...")
+            with ProcessPoolExecutor(max_workers=max(1, min(len(tasks), os.cpu_count() or 1))) as pool:
+                # (year, month) of each task, so files are listed by date, not by name
+                months = {pool.submit(excel_export.export_month_task, task): task[1:3] for task in tasks}
+                pending = set(months)
+                while pending:
+                    if job.cancelled:
+                        pool.shutdown(wait=True, cancel_futures=True)
+                        raise JobCancelled()
+                    finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        results[months[future]] = future.result()
+                        job.report(len(results), len(tasks), os.path.basename(results[months[future]][0]))
+            return [results[month] for month in sorted(results)]
+
+        def done(results):
+            days = sum(d for _, d in results)
+            files = "\n".join(os.path.basename(f) for f, _ in results[:12])
+            if len(results) > 12:
+                files += f"\n... and {len(results) - 12} more"
+            messagebox.showinfo("Export Complete", f"✅ Exported {days} day(s) to {len(results)} file(s) in:\n{out_dir}\n\n{files}")
+
+        BackgroundJob(
+            self.root, "Exporting Range", work,
+            on_done=done,
+            on_cancel=lambda: messagebox.showinfo("Export Cancelled", "Export was cancelled. Finished files were kept."),
+            on_error=lambda e: messagebox.showerror("Error", f"Export error: {str(e)}")
+        ).start()
 
     def on_closing(self):
         try:
-            self.all_purchases[self.selected_date] = self.purchases
-            self.all_sales[self.selected_date] = self.sales
-            self.save_all_purchases()
-            self.save_all_sales()
-            self.save_vegetables()
-            self.save_invoice_counter()
-            self.save_invoices()
+            saved = self.ledger.save_all()
+            if self.invoice_renderer.pending and not self.invoice_renderer.wait(timeout=30):
+                print("⚠️ Some invoice files were still rendering at exit.")
+            if not saved:
+                raise RuntimeError("the data folder stayed locked or a file could not be written")
             print("✅ All data saved before exit.")
         except Exception as e:
             print(f"⚠️ Final save failed: {e}")
@@ -1314,12 +1075,25 @@ class FruzyBusinessManager:
                 messagebox.showwarning("Save Warning", "Some data may not have been saved before closing.")
             except Exception:
                 pass
+        if self.invoice_server is not None:
+            self.invoice_server.stop()
+            self.invoice_server = None
         self.root.destroy()
 
 if __name__ == "__main__":
     try:
+        profiler = StartupProfiler(STARTUP_TIME, enabled='--profile-startup' in sys.argv)
+        profiler.mark('imports')
         root = ctk.CTk()
-        app = FruzyBusinessManager(root)
+        profiler.mark('root window created')
+        app = FruzyBusinessManager(root, profiler)
+        # --invoice-server[=PORT] accepts invoices from the web generator on localhost
+        for arg in sys.argv[1:]:
+            if arg == '--invoice-server' or arg.startswith('--invoice-server='):
+                port = arg.partition('=')[2]
+                app.start_invoice_server(int(port) if port.isdigit() else None,
+                                         token=os.environ.get('FRUZY_INVOICE_TOKEN'))
+        root.after_idle(profiler.finish)
         root.mainloop()
     except Exception as e:
         try:
@@ -2,15 +2,24 @@
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
+from jobs import BatchJob
+from fruzy_core.events import (DateChanged, DayReplaced, PurchaseAdded, PurchaseRemoved, PurchaseUpdated,
+                               SaleAdded, SaleRemoved, SaleUpdated)
+from fruzy_core.rates import load_purchase_rates
+from utils import Debouncer, apply_record_event, row_key, sync_tree
 
 
 class PurchaseEntryTab:
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
-        self._rate_trace_id = None
+        # English item name -> unit it was sold in; None until (re)built by _get_invoice_unit
+        self._unit_index = None
         self.create_widgets()
+        for event_type in (PurchaseAdded, PurchaseRemoved, PurchaseUpdated):
+            self.app.ledger.events.subscribe(event_type, self._on_purchases_changed)
+        for event_type in (SaleAdded, SaleRemoved, SaleUpdated, DayReplaced, DateChanged):
+            self.app.ledger.events.subscribe(event_type, self._drop_unit_index)
 
     def create_widgets(self):
         self._create_form()
@@ -31,10 +40,15 @@ class PurchaseEntryTab:
         row1.pack(fill='x', padx=10, pady=5)
         ctk.CTkLabel(row1, text="Item Name:", width=90, anchor='w').pack(side='left', padx=5)
         self.app.purchase_veg_var = tk.StringVar()
-        self.app.purchase_veg_var.trace('w', self._on_vegetable_selected)
-        ctk.CTkEntry(row1, textvariable=self.app.purchase_veg_var, width=220).pack(side='left', padx=5)
+        # Unit and rate lookups wait for typing to pause; the total below updates per keystroke
+        self._item_lookup = Debouncer(self.parent, self._on_item_settled)
+        self.app.purchase_veg_var.trace('w', self._item_lookup)
+        item_entry = ctk.CTkEntry(row1, textvariable=self.app.purchase_veg_var, width=220)
+        item_entry.pack(side='left', padx=5)
+        item_entry.bind('<FocusOut>', self._item_lookup.flush)
         ctk.CTkLabel(row1, text="Quantity:", width=80, anchor='w').pack(side='left', padx=10)
         self.app.purchase_qty_var = tk.StringVar()
+        self.app.purchase_qty_var.trace('w', self.app.calculate_purchase_total)
         ctk.CTkEntry(row1, textvariable=self.app.purchase_qty_var, width=80).pack(side='left', padx=5)
         ctk.CTkLabel(row1, text="Unit:", width=60, anchor='w').pack(side='left', padx=10)
         self.app.purchase_unit_var = tk.StringVar(value='kg')
@@ -172,7 +186,8 @@ class PurchaseEntryTab:
             columns=('Vegetable', 'Quantity', 'Rate', 'Total', 'Vendor', 'Payment'),
             headings=('Item Name', 'Quantity', 'Rate (PKR)', 'Total (PKR)', 'Vendor', 'Payment Type'),
             widths=(200, 120, 100, 120, 150, 100),
-            height=12
+            height=12,
+            virtual=True
         )
         self.app.purchase_tree.pack(fill='both', expand=True, padx=10, pady=10)
 
@@ -197,42 +212,32 @@ class PurchaseEntryTab:
         if not file_path:
             return
 
-        try:
-            df = pd.read_excel(file_path, usecols=[0, 1], header=None, dtype=str)
-            if df.shape[1] < 2:
-                raise ValueError("Excel file must have at least two columns: Item Name and Rate.")
-
-            df.columns = ['Item', 'Rate']
-            df = df.dropna()
-
-            rate_dict = {}
-            for _, row in df.iterrows():
-                item = str(row['Item']).strip()
-                rate_val = row['Rate']
-                if item and pd.notna(rate_val):
-                    try:
-                        rate_clean = str(rate_val).replace(',', '').strip()
-                        rate_num = float(rate_clean)
-                        rate_dict[item] = rate_num
-                    except (ValueError, TypeError):
-                        continue
-
-            self.app.imported_purchase_rates = rate_dict
-            self._setup_rate_autofill()
-            messagebox.showinfo("Success", f"Successfully imported {len(rate_dict)} purchase rates!")
+        def commit(results, errors):
+            if errors:
+                messagebox.showerror("Import Error", f"Failed to import purchase rates:\n{errors[0][1]}")
+                return
+            rate_dict, failed_rows = results[0][1]
+            self.app.rates.load('purchase', rate_dict)
+            msg = f"Successfully imported {len(rate_dict)} purchase rates!"
+            if failed_rows:
+                lines = [f"Row {row}: '{item}' rate '{rate}'" for row, item, rate in failed_rows[:10]]
+                msg += f"\n\n⚠️ {len(failed_rows)} row(s) could not be read:\n" + "\n".join(lines)
+                if len(failed_rows) > 10:
+                    msg += f"\n... and {len(failed_rows) - 10} more."
+                messagebox.showwarning("Import Complete", msg)
+            else:
+                messagebox.showinfo("Success", msg)
 
-        except Exception as e:
-            messagebox.showerror("Import Error", f"Failed to import purchase rates:\n{str(e)}")
+        BatchJob(self.app.root, "Importing Purchase Rates", [file_path], process=load_purchase_rates, commit=commit).start()
 
-    def _setup_rate_autofill(self):
-        if self._rate_trace_id:
-            self.app.purchase_veg_var.trace_vdelete('w', self._rate_trace_id)
-        self._rate_trace_id = self.app.purchase_veg_var.trace('w', self._on_item_name_change)
+    def _on_item_settled(self):
+        self._on_vegetable_selected()
+        self._on_item_name_change()
 
     def _on_item_name_change(self, *args):
         item = self.app.purchase_veg_var.get().strip()
-        if hasattr(self.app, 'imported_purchase_rates') and item:
-            rate = self.app.imported_purchase_rates.get(item)
+        if item:
+            rate = self.app.rates.lookup('purchase', item)
             if rate is not None:
                 self.app.purchase_rate_var.set(str(rate))
 
@@ -253,56 +258,69 @@ class PurchaseEntryTab:
             self.unit_combo.configure(state='readonly')
             self.unit_label.configure(text="")
     
-    def _get_invoice_unit(self, veg_name):
+    @staticmethod
+    def _english_name(veg_str):
         import re
-        
-        def get_english_name(veg_str):
-            if not veg_str:
-                return veg_str
-            veg_str = str(veg_str).strip()
-            matches = list(re.finditer(r'\([^()]*(?:\([^()]*\))?[^()]*\)', veg_str))
-            for match in reversed(matches):
-                content = match.group(0)[1:-1].strip()
-                if content.lower() in ['big size', 'small size', 'large', 'small']:
-                    continue
-                if any(c.isalpha() for c in content):
-                    content = re.sub(r'\s*\(\s*(big|small)\s*size\s*\)', '', content, flags=re.IGNORECASE).strip()
-                    content = re.sub(r'\s*\(\s*\)', '', content).strip()
-                    return content
+
+        if not veg_str:
             return veg_str
-        
-        if hasattr(self.app, 'sales') and self.app.sales:
-            target_english = get_english_name(veg_name)
-            
-            for date_items in self.app.sales.values():
-                for item in date_items:
-                    if 'vegetable' in item:
-                        invoice_veg = item['vegetable']
-                        invoice_english = get_english_name(invoice_veg)
-                        
-                        if invoice_english.lower() == target_english.lower():
-                            qty_str = item.get('quantity', '')
-                            if isinstance(qty_str, str) and ' ' in qty_str:
-                                unit = qty_str.split()[-1]
-                                return unit
-        
-        return None
+        veg_str = str(veg_str).strip()
+        matches = list(re.finditer(r'\([^()]*(?:\([^()]*\))?[^()]*\)', veg_str))
+        for match in reversed(matches):
+            content = match.group(0)[1:-1].strip()
+            if content.lower() in ['big size', 'small size', 'large', 'small']:
+                continue
+            if any(c.isalpha() for c in content):
+                content = re.sub(r'\s*\(\s*(big|small)\s*size\s*\)', '', content, flags=re.IGNORECASE).strip()
+                content = re.sub(r'\s*\(\s*\)', '', content).strip()
+                return content
+        return veg_str
+
+    def _drop_unit_index(self, event):
+        # Sales changed (edits in place included) or the day moved; purchase events don't matter
+        if getattr(event, 'kind', 'sales') == 'sales':
+            self._unit_index = None
+
+    def _get_invoice_unit(self, veg_name):
+        """Unit this item was sold in, from the sales ledger (all dates), or None."""
+        if self._unit_index is None:
+            # Built once per change to the sales, not on every keystroke
+            all_sales = getattr(self.app, 'all_sales', {})
+            today = getattr(self.app, 'sales', [])
+            index = {}
+            selected = getattr(self.app, 'selected_date', None)
+            day_lists = [items for date, items in all_sales.items() if date != selected] + [today]
+            for items in day_lists:
+                for item in items:
+                    qty_str = item.get('quantity', '')
+                    if 'vegetable' in item and isinstance(qty_str, str) and ' ' in qty_str:
+                        english = self._english_name(item['vegetable']).lower()
+                        index.setdefault(english, qty_str.split()[-1])
+            self._unit_index = index
+        return self._unit_index.get(self._english_name(veg_name).lower())
+
+    @staticmethod
+    def _row_values(purchase):
+        return (
+            purchase.get('vegetable_display', ''),
+            purchase.get('quantity', ''),
+            purchase.get('rate', ''),
+            purchase.get('total', ''),
+            purchase.get('vendor', ''),
+            purchase.get('payment', '')
+        )
 
     def reload_purchase_list(self):
         try:
             if not (hasattr(self.app, 'purchase_tree') and self.app.purchase_tree):
                 return
-            tree = self.app.purchase_tree
-            for iid in tree.get_children():
-                tree.delete(iid)
-            for p in getattr(self.app, 'purchases', []):
-                tree.insert('', 'end', values=(
-                    p.get('vegetable', ''),
-                    p.get('quantity', ''),
-                    p.get('rate', ''),
-                    p.get('total', ''),
-                    p.get('vendor', ''),
-                    p.get('payment', '')
-                ))
+            sync_tree(self.app.purchase_tree, [(row_key(p), self._row_values(p))
+                                               for p in getattr(self.app, 'purchases', [])])
         except Exception as e:
-            print(f"Error reloading purchase list: {e}")
\ No newline at end of file
+            print(f"Error reloading purchase list: {e}")
+
+    def _on_purchases_changed(self, event):
+        """Apply one ledger change to the list instead of re-syncing the whole day."""
+        if event.date != self.app.selected_date or self.app.is_stale('purchases') or not self.app.purchase_tree:
+            return
+        apply_record_event(self.app.purchase_tree, event, self._row_values)
@@ -1,13 +1,16 @@
 # sales_entry.py
 import customtkinter as ctk
-import tkinter as tk
 from tkinter import ttk, messagebox
+from fruzy_core.events import SaleAdded, SaleRemoved, SaleUpdated
+from utils import apply_record_event, row_key, sync_tree
 
 class SalesEntryTab:
     def __init__(self, parent, app):
         self.parent = parent
         self.app = app
         self.create_widgets()
+        for event_type in (SaleAdded, SaleRemoved, SaleUpdated):
+            self.app.ledger.events.subscribe(event_type, self._on_sales_changed)
 
     def create_widgets(self):
         # Info banner (styled like purchase tab)
@@ -39,6 +42,7 @@ class SalesEntryTab:
         ctk.CTkEntry(row1, textvariable=self.app.sales_veg_var, width=220).pack(side='left', padx=5)
         ctk.CTkLabel(row1, text="Quantity:", width=80, anchor='w').pack(side='left', padx=10)
         self.app.sales_qty_var = ctk.StringVar()
+        self.app.sales_qty_var.trace('w', self.app.calculate_sales_total)
         ctk.CTkEntry(row1, textvariable=self.app.sales_qty_var, width=80).pack(side='left', padx=5)
         ctk.CTkLabel(row1, text="Unit:", width=60, anchor='w').pack(side='left', padx=10)
         self.app.sales_unit_var = ctk.StringVar(value='kg')
@@ -91,7 +95,8 @@ class SalesEntryTab:
             columns=('Source', 'Vegetable', 'Quantity', 'Rate', 'Total'),
             headings=('Source', 'Item Name', 'Quantity', 'Rate (PKR)', 'Total (PKR)'),
             widths=(100, 220, 120, 120, 150),
-            height=12
+            height=12,
+            virtual=True
         )
         # 🔑 CRITICAL: Force extended selection & bind Cmd+A/Ctrl+A
         self.app.sales_tree.configure(selectmode='extended')
@@ -146,34 +151,40 @@ class SalesEntryTab:
         # Format quantity as "value unit" string
         formatted_quantity = f"{qty_val:.2f} {unit}"
 
-        # Call main app to add sale (assumes app handles data structure)
-        success = self.app.add_sale()
+        success = self.app.add_sale(
+            vegetable=veg,
+            quantity=formatted_quantity,
+            rate=rate_val
+        )
         if success:
             self.app.sales_veg_var.set("")
             self.app.sales_qty_var.set("")
             self.app.sales_rate_var.set("")
             self.app.sales_total_var.set("0.00")
 
+    @staticmethod
+    def _row_values(sale):
+        return (
+            sale.get('source', ''),
+            sale.get('vegetable_display', ''),
+            sale.get('quantity', ''),
+            sale.get('rate', ''),
+            sale.get('total', '')
+        )
+
     def reload_sales_list(self):
-        """Reload the sales list Treeview using index-based item IDs (iid = str(index))."""
+        """Sync the sales list Treeview with self.app.sales (one row per record, keyed by row_key)."""
         try:
-            tree = self.app.sales_tree
-            # Clear all existing items safely
-            tree.delete(*tree.get_children())
-
-            # Repopulate using current self.app.sales list
-            sales_data = getattr(self.app, 'sales', [])
-            for i, s in enumerate(sales_data):
-                tree.insert('', 'end', iid=str(i), values=(
-                    s.get('source', ''),
-                    s.get('vegetable_display', ''),
-                    s.get('quantity', ''),
-                    s.get('rate', ''),
-                    s.get('total', '')
-                ))
+            sync_tree(self.app.sales_tree, [(row_key(s), self._row_values(s)) for s in getattr(self.app, 'sales', [])])
         except Exception as e:
             print(f"Error reloading sales list: {e}")
 
+    def _on_sales_changed(self, event):
+        """Apply one ledger change to the list instead of re-syncing the whole day."""
+        if event.date != self.app.selected_date or self.app.is_stale('sales'):
+            return
+        apply_record_event(self.app.sales_tree, event, self._row_values)
+
     def _select_all_sales(self):
         """Select all items in the sales Treeview (for Cmd+A / Ctrl+A)."""
         try:
@@ -0,0 +1,91 @@
+# tests/test_ingest.py - The invoice endpoint, posted to from a local client (run: python -m pytest tests)
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fruzy_core.ingest import InvoiceIngestServer  # noqa: E402
+
+TOKEN = 's3cret'
+
+
+@pytest.fixture
+def server():
+    ingest = InvoiceIngestServer(port=0, token=TOKEN).start()
+    yield ingest
+    ingest.stop()
+
+
+def _request(server, method, path, body=None, token=TOKEN):
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    headers = {'X-Fruzy-Token': token} if token else {}
+    request = urllib.request.Request(server.url + path, data=data, method=method, headers=headers)
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def _invoice(**item):
+    line = {'vegetable': 'Tomato', 'urdu': 'ٹماٹر', 'size': 'Large', 'quantity': '2 kg', 'rate': 150}
+    line.update(item)
+    return {'invoice_number': 20260109143000, 'customer_name': 'Ali', 'items': [line]}
+
+
+def test_valid_invoices_are_queued(server):
+    status, body = _request(server, 'POST', '/invoices',
+                            [_invoice(), _invoice(quantity=1.5, rate='100', total=150)])
+    assert status == 202
+    assert len(body['queued']) == 2
+
+    batch = server.drain()
+    assert [ticket for ticket, _ in batch] == body['queued']
+    first, second = (invoice for _, invoice in batch)
+    assert first['date'] == '2026-01-09'
+    assert first['items'][0] == {'vegetable': 'Tomato', 'urdu': 'ٹماٹر', 'size': 'Large',
+                                 'quantity': '2 kg', 'rate': 150.0, 'total': 300.0}
+    assert second['items'][0]['quantity'] == '1.5 kg'
+    assert second['items'][0]['total'] == 150.0
+
+    status, result = _request(server, 'GET', f"/invoices/{body['queued'][0]}")
+    assert status == 200 and result['status'] == 'queued'
+
+
+@pytest.mark.parametrize('item', [
+    {'rate': 'nan'},
+    {'rate': 'inf'},
+    {'rate': -1},
+    {'rate': True},
+    {'quantity': -2},
+    {'quantity': 0},
+    {'quantity': 'nan kg'},
+    {'quantity': ['2']},
+    {'vegetable': ['x']},
+    {'urdu': 5},
+    {'total': 999, 'quantity': 1, 'rate': 2},
+    {'size': 'Huge'},
+])
+def test_invalid_items_are_rejected(server, item):
+    status, body = _request(server, 'POST', '/invoices', [_invoice(), _invoice(**item)])
+    assert status == 400
+    assert body['index'] == 1
+    assert server.drain() == []
+
+
+def test_invoice_level_errors(server):
+    assert _request(server, 'POST', '/invoices', {'customer_name': 'Ali', 'items': []})[0] == 400
+    assert _request(server, 'POST', '/invoices', dict(_invoice(), customer_name=['Ali']))[0] == 400
+    assert _request(server, 'POST', '/invoices', dict(_invoice(), date='09-01-2026'))[0] == 400
+    assert server.drain() == []
+
+
+def test_token_is_required(server):
+    assert _request(server, 'GET', '/health', token=None)[0] == 401
+    assert _request(server, 'POST', '/invoices', _invoice(), token='wrong')[0] == 401
+    assert _request(server, 'GET', '/health') == (200, {'ok': True, 'pending': 0})
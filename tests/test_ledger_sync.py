@@ -0,0 +1,116 @@
+# tests/test_ledger_sync.py - Two ledgers sharing one data folder (run: python -m pytest tests)
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fruzy_core import Ledger  # noqa: E402
+from fruzy_core.versions import VERSIONS_FILE, load_versions  # noqa: E402
+
+DATE = '2026-01-09'
+
+
+def _invoice(number, size='Large'):
+    return {
+        'invoice_number': number,
+        'customer_name': 'Hotel Grand',
+        'customer_phone': '',
+        'items': [
+            {'vegetable': 'Tomato', 'urdu': 'ٹماٹر', 'size': size, 'quantity': '2 kg', 'rate': 100.0, 'total': 200.0},
+            {'vegetable': 'Onion', 'urdu': 'پیاز', 'size': size, 'quantity': '1 kg', 'rate': 80.0, 'total': 80.0},
+        ],
+        'total_amount': 280.0,
+        'date': DATE,
+        'time': '09-Jan-2026 10:00 AM',
+        'status': 'active',
+        'filepath': '',
+    }
+
+
+def _stored_sales(data_dir):
+    with open(os.path.join(data_dir, 'sales_by_date.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _seed(data_dir):
+    ledger = Ledger.open(data_dir)
+    ledger.add_invoice(_invoice(20260109100000))
+    ledger.add_invoice(_invoice(20260109100500, size='Small'))
+    ledger.add_sale(DATE, 'Garlic', '1', '300')
+    ledger.add_purchase(DATE, 'Tomato', '10', '60')
+    assert ledger.save_all()
+    return ledger
+
+
+def test_load_then_save_writes_nothing(tmp_path):
+    data_dir = str(tmp_path)
+    _seed(data_dir)
+    paths = [os.path.join(data_dir, name) for name in ('sales_by_date.json', 'purchases_by_date.json',
+                                                       'invoices.json', VERSIONS_FILE)]
+    before = {path: os.stat(path).st_mtime_ns for path in paths}
+    versions = load_versions(data_dir)
+
+    ledger = Ledger.open(data_dir)
+    assert ledger.save_all()
+
+    assert {path: os.stat(path).st_mtime_ns for path in paths} == before
+    assert load_versions(data_dir) == versions
+
+
+def test_invoice_deleted_on_one_counter_stays_deleted(tmp_path):
+    data_dir = str(tmp_path)
+    _seed(data_dir)
+    a = Ledger.open(data_dir)
+    b = Ledger.open(data_dir)
+
+    a.delete_invoice(20260109100000)
+    assert a.save('sales') and a.save_invoices()
+
+    b.add_sale(DATE, 'Onion', '3', '90')
+    assert b.save('sales')
+
+    numbers = [s.get('invoice_number') for s in _stored_sales(data_dir)[DATE]]
+    assert 20260109100000 not in numbers
+    assert numbers.count(20260109100500) == 2
+    assert [s['vegetable_english'] for s in _stored_sales(data_dir)[DATE] if not s.get('invoice_number')] \
+        == ['Garlic', 'Onion']
+    assert [s.get('invoice_number') for s in b.all_sales[DATE]] == numbers
+
+
+def test_edit_on_one_counter_survives_save_on_another(tmp_path):
+    data_dir = str(tmp_path)
+    _seed(data_dir)
+    a = Ledger.open(data_dir)
+    b = Ledger.open(data_dir)
+
+    sale = next(s for s in a.all_sales[DATE] if not s.get('invoice_number'))
+    sale['rate'] = '350.00'
+    a.mark_updated('sales', DATE, [sale])
+    assert a.save('sales')
+
+    b.add_purchase(DATE, 'Onion', '5', '70')
+    b.add_sale(DATE, 'Tomato', '1', '120')
+    assert b.save()
+
+    stored = {s['id']: s for s in _stored_sales(data_dir)[DATE]}
+    assert stored[sale['id']]['rate'] == '350.00'
+
+
+def test_failed_write_keeps_version_and_stays_unsaved(tmp_path):
+    data_dir = str(tmp_path)
+    _seed(data_dir)
+    ledger = Ledger.open(data_dir)
+    versions = load_versions(data_dir)
+
+    ledger.invoices[0]['customer_name'] = 'Cafe Lahore'
+    # A directory where the temp file goes makes the write fail
+    os.mkdir(os.path.join(data_dir, 'invoices.json.tmp'))
+    assert not ledger.save_invoices()
+    assert load_versions(data_dir) == versions
+    assert 'invoices' in ledger.unsaved
+
+    os.rmdir(os.path.join(data_dir, 'invoices.json.tmp'))
+    assert ledger.flush()
+    assert load_versions(data_dir)['invoices'] == versions.get('invoices', 0) + 1
+    assert Ledger.open(data_dir).invoices[0]['customer_name'] == 'Cafe Lahore'
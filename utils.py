@@ -4,8 +4,11 @@ from tkinter import ttk
 import os
 import sys
 import platform
+import time
 from pathlib import Path
 
+from fruzy_core.events import RecordsAdded, RecordsRemoved
+
 
 def get_app_data_dir(app_name: str = 'Fruzy') -> str:
     """Return a platform-appropriate directory for persistent application data.
@@ -33,14 +36,18 @@ def get_app_data_dir(app_name: str = 'Fruzy') -> str:
     return str(app_dir)
 
 
-def make_treeview(parent, columns, headings, widths=None, height=10):
-    """Create and return a configured Treeview with scrollbar and extended selection."""
+def make_treeview(parent, columns, headings, widths=None, height=10, virtual=False):
+    """Create and return a configured Treeview with scrollbar and extended selection.
+
+    With virtual=True a VirtualTreeview is returned instead: same API for the calls the
+    tabs make, but only the rows on screen exist as Tk items.
+    """
     frame = tk.Frame(parent)
     frame.pack(fill='both', expand=True)
-    
+
     scrollbar = tk.Scrollbar(frame)
     scrollbar.pack(side='right', fill='y')
-    
+
     tree = ttk.Treeview(
         frame,
         columns=columns,
@@ -51,15 +58,463 @@ def make_treeview(parent, columns, headings, widths=None, height=10):
     )
     tree.pack(side='left', fill='both', expand=True)
     scrollbar.config(command=tree.yview)
-    
+
     for col, header in zip(columns, headings):
         tree.heading(col, text=header)
         width = widths[columns.index(col)] if widths else 120
         tree.column(col, width=width)
-    
+
+    if virtual:
+        return VirtualTreeview(tree, scrollbar)
     return tree
 
 
+def _flatten_items(items):
+    """Treeview methods accept ids as varargs or as one tuple/list (e.g. selection_set(children))."""
+    flat = []
+    for item in items:
+        if isinstance(item, (tuple, list)):
+            flat.extend(item)
+        else:
+            flat.append(item)
+    return flat
+
+
+DEBOUNCE_MS = 150
+
+
+class Debouncer:
+    """Coalesces a burst of calls into one: `callback` runs once the calls stop for `delay` ms.
+
+    Meant for StringVar traces that do lookups: each keystroke cancels the pending run,
+    so fast typing or a barcode scanner entering a whole name triggers a single lookup
+    with the final value. Cheap arithmetic traces should stay undebounced.
+    """
+
+    def __init__(self, widget, callback, delay=DEBOUNCE_MS):
+        self.widget = widget
+        self.callback = callback
+        self.delay = delay
+        self._after_id = None
+
+    def __call__(self, *args):
+        self.cancel()
+        self._after_id = self.widget.after(self.delay, self._run)
+
+    def _run(self):
+        self._after_id = None
+        self.callback()
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def flush(self, *args):
+        """Run a pending call right away (e.g. when the field loses focus)."""
+        if self._after_id is not None:
+            self.cancel()
+            self.callback()
+
+
+def row_key(record):
+    """Stable tree iid for a ledger record: its 'id' when it has one, else the object's identity."""
+    return str(record.get('id') or f"r{id(record):x}")
+
+
+def _diff_items(tree, current, rows, shown):
+    """Bring `tree`'s top-level items from `current` (ids, in order) to `rows` ([iid, values, tags]).
+
+    `shown` maps each current iid to the (values, tags) it was last given, if known.
+    Only stale rows are deleted, changed rows updated and new rows inserted; the rows
+    that stay are moved only if their relative order changed. Returns the new mapping.
+    """
+    wanted = set(row[0] for row in rows)
+    stale = [iid for iid in current if iid not in wanted]
+    if stale:
+        tree.delete(*stale)
+    kept = [iid for iid in current if iid in wanted]
+    kept_set = set(kept)
+    order = [row[0] for row in rows if row[0] in kept_set]
+    if order != kept:
+        for position, iid in enumerate(order):
+            tree.move(iid, '', position)
+    result = {}
+    for position, (iid, values, tags) in enumerate(rows):
+        state = (tuple(values), tuple(tags))
+        if iid not in kept_set:
+            tree.insert('', position, iid=iid, values=state[0], tags=state[1])
+        elif shown.get(iid) != state:
+            tree.item(iid, values=state[0], tags=state[1])
+        result[iid] = state
+    return result
+
+
+def sync_tree(tree, rows):
+    """Make a Treeview show `rows`, a list of (key, values) pairs in display order.
+
+    Unlike delete-all/re-insert, items whose key is unchanged stay in place, so the
+    selection, focus and scroll position survive and the Tk work is proportional to
+    what actually changed. Works with plain ttk.Treeview and VirtualTreeview alike.
+    """
+    if isinstance(tree, VirtualTreeview):
+        tree.sync(rows)
+        return
+    rows = [[str(key), values, ()] for key, values in rows]
+    tree._synced_rows = _diff_items(tree, list(tree.get_children()), rows, getattr(tree, '_synced_rows', {}))
+
+
+def apply_record_event(tree, event, values):
+    """Apply a ledger RecordsAdded/Removed/Updated event to a tree kept by sync_tree.
+
+    `values(record)` gives a row's column values. The work is proportional to the
+    records in the event, not to the rows in the tree.
+    """
+    if isinstance(event, RecordsAdded):
+        for record in event.records:
+            if not tree.exists(row_key(record)):
+                tree.insert('', 'end', iid=row_key(record), values=values(record))
+    elif isinstance(event, RecordsRemoved):
+        stale = [row_key(r) for r in event.records if tree.exists(row_key(r))]
+        if stale:
+            tree.delete(*stale)
+    else:
+        for record in event.records:
+            if tree.exists(row_key(record)):
+                tree.item(row_key(record), values=values(record))
+
+
+class VirtualTreeview:
+    """Treeview front-end that keeps all rows in Python and materialises only the visible window.
+
+    A ttk.Treeview slows down badly past a few thousand items (every insert, delete and
+    redraw walks the item list), so this class holds the rows itself and shows only
+    `visible + BUFFER` of them as real items. The scrollbar, the mouse wheel and the
+    navigation keys move a window over the model. Selection lives in the model, which is
+    why Ctrl/Cmd+A and Shift-click ranges still work across rows that are not on screen.
+
+    The supported subset of the Treeview API is insert, delete, get_children, item,
+    selection, selection_set/add/remove, index, exists, see, focus and yview. Anything
+    else (heading, column, identify_row, bind, pack, tag_configure, ...) goes to the real
+    tree. Only flat lists are supported; the parent argument of insert must be ''.
+    """
+
+    BUFFER = 10
+    DEFAULT_ROW_HEIGHT = 20
+
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self._rows = []          # [iid, values, tags] in display order
+        self._index = {}         # iid -> position in _rows, rebuilt lazily
+        self._index_dirty = False
+        self._selected = set()
+        self._anchor = None
+        self._focus = None
+        self._first = 0
+        self._shown = {}         # iid -> (values, tags) of the materialised rows, in order
+        self._row_height = None
+        self._counter = 0
+        self._render_pending = False
+
+        scrollbar.config(command=self.yview)
+        tree.configure(yscrollcommand='')
+        tree.bind('<Configure>', lambda e: self._render())
+        tree.bind('<ButtonPress-1>', self._on_click)
+        tree.bind('<Shift-ButtonPress-1>', lambda e: self._on_click(e, extend=True))
+        for sequence in ('<Control-ButtonPress-1>', '<Command-ButtonPress-1>', '<Meta-ButtonPress-1>'):
+            try:
+                tree.bind(sequence, lambda e: self._on_click(e, toggle=True))
+            except tk.TclError:
+                pass  # modifier not available on this platform
+        tree.bind('<MouseWheel>', self._on_wheel)
+        tree.bind('<Button-4>', lambda e: self._scroll_units(-3))
+        tree.bind('<Button-5>', lambda e: self._scroll_units(3))
+        for key, step in (('<Up>', -1), ('<Down>', 1), ('<Prior>', 'page-'), ('<Next>', 'page+'),
+                          ('<Home>', 'home'), ('<End>', 'end')):
+            tree.bind(key, lambda e, s=step: self._on_key(s, extend=False))
+            tree.bind(key.replace('<', '<Shift-'), lambda e, s=step: self._on_key(s, extend=True))
+        enable_treeview_select_all(self)
+
+    def __getattr__(self, name):
+        return getattr(self.tree, name)
+
+    # ---- model helpers ----
+    def _position(self, iid):
+        if self._index_dirty:
+            self._index = {row[0]: i for i, row in enumerate(self._rows)}
+            self._index_dirty = False
+        return self._index.get(iid)
+
+    def _row(self, iid):
+        pos = self._position(iid)
+        if pos is None:
+            raise tk.TclError(f'Item {iid} not found')
+        return self._rows[pos]
+
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.tree.after_idle(self._render)
+
+    # ---- Treeview-compatible API ----
+    def insert(self, parent, index, iid=None, **kw):
+        if parent:
+            raise tk.TclError('VirtualTreeview only supports top-level rows')
+        if iid is None:
+            self._counter += 1
+            iid = f'V{self._counter:06X}'
+            while self._position(iid) is not None:
+                self._counter += 1
+                iid = f'V{self._counter:06X}'
+        else:
+            iid = str(iid)
+            if self._position(iid) is not None:
+                raise tk.TclError(f'Item {iid} already exists')
+        tags = kw.get('tags', ())
+        row = [iid, list(kw.get('values', ())), (tags,) if isinstance(tags, str) else tuple(tags)]
+        if index == 'end' or index >= len(self._rows):
+            self._rows.append(row)
+            if not self._index_dirty:
+                self._index[iid] = len(self._rows) - 1
+        else:
+            self._rows.insert(max(0, int(index)), row)
+            self._index_dirty = True
+        self._schedule_render()
+        return iid
+
+    def delete(self, *items):
+        doomed = set(str(i) for i in _flatten_items(items))
+        if not doomed:
+            return
+        self._rows = [row for row in self._rows if row[0] not in doomed]
+        self._index_dirty = True
+        self._selected -= doomed
+        if self._anchor in doomed:
+            self._anchor = None
+        if self._focus in doomed:
+            self._focus = None
+        self._schedule_render()
+
+    def get_children(self, item=''):
+        if item:
+            return ()
+        return tuple(row[0] for row in self._rows)
+
+    def item(self, iid, option=None, **kw):
+        row = self._row(str(iid))
+        if 'values' in kw:
+            row[1] = list(kw['values'])
+        if 'tags' in kw:
+            row[2] = tuple(kw['tags']) if not isinstance(kw['tags'], str) else (kw['tags'],)
+        if kw:
+            if row[0] in self._shown:
+                self.tree.item(row[0], values=row[1], tags=row[2])
+                self._shown[row[0]] = (tuple(row[1]), row[2])
+            return None
+        info = {'text': '', 'image': '', 'values': list(row[1]), 'open': 0, 'tags': list(row[2])}
+        return info[option] if option else info
+
+    def set(self, iid, column=None, value=None):
+        row = self._row(str(iid))
+        columns = list(self.tree['columns'])
+        if column is None:
+            return dict(zip(columns, row[1]))
+        col = columns.index(column) if not isinstance(column, int) else column
+        if value is None:
+            return row[1][col] if col < len(row[1]) else ''
+        while len(row[1]) <= col:
+            row[1].append('')
+        row[1][col] = value
+        if row[0] in self._shown:
+            self.tree.item(row[0], values=row[1])
+            self._shown[row[0]] = (tuple(row[1]), row[2])
+
+    def index(self, iid):
+        pos = self._position(str(iid))
+        if pos is None:
+            raise tk.TclError(f'Item {iid} not found')
+        return pos
+
+    def exists(self, iid):
+        return self._position(str(iid)) is not None
+
+    def selection(self):
+        if not self._selected:
+            return ()
+        return tuple(row[0] for row in self._rows if row[0] in self._selected)
+
+    def selection_set(self, *items):
+        items = [str(i) for i in _flatten_items(items)]
+        self._selected = set(i for i in items if self.exists(i))
+        if items:
+            self._anchor = items[0]
+        self._apply_selection()
+
+    def selection_add(self, *items):
+        self._selected.update(str(i) for i in _flatten_items(items) if self.exists(str(i)))
+        self._apply_selection()
+
+    def selection_remove(self, *items):
+        self._selected.difference_update(str(i) for i in _flatten_items(items))
+        self._apply_selection()
+
+    def select_all(self):
+        self._selected = set(row[0] for row in self._rows)
+        self._apply_selection()
+
+    def sync(self, rows):
+        """Replace the model with `rows` ((key, values) pairs), keeping selection and scroll.
+
+        Rows whose key survives keep their tags, selection and focus, and the view stays on
+        the same top row even if rows were added or removed above it. Only the visible
+        window is then diffed against the Tk items.
+        """
+        top = self._rows[self._first][0] if self._first < len(self._rows) else None
+        old = {row[0]: row for row in self._rows}
+        new_rows = []
+        for key, values in rows:
+            key = str(key)
+            previous = old.get(key)
+            new_rows.append([key, list(values), previous[2] if previous else ()])
+        self._rows = new_rows
+        self._index_dirty = True
+        self._selected = set(key for key in self._selected if self._position(key) is not None)
+        if self._anchor is not None and self._position(self._anchor) is None:
+            self._anchor = None
+        if self._focus is not None and self._position(self._focus) is None:
+            self._focus = None
+        if top is not None and self._position(top) is not None:
+            self._first = self._position(top)
+        self._schedule_render()
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self._focus or ''
+        self._focus = str(iid)
+        if self._focus in self._shown:
+            self.tree.focus(self._focus)
+
+    def see(self, iid):
+        pos = self._position(str(iid))
+        if pos is None:
+            return
+        visible = self._visible_count()
+        if pos < self._first:
+            self._set_first(pos)
+        elif pos >= self._first + visible:
+            self._set_first(pos - visible + 1)
+
+    def yview(self, *args):
+        total = len(self._rows)
+        if not args:
+            if not total:
+                return 0.0, 1.0
+            return self._first / total, min(1.0, (self._first + self._visible_count()) / total)
+        if args[0] == 'moveto':
+            self._set_first(int(float(args[1]) * total))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= max(1, self._visible_count() - 1)
+            self._scroll_units(amount)
+
+    # ---- window management ----
+    def _visible_count(self):
+        height = self.tree.winfo_height()
+        if height <= 1:
+            return int(self.tree.cget('height'))
+        top = 0
+        if self._shown:
+            bbox = self.tree.bbox(next(iter(self._shown)))
+            if bbox:
+                top, self._row_height = bbox[1], bbox[3]
+        row_height = self._row_height or self.DEFAULT_ROW_HEIGHT
+        return max(1, (height - top) // row_height)
+
+    def _set_first(self, first):
+        first = max(0, min(first, len(self._rows) - self._visible_count()))
+        if first != self._first:
+            self._first = first
+            self._render()
+        return "break"
+
+    def _scroll_units(self, amount):
+        return self._set_first(self._first + amount)
+
+    def _render(self):
+        self._render_pending = False
+        tree = self.tree
+        visible = self._visible_count()
+        self._first = max(0, min(self._first, len(self._rows) - visible))
+        window = self._rows[self._first:self._first + visible + self.BUFFER]
+        self._shown = _diff_items(tree, list(self._shown), window, self._shown)
+        self._apply_selection()
+        total = len(self._rows)
+        if total:
+            self.scrollbar.set(self._first / total, min(1.0, (self._first + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _apply_selection(self):
+        shown = [iid for iid in self._shown if iid in self._selected]
+        self.tree.selection_set(shown)
+        if self._focus in self._shown:
+            self.tree.focus(self._focus)
+
+    # ---- input ----
+    def _on_click(self, event, extend=False, toggle=False):
+        if self.tree.identify_region(event.x, event.y) in ('heading', 'separator'):
+            return None  # keep sorting clicks and column resizing
+        iid = self.tree.identify_row(event.y)
+        if not iid:
+            return "break"
+        self.tree.focus_set()
+        if extend and self._anchor is not None and self.exists(self._anchor):
+            self._select_range(self._anchor, iid)
+        elif toggle:
+            self._selected.symmetric_difference_update({iid})
+            self._anchor = iid
+        else:
+            self._selected = {iid}
+            self._anchor = iid
+        self._focus = iid
+        self._apply_selection()
+        return "break"
+
+    def _select_range(self, start, end):
+        a, b = sorted((self.index(start), self.index(end)))
+        self._selected = set(row[0] for row in self._rows[a:b + 1])
+
+    def _on_wheel(self, event):
+        if abs(event.delta) >= 120:
+            return self._scroll_units(-3 * int(event.delta / 120))
+        return self._scroll_units(-event.delta)
+
+    def _on_key(self, step, extend):
+        if not self._rows:
+            return "break"
+        current = self._position(self._focus) if self._focus else None
+        if current is None:
+            current = self._first
+        page = max(1, self._visible_count() - 1)
+        if isinstance(step, int):
+            target = current + step
+        else:
+            target = {'page-': current - page, 'page+': current + page, 'home': 0, 'end': len(self._rows) - 1}[step]
+        target = max(0, min(target, len(self._rows) - 1))
+        iid = self._rows[target][0]
+        if extend and self._anchor is not None and self.exists(self._anchor):
+            self._select_range(self._anchor, iid)
+        else:
+            self._selected = {iid}
+            self._anchor = iid
+        self._focus = iid
+        self.see(iid)
+        self._apply_selection()
+        return "break"
+
+
 def enable_treeview_select_all(tree_widget):
     """
     Enable Cmd+A (macOS) and Ctrl+A (Windows/Linux) to select all items
@@ -78,4 +533,54 @@ def enable_treeview_select_all(tree_widget):
         return "break"
     
     tree_widget.bind('<Command-a>', _select_all)
-    tree_widget.bind('<Control-a>', _select_all)
\ No newline at end of file
+    tree_widget.bind('<Control-a>', _select_all)
+
+
+def load_scaled_image(source_path, size, cache_dir):
+    """Return a tk.PhotoImage of `source_path` scaled to `size` (width, height).
+
+    The scaled image is cached as a PNG in `cache_dir`, so PIL is only imported and
+    the source only decoded when the cache is missing or older than the source.
+    """
+    cached_path = os.path.join(cache_dir, f"{Path(source_path).stem}_{size[0]}x{size[1]}.png")
+    if not os.path.exists(cached_path) or os.path.getmtime(cached_path) < os.path.getmtime(source_path):
+        from PIL import Image
+
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = cached_path + '.tmp'
+        with Image.open(source_path) as img:
+            img.resize(size, Image.Resampling.LANCZOS).save(temp_path, format='PNG')
+        os.replace(temp_path, cached_path)
+    return tk.PhotoImage(file=cached_path)
+
+
+class StartupProfiler:
+    """Collects named checkpoints from process start to first idle (`--profile-startup`)."""
+
+    HEAVY_MODULES = ('openpyxl', 'PIL', 'pandas', 'pytz', 'numpy')
+
+    def __init__(self, start, enabled=True):
+        self.start = start
+        self.enabled = enabled
+        self.marks = []
+
+    def mark(self, label):
+        if self.enabled:
+            self.marks.append((label, time.perf_counter()))
+
+    def finish(self):
+        """Call from the first idle callback: the window is up, print the report."""
+        self.mark('first idle (window shown)')
+        self.report()
+
+    def report(self):
+        if not self.enabled:
+            return
+        lines = ["", "Startup profile (ms)", f"{'phase':<32}{'step':>10}{'total':>10}"]
+        previous = self.start
+        for label, moment in self.marks:
+            lines.append(f"{label:<32}{(moment - previous) * 1000:>10.1f}{(moment - self.start) * 1000:>10.1f}")
+            previous = moment
+        loaded = [name for name in self.HEAVY_MODULES if name in sys.modules]
+        lines.append(f"Heavy modules loaded: {', '.join(loaded) or 'none'}")
+        print("\n".join(lines))